@@ -1,4 +1,5 @@
 # app/main.py - COMPLETE VERSION WITH ALL SUCCESS MESSAGES
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -58,6 +59,15 @@ try:
 except Exception as e:
     print(f"❌ Chat router error: {e}")
 
+# Import and register search router
+try:
+    from app.routers.search import router as search_router
+    print("✅ Search router imported successfully!")
+    app.include_router(search_router, prefix="/api/search", tags=["search"])
+    print("✅ Search router registered!")
+except Exception as e:
+    print(f"❌ Search router error: {e}")
+
 # Import RAG service
 try:
     from app.services.rag_service import RAGService
@@ -67,6 +77,25 @@ try:
 except Exception as e:
     print(f"❌ RAG service error: {e}")
 
+@app.on_event("startup")
+async def warmup_models():
+    """Optionally load the embedding and reranking models before the first request"""
+    if os.getenv("WARMUP_EMBEDDING_MODELS", "false").lower() != "true":
+        return
+    try:
+        from app.services.embedding_service import EmbeddingService
+        EmbeddingService.shared()
+        print("✅ Embedding models warmed up!")
+    except Exception as e:
+        print(f"❌ Embedding warmup error: {e}")
+    try:
+        # A cold cross-encoder would blow the rerank time budget on the first queries
+        from app.routers.search import get_vector_db
+        get_vector_db().reranker.warmup()
+        print("✅ Reranker warmed up!")
+    except Exception as e:
+        print(f"❌ Reranker warmup error: {e}")
+
 @app.get("/")
 async def root():
     return {"message": "RAG Chat API is running!", "status": "success"}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -15,6 +15,7 @@ class DocumentChunk(Base):
     start_position = Column(Integer, nullable=False)
     end_position = Column(Integer, nullable=False)
     embedding_id = Column(String, nullable=True)  # For vector DB reference
+    token_count = Column(Integer, nullable=True)  # Embedding-model word-pieces (token-mode chunking)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -22,4 +23,68 @@ class DocumentChunk(Base):
 
     def __repr__(self):
         return f"<DocumentChunk(id={self.id}, document_id={self.document_id}, chunk_index={self.chunk_index})>"
-    
\ No newline at end of file
+    
+
+
+# FTS5 mirror of document_chunks.content (SQLite only). It is an external-content
+# table, so it stores just the index; triggers keep it in sync with every write.
+CHUNK_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS document_chunks_fts USING fts5(
+        content,
+        content='document_chunks',
+        content_rowid='id',
+        tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS document_chunks_fts_insert AFTER INSERT ON document_chunks BEGIN
+        INSERT INTO document_chunks_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS document_chunks_fts_delete AFTER DELETE ON document_chunks BEGIN
+        INSERT INTO document_chunks_fts(document_chunks_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS document_chunks_fts_update AFTER UPDATE OF content ON document_chunks BEGIN
+        INSERT INTO document_chunks_fts(document_chunks_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO document_chunks_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """
+]
+
+for _statement in CHUNK_FTS_DDL:
+    event.listen(DocumentChunk.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+# Change log of document_chunks (SQLite only): one row per chunk, re-stamped with a
+# fresh sequence number on every insert, delete or content change. AUTOINCREMENT
+# never reuses a number, so readers holding the last sequence they applied can
+# find every chunk written since, even when SQLite reuses a deleted chunk's id.
+CHUNK_CHANGES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS document_chunk_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        chunk_id INTEGER NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS document_chunk_changes_insert AFTER INSERT ON document_chunks BEGIN
+        INSERT OR REPLACE INTO document_chunk_changes(chunk_id) VALUES (new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS document_chunk_changes_delete AFTER DELETE ON document_chunks BEGIN
+        INSERT OR REPLACE INTO document_chunk_changes(chunk_id) VALUES (old.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS document_chunk_changes_update AFTER UPDATE OF content, document_id ON document_chunks BEGIN
+        INSERT OR REPLACE INTO document_chunk_changes(chunk_id) VALUES (new.id);
+    END
+    """
+]
+
+for _statement in CHUNK_CHANGES_DDL:
+    event.listen(DocumentChunk.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
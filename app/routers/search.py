@@ -0,0 +1,64 @@
+# app/routers/search.py
+import threading
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import List, Optional
+
+from app.database import get_db, User
+from app.routers.auth import get_current_user
+
+router = APIRouter()
+
+MAX_BATCH_QUERIES = 100
+
+_vector_db = None
+_vector_db_lock = threading.Lock()
+
+def get_vector_db():
+    """Vector database shared by all search requests (created on first use)"""
+    global _vector_db
+    if _vector_db is None:
+        with _vector_db_lock:
+            if _vector_db is None:
+                from app.services.vector_database import VectorDatabase
+                _vector_db = VectorDatabase()
+    return _vector_db
+
+# Pydantic models for API
+class BatchSearchQuery(BaseModel):
+    query: str
+    limit: int = 5
+
+class BatchSearchRequest(BaseModel):
+    queries: List[BatchSearchQuery]
+    similarity_threshold: float = 0.5
+
+class SearchHit(BaseModel):
+    chunk_id: int
+    document_id: int
+    content: Optional[str] = None
+    similarity: float
+    chunk_index: int
+
+class BatchSearchResponse(BaseModel):
+    results: List[List[SearchHit]]
+
+# Routes
+@router.post("/batch", response_model=BatchSearchResponse)
+def batch_search(
+    request: BatchSearchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Run several searches over the current user's documents in one request"""
+    if len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_QUERIES} queries per batch")
+    if any(item.limit < 1 or item.limit > 50 for item in request.queries):
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 50")
+
+    results = get_vector_db().search_similar_chunks_batch(
+        [{"query": item.query, "user_id": current_user.id, "limit": item.limit} for item in request.queries],
+        similarity_threshold=request.similarity_threshold
+    )
+    return {"results": results}
@@ -0,0 +1,297 @@
+import os
+import json
+import threading
+from typing import List, Dict, Optional, Any
+import numpy as np
+from .flat_index import FlatVectorStore
+from .similarity import normalize_rows, top_k
+
+
+class _Partition:
+    """One tenant's slice of the index: its rows plus, once trained, IVF centroids and inverted lists"""
+
+    def __init__(self):
+        self.rows = np.empty(0, dtype=np.int64)
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[np.ndarray] = []
+        self.trained_size = 0
+
+    def append(self, rows: np.ndarray, vectors: np.ndarray):
+        """Add rows to the partition and, when trained, to their nearest lists"""
+        self.rows = np.concatenate([self.rows, rows])
+        if self.centroids is not None:
+            self._assign(rows, vectors)
+
+    def remove(self, rows: np.ndarray):
+        self.rows = self.rows[~np.isin(self.rows, rows)]
+        self.lists = [lst[~np.isin(lst, rows)] for lst in self.lists]
+
+    def train(self, vectors: np.ndarray, num_lists: int, iterations: int, seed: int = 0):
+        """Spherical k-means over the partition's vectors, then rebuild the inverted lists"""
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(len(vectors), size=num_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, vectors)
+            empty = ~sums.any(axis=1)
+            # Empty clusters keep their previous centroid
+            sums[empty] = centroids[empty]
+            centroids = normalize_rows(sums)
+
+        self.set_centroids(centroids, vectors)
+        self.trained_size = len(self.rows)
+
+    def set_centroids(self, centroids: np.ndarray, vectors: np.ndarray):
+        self.centroids = centroids
+        self.lists = [np.empty(0, dtype=np.int64) for _ in range(len(centroids))]
+        self._assign(self.rows, vectors)
+
+    def candidates(self, queries: np.ndarray, nprobe: int) -> np.ndarray:
+        """Rows in the nprobe lists closest to any of the queries (all rows when untrained)"""
+        if self.centroids is None or nprobe >= len(self.lists):
+            return self.rows
+        probed = set()
+        for probes in top_k(queries @ self.centroids.T, nprobe)[0]:
+            probed.update(probes.tolist())
+        return np.concatenate([self.lists[i] for i in sorted(probed)])
+
+    def _assign(self, rows: np.ndarray, vectors: np.ndarray):
+        if not len(rows):
+            return
+        assignment = np.argmax(vectors @ self.centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.searchsorted(assignment[order], np.arange(len(self.lists) + 1))
+        for list_id in range(len(self.lists)):
+            added = rows[order[bounds[list_id]:bounds[list_id + 1]]]
+            if len(added):
+                self.lists[list_id] = np.concatenate([self.lists[list_id], added])
+
+
+class PartitionedIVFStore(FlatVectorStore):
+    """
+    Approximate nearest-neighbour store with one IVF index per tenant
+
+    Rows are grouped by a metadata field (user_id by default). A query whose
+    where filter pins that field only looks at the matching partitions, and
+    inside a trained partition only at the nprobe inverted lists whose
+    centroids are closest to the query. Small partitions are scanned exactly
+    until they reach train_threshold rows. Vectors, metadata and tombstones are
+    stored by FlatVectorStore; centroids are persisted next to them in ivf.npz
+    and list membership is recomputed when the store is opened.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        embedding_dim: int,
+        name: str = "document_chunks",
+        partition_key: str = "user_id",
+        nprobe: int = 8,
+        train_threshold: int = 2048,
+        kmeans_iterations: int = 10
+    ):
+        """
+        Open (or create) a partitioned IVF store
+
+        Args:
+            directory: Folder holding the vectors, sidecar and ivf.npz
+            embedding_dim: Vector dimension
+            name: Collection name reported in stats
+            partition_key: Metadata field that selects a partition
+            nprobe: Default number of inverted lists searched per partition (recall/latency knob)
+            train_threshold: Partition size at which an IVF index is first built
+            kmeans_iterations: k-means iterations per (re)training
+        """
+        self.partition_key = partition_key
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.kmeans_iterations = kmeans_iterations
+        self.centroids_path = os.path.join(directory, "ivf.npz")
+        self._partitions: Dict[Any, _Partition] = {}
+        super().__init__(directory, embedding_dim, name=name)
+
+    def add(self, ids: List[str], embeddings, documents: Optional[List[str]] = None, metadatas: Optional[List[Dict]] = None):
+        """Append vectors and route each to its partition's nearest list"""
+        with self._lock:
+            first_row = self._num_rows
+            super().add(ids, embeddings, documents=documents, metadatas=metadatas)
+            self._index_rows(np.arange(first_row, self._num_rows))
+
+    upsert = add
+
+    def update(self, ids: List[str], metadatas: Optional[List[Dict]] = None, documents: Optional[List[str]] = None):
+        """Replace metadata and/or documents, moving rows whose partition changed"""
+        with self._lock:
+            rows = [self._id_to_row.get(chroma_id) for chroma_id in ids]
+            before = [self._partition_key_of(row) if row is not None else None for row in rows]
+            super().update(ids, metadatas=metadatas, documents=documents)
+
+            moved = [
+                row for row, old in zip(rows, before)
+                if row is not None and self._partition_key_of(row) != old
+            ]
+            for row, old in zip(rows, before):
+                if row in moved and old in self._partitions:
+                    self._partitions[old].remove(np.asarray([row]))
+            self._index_rows(np.asarray(moved, dtype=np.int64))
+
+    def query(
+        self,
+        query_embeddings,
+        n_results: int = 10,
+        where: Optional[Dict] = None,
+        include: Optional[List[str]] = None,
+        nprobe: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Approximate top-k by cosine, searching only the partitions the filter allows"""
+        include = include or ["documents", "metadatas", "distances"]
+        queries = normalize_rows(query_embeddings)
+        nprobe = nprobe or self.nprobe
+
+        with self._lock:
+            vectors, alive = self._vectors, self._alive
+            ids = self._ids
+            keys = self._partition_filter(where)
+            partitions = [self._partitions[key] for key in (keys if keys is not None else self._partitions) if key in self._partitions]
+
+            # Only an equality or $in on the partition key alone is fully answered by partition selection
+            if where and not self._partition_only(where):
+                alive = alive & self._match(where)
+
+        result = {key: [] for key in ("ids", "documents", "metadatas", "distances", "embeddings")}
+        for query in queries:
+            candidates = np.concatenate([p.candidates(query[np.newaxis, :], nprobe) for p in partitions] or [np.empty(0, dtype=np.int64)])
+            candidates = candidates[alive[candidates]] if len(candidates) else candidates
+
+            rows, distances = [], []
+            if len(candidates):
+                scores = np.asarray(vectors[candidates]) @ query
+                best, best_scores = top_k(scores, min(n_results, len(candidates)))
+                rows = candidates[best].tolist()
+                distances = (2.0 - 2.0 * best_scores).tolist()
+
+            result["ids"].append([ids[row] for row in rows])
+            result["metadatas"].append(self._metadatas(rows) if "metadatas" in include else [])
+            result["distances"].append(distances)
+            result["documents"].append(self._documents(rows) if "documents" in include else [])
+            result["embeddings"].append(np.asarray(vectors[rows]) if "embeddings" in include and rows else [])
+
+        return self._trim(result, include)
+
+    def get_index_stats(self) -> Dict[str, Any]:
+        """Partition sizes and how many are served by IVF vs. exact scan"""
+        with self._lock:
+            sizes = [len(p.rows) for p in self._partitions.values()]
+            trained = [p for p in self._partitions.values() if p.centroids is not None]
+            return {
+                "partitions": len(self._partitions),
+                "trained_partitions": len(trained),
+                "largest_partition": max(sizes) if sizes else 0,
+                "total_lists": sum(len(p.lists) for p in trained),
+                "nprobe": self.nprobe,
+                "train_threshold": self.train_threshold
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        """Map vectors via FlatVectorStore, then rebuild partitions from saved centroids"""
+        super()._load()
+
+        saved = {}
+        if os.path.exists(self.centroids_path):
+            with np.load(self.centroids_path) as archive:
+                keys = json.loads(str(archive["keys"]))
+                for i, key in enumerate(keys):
+                    saved[json.dumps(key)] = archive[f"centroids_{i}"]
+
+        self._partitions = {}
+        live = np.flatnonzero(self._alive)
+        for key, rows in self._group_rows(live).items():
+            partition = self._partitions.setdefault(key, _Partition())
+            partition.rows = rows
+            centroids = saved.get(json.dumps(key))
+            if centroids is not None and centroids.shape[1] == self.embedding_dim:
+                partition.set_centroids(centroids, np.asarray(self._vectors[rows]))
+                partition.trained_size = len(rows)
+
+        self._train_partitions(list(self._partitions))
+
+    def _index_rows(self, rows: np.ndarray):
+        """Add new rows to their partitions, retraining partitions that outgrew their index"""
+        if not len(rows):
+            return
+        touched = []
+        for key, partition_rows in self._group_rows(rows).items():
+            partition = self._partitions.setdefault(key, _Partition())
+            partition.append(partition_rows, np.asarray(self._vectors[partition_rows]))
+            touched.append(key)
+        self._train_partitions(touched)
+
+    def _train_partitions(self, keys: List[Any]):
+        """(Re)build IVF for partitions past the threshold or twice the size they were trained at"""
+        trained = False
+        for key in keys:
+            partition = self._partitions[key]
+            live_rows = partition.rows[self._alive[partition.rows]]
+            size = len(live_rows)
+            if size < self.train_threshold:
+                continue
+            if partition.centroids is not None and size < 2 * partition.trained_size:
+                continue
+
+            partition.rows = live_rows
+            num_lists = max(1, int(np.sqrt(size)))
+            partition.train(np.asarray(self._vectors[live_rows]), num_lists, self.kmeans_iterations)
+            trained = True
+
+        if trained:
+            self._save_centroids()
+
+    def _save_centroids(self):
+        """Write all partition centroids atomically"""
+        trained = [(key, p.centroids) for key, p in self._partitions.items() if p.centroids is not None]
+        arrays = {f"centroids_{i}": centroids for i, (_, centroids) in enumerate(trained)}
+        arrays["keys"] = np.asarray(json.dumps([key for key, _ in trained]))
+
+        temp_path = self.centroids_path + ".tmp.npz"
+        np.savez(temp_path, **arrays)
+        os.replace(temp_path, self.centroids_path)
+
+    def _group_rows(self, rows: np.ndarray) -> Dict[Any, np.ndarray]:
+        groups: Dict[Any, List[int]] = {}
+        for row, key in zip(rows.tolist(), self._column(self.partition_key)[rows].tolist()):
+            groups.setdefault(key, []).append(row)
+        return {key: np.asarray(group, dtype=np.int64) for key, group in groups.items()}
+
+    def _partition_key_of(self, row: int) -> Any:
+        # tolist() turns int64 column entries back into the plain ints used as partition keys
+        return self._column(self.partition_key)[row:row + 1].tolist()[0]
+
+    def _partition_only(self, where: Dict) -> bool:
+        """Whether where is just an equality or $in on the partition key"""
+        if list(where.keys()) != [self.partition_key]:
+            return False
+        condition = where[self.partition_key]
+        return not isinstance(condition, dict) or list(condition.keys()) in (["$eq"], ["$in"])
+
+    def _partition_filter(self, where: Optional[Dict]) -> Optional[List[Any]]:
+        """Partition keys a where filter restricts the search to (None means all partitions)"""
+        if not where:
+            return None
+        clauses = where["$and"] if list(where.keys()) == ["$and"] else [where]
+        for clause in clauses:
+            if self.partition_key not in clause:
+                continue
+            condition = clause[self.partition_key]
+            if not isinstance(condition, dict):
+                return [condition]
+            if "$eq" in condition:
+                return [condition["$eq"]]
+            if "$in" in condition:
+                return list(condition["$in"])
+        return None
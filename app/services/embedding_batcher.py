@@ -0,0 +1,119 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import List, Dict, Callable, Any
+import numpy as np
+
+_STOP = object()
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent single-text embedding requests into one encoder call"""
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0
+    ):
+        """
+        Initialize embedding batcher
+
+        Args:
+            encode_fn: Function embedding a list of texts into a 2D array (one row per text)
+            max_batch_size: Most requests folded into a single encoder call
+            max_wait_ms: How long the first request in a batch waits for company
+        """
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self._stats = {"requests": 0, "batches": 0, "largest_batch": 0, "errors": 0}
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for embedding and return a future resolving to its vector"""
+        self._ensure_started()
+
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str, timeout: float = None) -> np.ndarray:
+        """Embed a single text, blocking until its batch has been encoded"""
+        return self.submit(text).result(timeout=timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request/batch counters"""
+        stats = dict(self._stats)
+        stats["average_batch_size"] = stats["requests"] / stats["batches"] if stats["batches"] else 0.0
+        stats["pending"] = self._queue.qsize()
+        return stats
+
+    def close(self):
+        """Stop the worker thread after it drains queued requests"""
+        if self._thread and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._thread = None
+
+    def _ensure_started(self):
+        """Start the worker thread on first use"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        with self._start_lock:
+            if not (self._thread and self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Worker loop: collect a batch for up to max_wait, then encode it"""
+        stopping = False
+
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._process(batch)
+
+    def _process(self, batch: List[tuple]):
+        """Encode one batch and resolve each caller's future"""
+        live = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+        if not live:
+            return
+
+        self._stats["requests"] += len(live)
+        self._stats["batches"] += 1
+        self._stats["largest_batch"] = max(self._stats["largest_batch"], len(live))
+
+        try:
+            vectors = self.encode_fn([text for text, _ in live])
+        except Exception as e:
+            self._stats["errors"] += 1
+            for _, future in live:
+                future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(live, vectors):
+            future.set_result(vector)
@@ -0,0 +1,234 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any
+import numpy as np
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache: in-memory LRU on top of a SQLite file on disk"""
+
+    def __init__(
+        self,
+        cache_dir: str = "data/embedding_cache",
+        max_memory_items: int = 10000,
+        max_disk_bytes: int = 512 * 1024 * 1024
+    ):
+        """
+        Initialize embedding cache
+
+        Args:
+            cache_dir: Directory holding the on-disk cache database
+            max_memory_items: Number of vectors kept in the in-memory LRU tier
+            max_disk_bytes: Vector bytes allowed on disk before oldest entries are evicted
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.db_path = os.path.join(cache_dir, "embeddings.sqlite3")
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                nbytes INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)")
+        self._conn.commit()
+
+        self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM embeddings").fetchone()[0]
+
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "disk_evictions": 0,
+            "encoded_texts": 0,
+            "encode_seconds": 0.0
+        }
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Normalize text so whitespace-only differences share a cache entry"""
+        return " ".join(text.split())
+
+    @classmethod
+    def make_key(cls, provider: str, model_name: str, text: str) -> str:
+        """Build the content address for a (provider, model, text) triple"""
+        payload = f"{provider}\x00{model_name}\x00{cls.normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Look up a single vector"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Look up several vectors, memory tier first, then disk"""
+        found: Dict[str, np.ndarray] = {}
+        disk_keys = []
+
+        with self._lock:
+            for key in keys:
+                if key in found:
+                    continue
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self._stats["memory_hits"] += 1
+                else:
+                    disk_keys.append(key)
+
+            disk_keys = list(dict.fromkeys(disk_keys))
+            if disk_keys:
+                now = time.time()
+                hit_keys = []
+
+                # SQLite limits the number of bound parameters per statement
+                for i in range(0, len(disk_keys), 500):
+                    batch = disk_keys[i:i + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                        batch
+                    ).fetchall()
+
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        found[key] = vector
+                        hit_keys.append(key)
+                        self._remember(key, vector)
+
+                if hit_keys:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                        [(now, key) for key in hit_keys]
+                    )
+                    self._conn.commit()
+
+                self._stats["disk_hits"] += len(hit_keys)
+                self._stats["misses"] += len(disk_keys) - len(hit_keys)
+
+        return found
+
+    def put(self, key: str, vector: np.ndarray):
+        """Store a single vector"""
+        self.put_many({key: vector})
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        """Store several vectors in both tiers"""
+        if not items:
+            return
+
+        now = time.time()
+        rows = []
+
+        with self._lock:
+            for key, vector in items.items():
+                # Own a read-only copy so cached rows never pin or alias a caller's batch array
+                vector = np.array(vector, dtype=np.float32)
+                vector.flags.writeable = False
+                self._remember(key, vector)
+                blob = vector.tobytes()
+                rows.append((key, blob, len(blob), now))
+
+            existing = self._existing_bytes([row[0] for row in rows])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, nbytes, last_access) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+            self._disk_bytes += sum(row[2] for row in rows) - existing
+            self._stats["writes"] += len(rows)
+
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def record_encode_time(self, num_texts: int, seconds: float):
+        """Record encoder work so hits can be translated into time saved"""
+        with self._lock:
+            self._stats["encoded_texts"] += num_texts
+            self._stats["encode_seconds"] += seconds
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and estimated encoder time saved"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_items"] = len(self._memory)
+            stats["disk_bytes"] = self._disk_bytes
+
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        per_text = stats["encode_seconds"] / stats["encoded_texts"] if stats["encoded_texts"] else 0.0
+
+        stats["hits"] = hits
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        stats["estimated_seconds_saved"] = hits * per_text
+        return stats
+
+    def clear(self):
+        """Drop every cached vector from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._disk_bytes = 0
+
+    def close(self):
+        """Close the underlying SQLite connection"""
+        with self._lock:
+            self._conn.close()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        """Insert into the memory tier, evicting least recently used entries (lock held)"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _existing_bytes(self, keys: List[str]) -> int:
+        """Bytes already on disk for keys about to be replaced (lock held)"""
+        total = 0
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            total += self._conn.execute(
+                f"SELECT COALESCE(SUM(nbytes), 0) FROM embeddings WHERE key IN ({placeholders})",
+                batch
+            ).fetchone()[0]
+        return total
+
+    def _evict_disk(self):
+        """Delete least recently used rows until disk usage is back under 90% of the cap (lock held)"""
+        target = int(self.max_disk_bytes * 0.9)
+        cursor = self._conn.execute("SELECT key, nbytes FROM embeddings ORDER BY last_access ASC")
+
+        doomed = []
+        freed = 0
+        for key, nbytes in cursor:
+            if self._disk_bytes - freed <= target:
+                break
+            doomed.append((key,))
+            freed += nbytes
+        cursor.close()
+
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+        self._conn.commit()
+
+        self._disk_bytes -= freed
+        self._stats["disk_evictions"] += len(doomed)
@@ -0,0 +1,93 @@
+import os
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Callable, Any
+import numpy as np
+
+# Model loaded once per worker process by _init_worker
+_worker_model = None
+
+
+def _init_worker(model_name: str, threads_per_worker: int, model_loader: Optional[Callable[[], Any]] = None):
+    """Load the embedding model once when a worker process starts"""
+    global _worker_model
+
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+
+    if model_loader is not None:
+        _worker_model = model_loader()
+        return
+
+    from .model_registry import model_registry
+    _worker_model = model_registry.get_sentence_transformer(model_name)
+
+
+def _encode_shard(texts: List[str], batch_size: int) -> np.ndarray:
+    """Encode one shard of texts inside a worker process"""
+    return np.asarray(_worker_model.encode(texts, batch_size=batch_size), dtype=np.float32)
+
+
+class EmbeddingProcessPool:
+    """Shard bulk sentence-transformer encoding across worker processes"""
+
+    def __init__(
+        self,
+        model_name: str = 'all-MiniLM-L6-v2',
+        num_workers: Optional[int] = None,
+        threads_per_worker: int = 1,
+        shard_size: int = 256,
+        batch_size: int = 32,
+        model_loader: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Initialize embedding process pool
+
+        Args:
+            model_name: SentenceTransformer model each worker loads
+            num_workers: Worker processes to start (defaults to the CPU count)
+            threads_per_worker: Torch intra-op threads per worker
+            shard_size: Largest number of texts sent to a worker at once
+            batch_size: Batch size each worker passes to model.encode
+            model_loader: Picklable callable returning the worker's model
+                (defaults to loading model_name through the model registry)
+        """
+        self.model_name = model_name
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.shard_size = max(1, shard_size)
+        self.batch_size = batch_size
+
+        # Spawn rather than fork so workers never inherit torch thread pools
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, threads_per_worker, model_loader)
+        )
+
+        print(f"✅ Embedding process pool started with {self.num_workers} workers")
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts across the pool, returning rows in input order"""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # Small inputs still get split so every worker has something to do
+        shard_size = min(self.shard_size, math.ceil(len(texts) / self.num_workers))
+        shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+
+        # Executor.map yields results in submission order
+        results = self._executor.map(_encode_shard, shards, [self.batch_size] * len(shards))
+        return np.concatenate(list(results))
+
+    def warmup(self):
+        """Force every worker to start and load its model"""
+        self.encode(["warmup"] * self.num_workers)
+
+    def close(self):
+        """Shut down worker processes"""
+        self._executor.shutdown(wait=True)
@@ -1,114 +1,298 @@
 import os
-import hashlib
-from typing import List, Dict, Optional, Tuple
+import time
+from typing import List, Dict, Optional, Tuple, Any
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import openai
 from sqlalchemy.orm import Session
 from ..models.chunk import DocumentChunk
 from ..models.document import Document
+from .embedding_cache import EmbeddingCache
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_pool import EmbeddingProcessPool
+from .similarity import query_similarity
+from .model_registry import model_registry
+from .length_bucketing import plan_length_buckets
+from .openai_embeddings import OpenAIEmbeddingProvider
+from .onnx_embedding import OnnxSentenceEncoder
 
 class EmbeddingService:
     """Handle text embeddings using multiple providers"""
     
-    def __init__(self, provider: str = "sentence_transformers"):
+    def __init__(
+        self,
+        provider: str = "sentence_transformers",
+        cache_dir: Optional[str] = "data/embedding_cache",
+        query_batching: bool = True,
+        query_batch_size: int = 32,
+        query_batch_wait_ms: float = 2.0,
+        pool_workers: int = 0,
+        pool_min_texts: int = 256,
+        encode_batch_size: int = 32,
+        max_padded_tokens: int = 8192
+    ):
         """
         Initialize embedding service
         
         Args:
-            provider: "sentence_transformers" or "openai"
+            provider: "sentence_transformers", "onnx" or "openai"
+            cache_dir: Directory for the persistent embedding cache (None disables caching)
+            query_batching: Coalesce concurrent query embeddings into shared encoder calls
+            query_batch_size: Most queries encoded together in one call
+            query_batch_wait_ms: How long a query waits for others to join its batch
+            pool_workers: Worker processes for bulk sentence_transformers encoding (0 disables the pool)
+            pool_min_texts: Smallest batch worth sharding across the process pool
+            encode_batch_size: Most texts per sentence_transformers forward pass
+            max_padded_tokens: Cap on padded tokens (batch size x longest text) per forward pass
         """
         self.provider = provider
         
         if provider == "sentence_transformers":
             # Using a good free embedding model
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.model_name = 'all-MiniLM-L6-v2'
+            self.model = model_registry.get_sentence_transformer(self.model_name)
             self.embedding_dim = 384
             
+        elif provider == "onnx":
+            # Exported all-MiniLM-L6-v2 on ONNX Runtime (see scripts/export_onnx_model.py)
+            self.model_name = 'all-MiniLM-L6-v2'
+            model_dir = os.getenv("ONNX_MODEL_DIR", "data/onnx/all-MiniLM-L6-v2")
+            quantized = os.getenv("ONNX_QUANTIZED", "true").lower() == "true"
+            self.model = model_registry.get(
+                f"onnx:{model_dir}:{'int8' if quantized else 'fp32'}",
+                lambda: OnnxSentenceEncoder(model_dir, quantized=quantized)
+            )
+            self.embedding_dim = self.model.get_sentence_embedding_dimension()
+            
         elif provider == "openai":
             # Requires OPENAI_API_KEY in environment
             openai.api_key = os.getenv("OPENAI_API_KEY")
             if not openai.api_key:
                 raise ValueError("OPENAI_API_KEY environment variable required for OpenAI embeddings")
+            self.model_name = "text-embedding-ada-002"
             self.embedding_dim = 1536  # text-embedding-ada-002 dimension
+            self.openai_provider = OpenAIEmbeddingProvider(
+                model=self.model_name,
+                api_key=openai.api_key,
+                base_url=os.getenv("OPENAI_BASE_URL"),
+                max_in_flight=int(os.getenv("OPENAI_EMBEDDING_MAX_IN_FLIGHT", "4")),
+                requests_per_minute=int(os.getenv("OPENAI_EMBEDDING_RPM", "3000")),
+                tokens_per_minute=int(os.getenv("OPENAI_EMBEDDING_TPM", "1000000"))
+            )
         
         else:
             raise ValueError(f"Unsupported embedding provider: {provider}")
+        
+        self.cache = EmbeddingCache(cache_dir) if cache_dir else None
+        
+        self.encode_batch_size = encode_batch_size
+        self.max_padded_tokens = max_padded_tokens
+        
+        self.pool = None
+        self.pool_min_texts = pool_min_texts
+        if pool_workers and provider == "sentence_transformers":
+            self.pool = EmbeddingProcessPool(self.model_name, num_workers=pool_workers)
+        
+        self.batcher = None
+        if query_batching:
+            self.batcher = EmbeddingBatcher(
+                self._embed_cached,
+                max_batch_size=query_batch_size,
+                max_wait_ms=query_batch_wait_ms
+            )
+    
+    @classmethod
+    def shared(cls, provider: str = "sentence_transformers") -> "EmbeddingService":
+        """
+        Process-wide service for provider, so its model, cache and query batcher are reused
+        
+        EMBEDDING_POOL_WORKERS > 0 starts the bulk-encoding process pool and
+        EMBEDDING_POOL_MIN_TEXTS sets the smallest batch sent to it.
+        """
+        return model_registry.get(
+            f"embedding_service:{provider}",
+            lambda: cls(
+                provider=provider,
+                pool_workers=int(os.getenv("EMBEDDING_POOL_WORKERS", "0")),
+                pool_min_texts=int(os.getenv("EMBEDDING_POOL_MIN_TEXTS", "256"))
+            )
+        )
     
     def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for a single text"""
-        if not text or not text.strip():
-            return [0.0] * self.embedding_dim
-        
         try:
-            if self.provider == "sentence_transformers":
-                embedding = self.model.encode(text.strip())
-                return embedding.tolist()
-                
-            elif self.provider == "openai":
-                response = openai.embeddings.create(
-                    model="text-embedding-ada-002",
-                    input=text.strip()
-                )
-                return response.data[0].embedding
-                
+            return self.generate_embedding_array(text).tolist()
+            
         except Exception as e:
             print(f"Error generating embedding: {e}")
             return [0.0] * self.embedding_dim
     
+    def generate_query_embedding(self, text: str) -> List[float]:
+        """Generate embedding for a search query, coalescing concurrent callers into one batch"""
+        return self.generate_query_embedding_array(text).tolist()
+    
     def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings for multiple texts"""
-        if not texts:
-            return []
-        
         try:
-            if self.provider == "sentence_transformers":
-                # Clean texts
-                clean_texts = [t.strip() if t and t.strip() else "empty" for t in texts]
-                embeddings = self.model.encode(clean_texts)
-                return embeddings.tolist()
-                
-            elif self.provider == "openai":
-                # OpenAI has batch limits, process in chunks
-                all_embeddings = []
-                batch_size = 100
-                
-                for i in range(0, len(texts), batch_size):
-                    batch = texts[i:i+batch_size]
-                    clean_batch = [t.strip() if t and t.strip() else "empty" for t in batch]
-                    
-                    response = openai.embeddings.create(
-                        model="text-embedding-ada-002",
-                        input=clean_batch
-                    )
-                    
-                    batch_embeddings = [data.embedding for data in response.data]
-                    all_embeddings.extend(batch_embeddings)
-                
-                return all_embeddings
-                
+            return self.generate_embeddings_array(texts).tolist()
+            
         except Exception as e:
             print(f"Error generating batch embeddings: {e}")
             return [[0.0] * self.embedding_dim] * len(texts)
     
-    def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
-        """Calculate cosine similarity between two embeddings"""
+    def generate_embedding_array(self, text: str) -> np.ndarray:
+        """
+        Generate a float32 embedding vector for a single text
+        
+        Like generate_embeddings_array, provider errors are raised rather than
+        replaced by a zero vector.
+        """
+        if not text or not text.strip():
+            return np.zeros(self.embedding_dim, dtype=np.float32)
+        
+        key = self.get_embedding_hash(text)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        start = time.perf_counter()
+        embedding = self._encode_texts([text.strip()])[0]
+        
+        if self.cache:
+            self.cache.record_encode_time(1, time.perf_counter() - start)
+            self.cache.put(key, embedding)
+        
+        return embedding
+    
+    def generate_query_embedding_array(self, text: str) -> np.ndarray:
+        """Generate a float32 query vector, coalescing concurrent callers into one batch"""
+        if not text or not text.strip():
+            return np.zeros(self.embedding_dim, dtype=np.float32)
+        
         try:
-            vec1 = np.array(embedding1)
-            vec2 = np.array(embedding2)
+            if not self.batcher:
+                return self.generate_embedding_array(text)
+            return self.batcher.embed(text.strip())
             
-            # Normalize vectors
-            vec1_norm = vec1 / np.linalg.norm(vec1)
-            vec2_norm = vec2 / np.linalg.norm(vec2)
+        except Exception as e:
+            print(f"Error generating query embedding: {e}")
+            return np.zeros(self.embedding_dim, dtype=np.float32)
+    
+    def generate_embeddings_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts as a contiguous (n, dim) float32 array
+        
+        Raises the provider error instead of returning placeholder vectors, so callers
+        never index zeros by mistake.
+        """
+        if not texts:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+        
+        # Clean texts
+        clean_texts = [t.strip() if t and t.strip() else "empty" for t in texts]
+        return self._embed_cached(clean_texts)
+    
+    def _embed_cached(self, clean_texts: List[str]) -> np.ndarray:
+        """Embed cleaned texts, encoding only the distinct ones missing from the cache"""
+        keys = [self.get_embedding_hash(t) for t in clean_texts]
+        
+        vectors = self.cache.get_many(keys) if self.cache else {}
+        
+        # Encode each distinct uncached text once
+        missing = {}
+        for key, text in zip(keys, clean_texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+        
+        if missing:
+            start = time.perf_counter()
+            embeddings = self._encode_texts(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), embeddings))
             
-            # Calculate cosine similarity
-            similarity = np.dot(vec1_norm, vec2_norm)
-            return float(similarity)
+            if self.cache:
+                self.cache.record_encode_time(len(missing), time.perf_counter() - start)
+                self.cache.put_many(new_vectors)
+            
+            vectors.update(new_vectors)
+        
+        # np.stack copies rows into one contiguous float32 block
+        return np.stack([vectors[key] for key in keys])
+    
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        """Run the provider model over already-cleaned texts"""
+        if self.provider in ("sentence_transformers", "onnx"):
+            # Large ingests are sharded across worker processes
+            if self.pool and len(texts) >= self.pool_min_texts:
+                return self.pool.encode(texts)
+            return self._encode_bucketed(texts)
+        
+        # Batches go out concurrently; only failed batches are retried
+        return self.openai_provider.embed(texts)
+    
+    def _encode_bucketed(self, texts: List[str]) -> np.ndarray:
+        """Encode texts in length-homogeneous batches so short chunks aren't padded to long ones"""
+        if len(texts) <= 1:
+            return np.asarray(self.model.encode(texts), dtype=np.float32).reshape(len(texts), -1)
+        
+        buckets = plan_length_buckets(
+            self._token_lengths(texts),
+            max_batch_size=self.encode_batch_size,
+            max_padded_tokens=self.max_padded_tokens
+        )
+        
+        embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        for bucket in buckets:
+            # Scatter rows back to their original positions
+            embeddings[bucket] = self.model.encode([texts[i] for i in bucket], batch_size=len(bucket))
+        
+        return embeddings
+    
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        """Token count per text as the model will see it (after truncation)"""
+        max_length = getattr(self.model, "max_seq_length", None)
+        tokenizer = getattr(self.model, "tokenizer", None)
+        
+        if tokenizer is None:
+            lengths = [len(t.split()) + 2 for t in texts]
+        else:
+            # Fast tokenizers handle the whole list in one batched call
+            lengths = [len(ids) for ids in tokenizer(texts, add_special_tokens=True)["input_ids"]]
+        
+        if max_length:
+            lengths = [min(length, max_length) for length in lengths]
+        return lengths
+    
+    def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
+        """Calculate cosine similarity between two embeddings"""
+        try:
+            return float(query_similarity(embedding1, embedding2)[0])
             
         except Exception as e:
             print(f"Error calculating similarity: {e}")
             return 0.0
     
+    def calculate_similarities(self, query_embedding, embeddings, metric: str = "cosine", normalized: bool = False) -> np.ndarray:
+        """Score a query embedding against many embeddings at once"""
+        return query_similarity(query_embedding, embeddings, metric=metric, normalized=normalized)
+    
     def get_embedding_hash(self, text: str) -> str:
         """Generate hash for embedding caching"""
-        return hashlib.md5(f"{self.provider}_{text}".encode()).hexdigest()
\ No newline at end of file
+        return EmbeddingCache.make_key(self.provider, self.model_name, text)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get embedding cache hit/miss statistics"""
+        if not self.cache:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.get_stats()}
+    
+    def get_provider_stats(self) -> Dict[str, Any]:
+        """Get request and per-batch latency statistics for remote providers"""
+        if self.provider != "openai":
+            return {}
+        return self.openai_provider.get_stats()
+    
+    def get_batcher_stats(self) -> Dict[str, Any]:
+        """Get query micro-batching statistics"""
+        if not self.batcher:
+            return {"enabled": False}
+        return {"enabled": True, **self.batcher.get_stats()}
\ No newline at end of file
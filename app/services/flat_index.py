@@ -0,0 +1,593 @@
+import os
+import json
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Tuple, Any
+import numpy as np
+from .similarity import normalize_rows, top_k
+
+
+class FlatVectorStore:
+    """
+    Exact-search vector store over an append-only memory-mapped float32 file
+
+    Vectors are L2-normalized and appended to vectors.f32; ids, documents and
+    metadata live in a SQLite sidecar. Opening the store only maps the vector
+    file and reads the ids; metadata stays in the sidecar, a field is loaded as
+    a column the first time a where filter uses it, and full metadata is read
+    only for returned rows. A query is a single matrix-vector product. The method
+    names and return shapes follow the subset of chromadb's Collection API that
+    VectorDatabase uses, and distances are squared L2 between unit vectors
+    (2 - 2 * cosine) like Chroma's default space.
+
+    With quantization="int8" (per-dimension scaled) or "float16", a compact copy
+    of every vector is held in RAM and scanned instead; only the best
+    n_results * rescore_factor candidates are rescored with the full-precision
+    vectors, which stay on disk behind the memory map.
+    """
+
+    QUANTIZATIONS = {"int8": np.int8, "float16": np.float16}
+    SCALE_FIT_ROWS = 1024
+    SCAN_BLOCK = 4096
+
+    def __init__(
+        self,
+        directory: str,
+        embedding_dim: int,
+        name: str = "document_chunks",
+        quantization: Optional[str] = None,
+        rescore_factor: int = 4
+    ):
+        """
+        Open (or create) a flat vector store
+
+        Args:
+            directory: Folder holding vectors.f32 and meta.sqlite3
+            embedding_dim: Vector dimension
+            name: Collection name reported in stats
+            quantization: None, "int8" or "float16" codes for the first search pass
+            rescore_factor: Candidates rescored at full precision per requested result
+        """
+        if quantization is not None and quantization not in self.QUANTIZATIONS:
+            raise ValueError(f"Unsupported quantization: {quantization}")
+
+        os.makedirs(directory, exist_ok=True)
+
+        self.name = name
+        self.directory = directory
+        self.embedding_dim = embedding_dim
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(directory, "meta.sqlite3"), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rows (
+                row INTEGER PRIMARY KEY,
+                id TEXT NOT NULL,
+                document TEXT,
+                metadata TEXT NOT NULL,
+                deleted INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_rows_id ON rows(id)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+        stored_dim = self._conn.execute("SELECT value FROM info WHERE key = 'embedding_dim'").fetchone()
+        if stored_dim and int(stored_dim[0]) != embedding_dim:
+            raise ValueError(f"Index in {directory} has dimension {stored_dim[0]}, expected {embedding_dim}")
+        self._conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('embedding_dim', ?)", (str(embedding_dim),))
+        self._conn.execute("INSERT OR IGNORE INTO info (key, value) VALUES ('vectors_file', 'vectors.f32')")
+        self._conn.commit()
+
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Collection-style API
+    # ------------------------------------------------------------------
+
+    def add(self, ids: List[str], embeddings, documents: Optional[List[str]] = None, metadatas: Optional[List[Dict]] = None):
+        """Append vectors; an id that already exists is replaced"""
+        if not ids:
+            return
+
+        vectors = normalize_rows(embeddings)
+        if vectors.shape != (len(ids), self.embedding_dim):
+            raise ValueError(f"Expected embeddings of shape ({len(ids)}, {self.embedding_dim}), got {vectors.shape}")
+
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [{} for _ in ids]
+
+        with self._lock:
+            replaced = [self._id_to_row[chroma_id] for chroma_id in ids if chroma_id in self._id_to_row]
+            first_row = self._num_rows
+
+            # Vectors go to disk before their rows are committed; _load trims any torn tail
+            with open(self.vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._conn.executemany(
+                "INSERT INTO rows (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (first_row + i, chroma_id, document, json.dumps(metadata))
+                    for i, (chroma_id, document, metadata) in enumerate(zip(ids, documents, metadatas))
+                ]
+            )
+            self._tombstone(replaced)
+            self._conn.commit()
+
+            for i, chroma_id in enumerate(ids):
+                self._ids.append(chroma_id)
+                self._id_to_row[chroma_id] = first_row + i
+
+            for key, column in self._columns.items():
+                added = self._as_column([metadata.get(key) for metadata in metadatas])
+                if column.dtype != added.dtype:
+                    column, added = column.astype(object), added.astype(object)
+                self._columns[key] = np.concatenate([column, added])
+
+            self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+            self._alive[replaced] = False
+            self._num_rows += len(ids)
+            self._remap()
+
+            if self.quantization:
+                self._append_codes(vectors)
+
+    upsert = add
+
+    def query(
+        self,
+        query_embeddings,
+        n_results: int = 10,
+        where: Optional[Dict] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Exact top-k by cosine for each query vector"""
+        include = include or ["documents", "metadatas", "distances"]
+        queries = normalize_rows(query_embeddings)
+
+        with self._lock:
+            vectors, mask = self._vectors, self._alive & self._match(where)
+            ids = self._ids
+            codes, scales = self._codes, self._scales
+
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": [], "embeddings": []}
+        if vectors is None or not mask.any():
+            for key in result:
+                result[key] = [[] for _ in range(len(queries))]
+            return self._trim(result, include)
+
+        k = min(n_results, int(mask.sum()))
+        if codes is None:
+            # One matrix product scores every stored vector against every query
+            scores = queries @ vectors.T
+            scores[:, ~mask] = -np.inf
+            top_rows, top_scores = top_k(scores, k)
+        else:
+            top_rows, top_scores = self._search_codes(queries, codes, scales, vectors, mask, k)
+
+        for rows, row_scores in zip(top_rows, top_scores):
+            rows = rows.tolist()
+            result["ids"].append([ids[row] for row in rows])
+            result["metadatas"].append(self._metadatas(rows) if "metadatas" in include else [])
+            result["distances"].append((2.0 - 2.0 * row_scores).tolist())
+            result["documents"].append(self._documents(rows) if "documents" in include else [])
+            result["embeddings"].append(np.asarray(vectors[rows]) if "embeddings" in include else [])
+
+        return self._trim(result, include)
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict] = None,
+        include: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """Fetch stored entries by id and/or metadata filter"""
+        include = include or ["documents", "metadatas"]
+
+        with self._lock:
+            mask = self._alive & self._match(where)
+            if ids is not None:
+                wanted = np.zeros(self._num_rows, dtype=bool)
+                wanted[[self._id_to_row[i] for i in ids if i in self._id_to_row]] = True
+                mask &= wanted
+
+            rows = np.flatnonzero(mask)[offset:]
+            if limit is not None:
+                rows = rows[:limit]
+            rows = rows.tolist()
+
+            result = {
+                "ids": [self._ids[row] for row in rows],
+                "metadatas": self._metadatas(rows) if "metadatas" in include else [],
+                "documents": self._documents(rows) if "documents" in include else [],
+                "embeddings": np.asarray(self._vectors[rows]) if "embeddings" in include and rows else []
+            }
+
+        return self._trim(result, include)
+
+    def update(self, ids: List[str], metadatas: Optional[List[Dict]] = None, documents: Optional[List[str]] = None):
+        """Replace metadata and/or documents of existing entries (vectors are left untouched)"""
+        with self._lock:
+            for i, chroma_id in enumerate(ids):
+                row = self._id_to_row.get(chroma_id)
+                if row is None:
+                    continue
+                if metadatas is not None:
+                    self._conn.execute("UPDATE rows SET metadata = ? WHERE row = ?", (json.dumps(metadatas[i]), row))
+                    for key in list(self._columns):
+                        self._set_column_value(key, row, metadatas[i].get(key))
+                if documents is not None:
+                    self._conn.execute("UPDATE rows SET document = ? WHERE row = ?", (documents[i], row))
+            self._conn.commit()
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None):
+        """Tombstone entries by id and/or metadata filter"""
+        with self._lock:
+            if ids is not None:
+                rows = [self._id_to_row[i] for i in ids if i in self._id_to_row]
+            else:
+                rows = np.flatnonzero(self._alive & self._match(where)).tolist()
+
+            self._tombstone(rows)
+            self._conn.commit()
+            for row in rows:
+                self._id_to_row.pop(self._ids[row], None)
+            self._alive[rows] = False
+
+    def count(self) -> int:
+        """Number of live entries"""
+        return int(self._alive.sum())
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def compact(self):
+        """Rewrite the vector file and sidecar without tombstoned rows"""
+        with self._lock:
+            live = np.flatnonzero(self._alive)
+            old_path = self.vectors_path
+            generation = int(self._info("generation", "0")) + 1
+            new_file = f"vectors.{generation}.f32"
+
+            with open(os.path.join(self.directory, new_file), "wb") as f:
+                for start in range(0, len(live), 4096):
+                    f.write(np.ascontiguousarray(self._vectors[live[start:start + 4096]]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            # Rows are renumbered inside the sidecar, switching over with the vector file in one transaction
+            self._conn.execute("CREATE TEMP TABLE compact_rows (old INTEGER PRIMARY KEY, new INTEGER NOT NULL)")
+            self._conn.executemany(
+                "INSERT INTO compact_rows (old, new) VALUES (?, ?)",
+                ((old_row, new_row) for new_row, old_row in enumerate(live.tolist()))
+            )
+            self._conn.execute("DELETE FROM rows WHERE row NOT IN (SELECT old FROM compact_rows)")
+            # Through negative rows, so no renumbered row collides with one not yet moved
+            self._conn.execute("UPDATE rows SET row = -1 - (SELECT new FROM compact_rows WHERE old = rows.row)")
+            self._conn.execute("UPDATE rows SET row = -1 - row")
+            self._conn.execute("DROP TABLE temp.compact_rows")
+            self._conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('vectors_file', ?)", (new_file,))
+            self._conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('generation', ?)", (str(generation),))
+            self._conn.commit()
+
+            self._vectors = None
+            if os.path.exists(old_path):
+                os.remove(old_path)
+
+            if self.quantization and os.path.exists(self.codes_path):
+                # Rebuilt by _load, refitting int8 scales to the surviving vectors
+                os.remove(self.codes_path)
+
+            self._load()
+
+    def close(self):
+        """Release the memory map and sidecar connection"""
+        with self._lock:
+            self._vectors = None
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        """Map the vector file and read ids from the sidecar (metadata is left on disk)"""
+        self._ids: List[str] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+
+        rows = self._conn.execute("SELECT row, id, deleted FROM rows ORDER BY row").fetchall()
+
+        row_bytes = self.embedding_dim * 4
+        file_rows = os.path.getsize(self.vectors_path) // row_bytes if os.path.exists(self.vectors_path) else 0
+
+        # Rows whose vectors never reached disk (crash between the two writes) are dropped
+        rows = [r for r in rows if r[0] < file_rows]
+        self._num_rows = len(rows)
+        if rows and rows[-1][0] != self._num_rows - 1:
+            raise ValueError(f"Flat index sidecar in {self.directory} is inconsistent; restore from a snapshot")
+
+        # Likewise, vectors written without committed rows are trimmed
+        if os.path.exists(self.vectors_path) and file_rows > self._num_rows:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(self._num_rows * row_bytes)
+
+        self._alive = np.zeros(self._num_rows, dtype=bool)
+        for row, chroma_id, deleted in rows:
+            self._ids.append(chroma_id)
+            if not deleted:
+                self._alive[row] = True
+                self._id_to_row[chroma_id] = row
+
+        self._remap()
+        self._load_codes()
+
+    @property
+    def vectors_path(self) -> str:
+        """Current vector file (changes when the store is compacted)"""
+        return os.path.join(self.directory, self._info("vectors_file", "vectors.f32"))
+
+    def _info(self, key: str, default: str) -> str:
+        row = self._conn.execute("SELECT value FROM info WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _remap(self):
+        """(Re)create the read-only memory map over all rows"""
+        if self._num_rows == 0:
+            self._vectors = None
+            return
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self._num_rows, self.embedding_dim))
+
+    @property
+    def codes_path(self) -> str:
+        return os.path.join(self.directory, f"codes.{self.quantization}")
+
+    def _search_codes(self, queries, codes, scales, vectors, mask, k) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate scores from the codes, then exact rescoring of the best candidates"""
+        num_candidates = min(k * self.rescore_factor, int(mask.sum()))
+
+        # int8 codes are x / scale, so x . q == codes . (q * scale)
+        weighted = queries * scales if scales is not None else queries
+        approx = np.empty((len(queries), len(codes)), dtype=np.float32)
+        # Dequantize a cache-sized block at a time rather than the whole matrix
+        for start in range(0, len(codes), self.SCAN_BLOCK):
+            block = codes[start:start + self.SCAN_BLOCK].astype(np.float32)
+            approx[:, start:start + self.SCAN_BLOCK] = weighted @ block.T
+        approx[:, ~mask] = -np.inf
+        candidates, _ = top_k(approx, num_candidates)
+
+        top_rows = np.empty((len(queries), k), dtype=np.int64)
+        top_scores = np.empty((len(queries), k), dtype=np.float32)
+        for i, rows in enumerate(candidates):
+            # Only these rows of the full-precision file are paged in
+            rows = np.sort(rows)
+            exact = np.asarray(vectors[rows]) @ queries[i]
+            best, best_scores = top_k(exact, k)
+            top_rows[i], top_scores[i] = rows[best], best_scores
+        return top_rows, top_scores
+
+    def _load_codes(self):
+        """Read the in-RAM codes, rebuilding them if they don't match the vector file"""
+        self._codes = None
+        self._codes_buffer = None
+        self._scales = None
+        if not self.quantization:
+            return
+
+        dtype = self.QUANTIZATIONS[self.quantization]
+        expected = self._num_rows * self.embedding_dim * np.dtype(dtype).itemsize
+        scales = self._info("int8_scales", "")
+
+        if self._num_rows == 0:
+            if os.path.exists(self.codes_path):
+                os.remove(self.codes_path)
+            return
+        if not os.path.exists(self.codes_path) or os.path.getsize(self.codes_path) != expected:
+            self._rebuild_codes()
+            return
+        if self.quantization == "int8":
+            if not scales:
+                self._rebuild_codes()
+                return
+            self._scales = np.asarray(json.loads(scales), dtype=np.float32)
+            self._scales_rows = int(self._info("int8_scales_rows", "0"))
+
+        codes = np.fromfile(self.codes_path, dtype=dtype).reshape(self._num_rows, self.embedding_dim)
+        self._codes_buffer = codes
+        self._codes = codes
+
+    def _rebuild_codes(self):
+        """Re-encode every stored vector (fitting int8 scales to the live rows)"""
+        self._codes = None
+        self._codes_buffer = None
+        self._scales = None
+        if self._num_rows == 0:
+            if os.path.exists(self.codes_path):
+                os.remove(self.codes_path)
+            return
+
+        if self.quantization == "int8":
+            live = np.flatnonzero(self._alive)
+            sample = np.asarray(self._vectors[live] if len(live) else self._vectors)
+            self._fit_scales(sample)
+
+        temp_path = self.codes_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            for start in range(0, self._num_rows, 65536):
+                f.write(self._encode(np.asarray(self._vectors[start:start + 65536])).tobytes())
+        os.replace(temp_path, self.codes_path)
+
+        dtype = self.QUANTIZATIONS[self.quantization]
+        self._codes_buffer = np.fromfile(self.codes_path, dtype=dtype).reshape(self._num_rows, self.embedding_dim)
+        self._codes = self._codes_buffer
+
+    def _append_codes(self, vectors: np.ndarray):
+        """Encode newly added vectors, append them to the codes file and the in-RAM buffer"""
+        if self.quantization == "int8" and self._scales is None:
+            self._fit_scales(vectors)
+        elif self.quantization == "int8" and self._scales_rows < self.SCALE_FIT_ROWS <= int(self._alive.sum()):
+            # Enough rows now to replace the provisional full-range scales
+            self._rebuild_codes()
+            return
+
+        codes = self._encode(vectors)
+        with open(self.codes_path, "ab") as f:
+            f.write(codes.tobytes())
+
+        # Amortized growth instead of reallocating the whole matrix per add
+        used = self._num_rows - len(codes)
+        buffer = self._codes_buffer
+        if buffer is None or len(buffer) < self._num_rows:
+            capacity = max(self._num_rows, 2 * (len(buffer) if buffer is not None else 0), 1024)
+            grown = np.empty((capacity, self.embedding_dim), dtype=codes.dtype)
+            if buffer is not None:
+                grown[:used] = buffer[:used]
+            buffer = self._codes_buffer = grown
+        buffer[used:self._num_rows] = codes
+        self._codes = buffer[:self._num_rows]
+
+    def _fit_scales(self, sample: np.ndarray):
+        """Per-dimension int8 scales from a sample of unit vectors"""
+        if len(sample) >= self.SCALE_FIT_ROWS:
+            # Headroom for later vectors, and a floor so near-constant dimensions don't divide by zero
+            limits = np.clip(np.abs(sample).max(axis=0) * 1.1, 1e-3, 1.0)
+        else:
+            # Too few rows to fit; unit vector components always lie in [-1, 1]
+            limits = np.ones(self.embedding_dim, dtype=np.float32)
+
+        self._scales = (limits / 127.0).astype(np.float32)
+        self._scales_rows = len(sample)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO info (key, value) VALUES (?, ?)",
+            [("int8_scales", json.dumps(self._scales.tolist())), ("int8_scales_rows", str(len(sample)))]
+        )
+        self._conn.commit()
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        if self.quantization == "float16":
+            return vectors.astype(np.float16)
+        return np.clip(np.rint(vectors / self._scales), -127, 127).astype(np.int8)
+
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """Bytes scanned per query in RAM vs. full-precision bytes on disk"""
+        full_bytes = self._num_rows * self.embedding_dim * 4
+        return {
+            "rows": self._num_rows,
+            "quantization": self.quantization,
+            "full_precision_bytes": full_bytes,
+            "code_bytes": int(self._codes.nbytes) if self._codes is not None else 0,
+            "resident_scan_bytes": int(self._codes.nbytes) if self._codes is not None else full_bytes
+        }
+
+    def _tombstone(self, rows: List[int]):
+        if rows:
+            self._conn.executemany("UPDATE rows SET deleted = 1 WHERE row = ?", [(row,) for row in rows])
+
+    def _documents(self, rows: List[int]) -> List[Optional[str]]:
+        """Load documents for rows from the sidecar, preserving order"""
+        return self._sidecar_values("document", rows)
+
+    def _metadatas(self, rows: List[int]) -> List[Dict[str, Any]]:
+        """Load metadata dicts for rows from the sidecar, preserving order"""
+        return [json.loads(metadata) if metadata is not None else {} for metadata in self._sidecar_values("metadata", rows)]
+
+    def _sidecar_values(self, field: str, rows: List[int]) -> List[Any]:
+        if not rows:
+            return []
+        found = {}
+        for start in range(0, len(rows), 500):
+            batch = rows[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for row, value in self._conn.execute(f"SELECT row, {field} FROM rows WHERE row IN ({placeholders})", batch):
+                found[row] = value
+        return [found.get(row) for row in rows]
+
+    def _column(self, key: str) -> np.ndarray:
+        """Metadata field as an array over all rows, read from the sidecar on first use and kept up to date"""
+        column = self._columns.get(key)
+        if column is None:
+            # json_extract pulls the one field out in SQLite; the rest of each row's metadata is never parsed
+            path = '$."' + key.replace('"', '\\"') + '"'
+            values = [
+                value for (value,) in
+                self._conn.execute("SELECT json_extract(metadata, ?) FROM rows WHERE row < ? ORDER BY row", (path, self._num_rows))
+            ]
+            column = self._columns[key] = self._as_column(values)
+        return column
+
+    def _set_column_value(self, key: str, row: int, value: Any):
+        column = self._columns[key]
+        if column.dtype != object and not self._is_int(value):
+            column = self._columns[key] = column.astype(object)
+        column[row] = value
+
+    @classmethod
+    def _as_column(cls, values: List[Any]) -> np.ndarray:
+        """int64 when every value is an integer, otherwise an object array"""
+        if values and all(cls._is_int(v) for v in values):
+            return np.asarray(values, dtype=np.int64)
+        column = np.empty(len(values), dtype=object)
+        column[:] = values
+        return column
+
+    @staticmethod
+    def _is_int(value: Any) -> bool:
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    def _match(self, where: Optional[Dict]) -> np.ndarray:
+        """Boolean row mask for a Chroma-style where filter ($and, $or, $eq, $ne, $in, $nin)"""
+        if not where:
+            return np.ones(self._num_rows, dtype=bool)
+
+        mask = np.ones(self._num_rows, dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self._match(clause)
+            elif key == "$or":
+                any_mask = np.zeros(self._num_rows, dtype=bool)
+                for clause in condition:
+                    any_mask |= self._match(clause)
+                mask &= any_mask
+            else:
+                column = self._column(key)
+                if not isinstance(condition, dict):
+                    condition = {"$eq": condition}
+                for op, value in condition.items():
+                    if op == "$eq":
+                        mask &= column == value
+                    elif op == "$ne":
+                        mask &= column != value
+                    elif op == "$in":
+                        mask &= self._isin(column, value)
+                    elif op == "$nin":
+                        mask &= ~self._isin(column, value)
+                    else:
+                        raise ValueError(f"Unsupported where operator: {op}")
+        return mask
+
+    @staticmethod
+    def _isin(column: np.ndarray, values) -> np.ndarray:
+        """Membership test that also works for object columns holding None or mixed types"""
+        if column.dtype != object:
+            return np.isin(column, list(values))
+        values = set(values)
+        return np.fromiter((v in values for v in column), dtype=bool, count=len(column))
+
+    @staticmethod
+    def _trim(result: Dict[str, Any], include: List[str]) -> Dict[str, Any]:
+        """Blank out fields that were not requested, as Chroma does"""
+        for key in ("documents", "metadatas", "distances", "embeddings"):
+            if key in result and key not in include:
+                result[key] = None
+        return result
@@ -0,0 +1,340 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import struct
+import threading
+from typing import List, Dict, Optional, Iterator, Any
+import numpy as np
+
+SNAPSHOT_MAGIC = b"RAGIDX\0\0"
+SNAPSHOT_VERSION = 1
+# magic, format version, header length; the JSON header follows, padded to HEADER_SIZE
+_PREAMBLE = struct.Struct("<8sII")
+HEADER_SIZE = 4096
+
+
+class IndexSnapshot:
+    """
+    Versioned, checksummed binary snapshot of a vector collection
+
+    Layout of a snapshot file:
+        [magic | version | header length][JSON header, padded to 4 KiB]
+        [vectors: count x dim little-endian float32]
+        [records: one JSON line per vector with id, document and metadata]
+
+    The vectors start on a page boundary, so an opened snapshot maps them
+    read-only instead of reading them into memory. The header records the
+    embedding dimension, section offsets, SHA-256 checksums and the
+    change-journal sequence the snapshot is consistent with.
+    """
+
+    def __init__(self, path: str, verify: bool = True):
+        """
+        Open a snapshot file
+
+        Args:
+            path: Snapshot written by IndexSnapshot.write
+            verify: Check section checksums before use
+        """
+        self.path = path
+
+        with open(path, "rb") as f:
+            preamble = f.read(_PREAMBLE.size)
+            if len(preamble) < _PREAMBLE.size:
+                raise ValueError(f"{path} is not an index snapshot")
+            magic, version, header_length = _PREAMBLE.unpack(preamble)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not an index snapshot")
+            if version > SNAPSHOT_VERSION:
+                raise ValueError(f"Snapshot format {version} is newer than supported ({SNAPSHOT_VERSION})")
+            self.header: Dict[str, Any] = json.loads(f.read(header_length).decode("utf-8"))
+
+        self.embedding_dim: int = self.header["embedding_dim"]
+        self.count: int = self.header["count"]
+        self.journal_sequence: int = self.header["journal_sequence"]
+
+        if os.path.getsize(path) != self.header["records_offset"] + self.header["records_bytes"]:
+            raise ValueError(f"Snapshot {path} is truncated")
+
+        self.vectors = (
+            np.memmap(path, dtype="<f4", mode="r", offset=self.header["vectors_offset"], shape=(self.count, self.embedding_dim))
+            if self.count else np.empty((0, self.embedding_dim), dtype=np.float32)
+        )
+
+        if verify:
+            self.verify()
+
+    @classmethod
+    def write(
+        cls,
+        collection,
+        path: str,
+        embedding_dim: int,
+        journal_sequence: int = 0,
+        batch_size: int = 5000
+    ) -> Dict[str, Any]:
+        """
+        Export every entry of a collection to a snapshot file
+
+        Entries are paged out batch_size at a time and written to a temporary
+        file that replaces path only once complete.
+
+        Args:
+            collection: Chroma collection or FlatVectorStore
+            path: Destination file
+            embedding_dim: Vector dimension
+            journal_sequence: Last change-journal entry reflected in the collection
+            batch_size: Entries fetched per page
+
+        Returns:
+            Snapshot header
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = path + ".tmp"
+
+        vector_hash = hashlib.sha256()
+        record_hash = hashlib.sha256()
+        records_path = temp_path + ".records"
+        count = 0
+
+        with open(temp_path, "wb") as out, open(records_path, "w+b") as records:
+            # Header is written last, once offsets and checksums are known
+            out.write(b"\0" * HEADER_SIZE)
+
+            offset = 0
+            while True:
+                page = collection.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+                if not page["ids"]:
+                    break
+
+                vectors = np.ascontiguousarray(np.asarray(page["embeddings"], dtype="<f4"))
+                if vectors.shape != (len(page["ids"]), embedding_dim):
+                    raise ValueError(f"Expected embeddings of dimension {embedding_dim}, got {vectors.shape}")
+                data = vectors.tobytes()
+                out.write(data)
+                vector_hash.update(data)
+
+                lines = b"".join(
+                    json.dumps([chroma_id, document, metadata], separators=(",", ":")).encode("utf-8") + b"\n"
+                    for chroma_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"])
+                )
+                records.write(lines)
+                record_hash.update(lines)
+
+                count += len(page["ids"])
+                offset += len(page["ids"])
+
+            records.seek(0)
+            records_offset = out.tell()
+            while True:
+                block = records.read(1 << 20)
+                if not block:
+                    break
+                out.write(block)
+
+            header = {
+                "embedding_dim": embedding_dim,
+                "count": count,
+                "dtype": "float32",
+                "vectors_offset": HEADER_SIZE,
+                "vectors_bytes": count * embedding_dim * 4,
+                "vectors_sha256": vector_hash.hexdigest(),
+                "records_offset": records_offset,
+                "records_bytes": out.tell() - records_offset,
+                "records_sha256": record_hash.hexdigest(),
+                "journal_sequence": journal_sequence,
+                "created_at": time.time()
+            }
+            encoded = json.dumps(header).encode("utf-8")
+            if _PREAMBLE.size + len(encoded) > HEADER_SIZE:
+                raise ValueError("Snapshot header too large")
+
+            out.seek(0)
+            out.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(encoded)) + encoded)
+            out.flush()
+            os.fsync(out.fileno())
+
+        os.remove(records_path)
+        os.replace(temp_path, path)
+        print(f"✅ Wrote snapshot of {count} vectors to {path}")
+        return header
+
+    def verify(self):
+        """Raise ValueError if either section fails its checksum"""
+        with open(self.path, "rb") as f:
+            for section in ("vectors", "records"):
+                digest = hashlib.sha256()
+                f.seek(self.header[f"{section}_offset"])
+                remaining = self.header[f"{section}_bytes"]
+                while remaining:
+                    block = f.read(min(remaining, 1 << 20))
+                    if not block:
+                        break
+                    digest.update(block)
+                    remaining -= len(block)
+                if digest.hexdigest() != self.header[f"{section}_sha256"]:
+                    raise ValueError(f"Snapshot {self.path} failed its {section} checksum")
+
+    def records(self) -> Iterator[List[Any]]:
+        """[id, document, metadata] per vector, in vector order"""
+        with open(self.path, "rb") as f:
+            f.seek(self.header["records_offset"])
+            for _ in range(self.count):
+                yield json.loads(f.readline())
+
+    def restore_into(self, collection, batch_size: int = 5000) -> int:
+        """
+        Upsert every snapshot entry into a collection (no re-embedding)
+
+        Returns:
+            Number of entries restored
+        """
+        batch: List[List[Any]] = []
+        start = 0
+        for record in self.records():
+            batch.append(record)
+            if len(batch) == batch_size:
+                self._upsert(collection, batch, start)
+                start += len(batch)
+                batch = []
+        if batch:
+            self._upsert(collection, batch, start)
+        return self.count
+
+    def _upsert(self, collection, batch: List[List[Any]], start: int):
+        collection.upsert(
+            ids=[record[0] for record in batch],
+            embeddings=np.asarray(self.vectors[start:start + len(batch)]),
+            documents=[record[1] for record in batch],
+            metadatas=[record[2] for record in batch]
+        )
+
+
+class ChangeJournal:
+    """
+    Append-only log of collection writes since the last snapshot
+
+    Each upsert, update and delete is recorded with a sequence number. A
+    node restored from a snapshot replays the entries after the snapshot's
+    journal_sequence to catch up without re-embedding anything.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) a journal
+
+        Args:
+            path: SQLite file holding the journal
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS changes ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, op TEXT NOT NULL, ids TEXT NOT NULL, "
+            "embeddings BLOB, documents TEXT, metadatas TEXT, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def record(
+        self,
+        op: str,
+        ids: List[str],
+        embeddings: Optional[np.ndarray] = None,
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict]] = None
+    ) -> int:
+        """Append a change and return its sequence number"""
+        blob = np.ascontiguousarray(np.asarray(embeddings, dtype="<f4")).tobytes() if embeddings is not None else None
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO changes (op, ids, embeddings, documents, metadatas, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    op,
+                    json.dumps(list(ids)),
+                    blob,
+                    json.dumps(documents) if documents is not None else None,
+                    json.dumps(metadatas) if metadatas is not None else None,
+                    time.time()
+                )
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def last_sequence(self) -> int:
+        """Sequence number of the newest change (0 if empty)"""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(seq) FROM changes").fetchone()
+        return row[0] or 0
+
+    def replay(self, collection, after_sequence: int = 0) -> int:
+        """
+        Apply every change newer than after_sequence to a collection
+
+        Returns:
+            Number of changes applied
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT op, ids, embeddings, documents, metadatas FROM changes WHERE seq > ? ORDER BY seq",
+                (after_sequence,)
+            ).fetchall()
+
+        for op, ids, blob, documents, metadatas in rows:
+            ids = json.loads(ids)
+            documents = json.loads(documents) if documents is not None else None
+            metadatas = json.loads(metadatas) if metadatas is not None else None
+            if op == "upsert":
+                embeddings = np.frombuffer(blob, dtype="<f4").reshape(len(ids), -1)
+                collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+            elif op == "update":
+                collection.update(ids=ids, metadatas=metadatas, documents=documents)
+            elif op == "delete":
+                collection.delete(ids=ids)
+            else:
+                raise ValueError(f"Unknown journal operation: {op}")
+        return len(rows)
+
+    def truncate(self, up_to_sequence: int):
+        """Drop changes already contained in a snapshot"""
+        with self._lock:
+            self._conn.execute("DELETE FROM changes WHERE seq <= ?", (up_to_sequence,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JournaledCollection:
+    """Collection wrapper that records every write in a ChangeJournal"""
+
+    def __init__(self, collection, journal: ChangeJournal):
+        self.collection = collection
+        self.journal = journal
+
+    def upsert(self, ids: List[str], embeddings, documents: Optional[List[str]] = None, metadatas: Optional[List[Dict]] = None):
+        self.collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+        self.journal.record("upsert", ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    add = upsert
+
+    def update(self, ids: List[str], metadatas: Optional[List[Dict]] = None, documents: Optional[List[str]] = None):
+        self.collection.update(ids=ids, metadatas=metadatas, documents=documents)
+        self.journal.record("update", ids, documents=documents, metadatas=metadatas)
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None):
+        if ids is None:
+            # Journal concrete ids so replay doesn't depend on metadata state
+            ids = self.collection.get(where=where, include=[])["ids"]
+        if ids:
+            self.collection.delete(ids=ids)
+            self.journal.record("delete", ids)
+
+    def __getattr__(self, name: str):
+        # query, get, count, name and backend-specific helpers pass straight through
+        return getattr(self.collection, name)
@@ -0,0 +1,46 @@
+from typing import List, Sequence
+
+
+def plan_length_buckets(
+    lengths: Sequence[int],
+    max_batch_size: int = 32,
+    max_padded_tokens: int = 8192
+) -> List[List[int]]:
+    """
+    Group input indices into length-homogeneous encoding batches
+
+    Inputs are ordered longest first and packed greedily, so every batch is
+    padded to a length close to all of its members. A batch never holds more
+    than max_batch_size inputs, and batch size * longest length stays within
+    max_padded_tokens (an input longer than the cap gets a batch of its own).
+
+    Args:
+        lengths: Token length of each input
+        max_batch_size: Most inputs per batch
+        max_padded_tokens: Cap on padded tokens (batch size x longest input) per batch
+
+    Returns:
+        Lists of original indices, one list per batch
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+
+    buckets = []
+    current: List[int] = []
+    current_max = 0
+
+    for index in order:
+        length = max(1, lengths[index])
+
+        # Sorted descending, so the first member sets the padded length
+        if current and (len(current) >= max_batch_size or (len(current) + 1) * current_max > max_padded_tokens):
+            buckets.append(current)
+            current = []
+
+        if not current:
+            current_max = length
+        current.append(index)
+
+    if current:
+        buckets.append(current)
+
+    return buckets
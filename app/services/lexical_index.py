@@ -0,0 +1,257 @@
+import re
+import math
+import threading
+from array import array
+from typing import List, Dict, Optional, Tuple, Any, Iterable, Hashable
+import numpy as np
+from .similarity import top_k
+from .model_registry import model_registry
+
+TOKEN_PATTERN = re.compile(r"\w+(?:[-.:/]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased word tokens for BM25
+
+    Compound identifiers such as "E1042-timeout" or "app.services" are kept whole
+    and also split into their parts, so both exact and partial matches score.
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.findall((text or "").lower()):
+        tokens.append(match)
+        if not match.isalnum():
+            tokens.extend(part for part in re.split(r"[-.:/]", match) if part)
+    return tokens
+
+
+def _as_array(buffer, dtype) -> np.ndarray:
+    """NumPy copy of a typed array (a copy, so the buffer can keep growing)"""
+    return np.frombuffer(buffer, dtype=dtype).copy()
+
+
+def _gather(buffer, dtype, slots: np.ndarray) -> np.ndarray:
+    """Values of a typed array at the given slots (the view is released on return)"""
+    return np.frombuffer(buffer, dtype=dtype)[slots]
+
+
+def reciprocal_rank_fusion(rankings: List[List[Hashable]], k: int = 60) -> List[Tuple[Hashable, float]]:
+    """
+    Fuse several ranked lists with reciprocal rank fusion
+
+    Args:
+        rankings: Lists of keys, best first
+        k: RRF damping constant (60 is the usual choice)
+
+    Returns:
+        (key, fused score) pairs, best first
+    """
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class LexicalIndex:
+    """
+    In-memory BM25 inverted index over chunk text
+
+    Each chunk occupies a slot. Postings are compact typed arrays per term (slot
+    numbers as int32, term frequencies as uint16) that are scored with NumPy
+    at query time. Removing a chunk only clears its slot's alive flag;
+    postings are rewritten once dead slots outnumber live ones. A query only
+    touches the slots in its terms' postings.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize lexical index
+
+        Args:
+            k1: BM25 term-frequency saturation
+            b: BM25 document-length normalization
+        """
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._chunk_ids = array("q")
+        self._document_ids = array("q")
+        self._user_ids = array("q")
+        self._lengths = array("i")
+        self._alive = bytearray()
+        self._slot_of: Dict[int, int] = {}
+        self._total_length = 0
+
+        # Set once the index has been filled from the database; synced_sequence is the last
+        # change-log entry applied, and sync_lock serializes refills
+        self.built = False
+        self.synced_sequence = 0
+        self.sync_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "LexicalIndex":
+        """Process-wide index, so every VectorDatabase sees the others' adds and removes"""
+        return model_registry.get("lexical_index", cls)
+
+    def add(self, chunk_id: int, text: str, document_id: int, user_id: Optional[int]):
+        """Index one chunk (re-indexing a known chunk replaces it)"""
+        self.add_many([(chunk_id, text, document_id, user_id)])
+
+    def add_many(self, chunks: Iterable[Tuple[int, str, int, Optional[int]]]):
+        """Index (chunk_id, text, document_id, user_id) tuples"""
+        with self._lock:
+            for chunk_id, text, document_id, user_id in chunks:
+                if chunk_id in self._slot_of:
+                    self._remove_slot(self._slot_of[chunk_id])
+
+                tokens = tokenize(text)
+                slot = len(self._chunk_ids)
+                self._chunk_ids.append(chunk_id)
+                self._document_ids.append(document_id)
+                self._user_ids.append(user_id if user_id is not None else -1)
+                self._lengths.append(len(tokens))
+                self._alive.append(1)
+                self._slot_of[chunk_id] = slot
+                self._total_length += len(tokens)
+
+                counts: Dict[str, int] = {}
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                for token, count in counts.items():
+                    postings = self._postings.get(token)
+                    if postings is None:
+                        postings = self._postings[token] = (array("i"), array("H"))
+                    postings[0].append(slot)
+                    postings[1].append(min(count, 65535))
+
+    def remove(self, chunk_ids: Iterable[int]):
+        """Drop chunks from the index"""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                slot = self._slot_of.get(chunk_id)
+                if slot is not None:
+                    self._remove_slot(slot)
+            self._maybe_compact()
+
+    def remove_document(self, document_id: int):
+        """Drop every chunk of a document"""
+        with self._lock:
+            document_ids = _as_array(self._document_ids, np.int64)
+            slots = np.flatnonzero((document_ids == document_id) & self._alive_mask()).tolist()
+            for slot in slots:
+                self._remove_slot(slot)
+            self._maybe_compact()
+
+    def document_chunk_ids(self, document_id: int) -> List[int]:
+        """Ids of the indexed chunks belonging to a document"""
+        with self._lock:
+            document_ids = _as_array(self._document_ids, np.int64)
+            slots = np.flatnonzero((document_ids == document_id) & self._alive_mask())
+            return _as_array(self._chunk_ids, np.int64)[slots].tolist()
+
+    def search(self, query: str, user_id: Optional[int] = None, limit: int = 10) -> List[Tuple[int, float]]:
+        """
+        Rank chunks against a query with BM25
+
+        Args:
+            query: Query text
+            user_id: Only return this user's chunks (None searches everything)
+            limit: Maximum results
+
+        Returns:
+            (chunk_id, score) pairs, best first
+        """
+        terms = set(tokenize(query))
+
+        with self._lock:
+            live = len(self._slot_of)
+            if not terms or not live:
+                return []
+            average_length = self._total_length / live
+
+            slot_parts = []
+            score_parts = []
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                slots = np.frombuffer(postings[0], dtype=np.int32).copy()
+                tfs = np.frombuffer(postings[1], dtype=np.uint16).astype(np.float32)
+                # Dead slots stay in postings until compaction but must not count towards df
+                alive = _gather(self._alive, np.uint8, slots) == 1
+                df = int(alive.sum())
+                if not df:
+                    continue
+                idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+                length_norm = self.k1 * (1 - self.b + self.b * _gather(self._lengths, np.int32, slots) / max(average_length, 1e-9))
+                slot_parts.append(slots[alive])
+                score_parts.append((idf * tfs * (self.k1 + 1) / (tfs + length_norm))[alive])
+
+            if not slot_parts:
+                return []
+            candidates, inverse = np.unique(np.concatenate(slot_parts), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(score_parts)).astype(np.float32)
+
+            mask = scores > 0
+            if user_id is not None:
+                mask &= _gather(self._user_ids, np.int64, candidates) == user_id
+            candidates, scores = candidates[mask], scores[mask]
+            if not len(candidates):
+                return []
+            best, best_scores = top_k(scores, min(limit, len(candidates)))
+            chunk_ids = _gather(self._chunk_ids, np.int64, candidates[best]).tolist()
+            return list(zip(chunk_ids, best_scores.tolist()))
+
+    def compact(self):
+        """Rebuild postings without dead slots"""
+        with self._lock:
+            alive = self._alive_mask()
+            new_slot = np.cumsum(alive) - 1
+            keep = np.flatnonzero(alive).tolist()
+
+            postings = {}
+            for term, (slots, tfs) in self._postings.items():
+                slot_array = _as_array(slots, np.int32)
+                live_mask = alive[slot_array]
+                if live_mask.any():
+                    postings[term] = (
+                        array("i", new_slot[slot_array[live_mask]].astype(np.int32).tobytes()),
+                        array("H", _as_array(tfs, np.uint16)[live_mask].tobytes())
+                    )
+            self._postings = postings
+
+            self._chunk_ids = array("q", [self._chunk_ids[slot] for slot in keep])
+            self._document_ids = array("q", [self._document_ids[slot] for slot in keep])
+            self._user_ids = array("q", [self._user_ids[slot] for slot in keep])
+            self._lengths = array("i", [self._lengths[slot] for slot in keep])
+            self._alive = bytearray(b"\x01" * len(keep))
+            self._slot_of = {chunk_id: slot for slot, chunk_id in enumerate(self._chunk_ids)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Index size counters"""
+        with self._lock:
+            postings = sum(len(slots) for slots, _ in self._postings.values())
+            return {
+                "chunks": len(self._slot_of),
+                "slots": len(self._chunk_ids),
+                "terms": len(self._postings),
+                "postings": postings,
+                "postings_bytes": postings * 6,
+                "built": self.built
+            }
+
+    def _alive_mask(self) -> np.ndarray:
+        return _as_array(self._alive, np.uint8) == 1
+
+    def _remove_slot(self, slot: int):
+        if self._alive[slot]:
+            self._alive[slot] = 0
+            self._total_length -= self._lengths[slot]
+            self._slot_of.pop(self._chunk_ids[slot], None)
+
+    def _maybe_compact(self):
+        if len(self._chunk_ids) > 1024 and len(self._slot_of) < len(self._chunk_ids) // 2:
+            self.compact()
@@ -0,0 +1,78 @@
+import time
+import threading
+from typing import List, Dict, Callable, Any
+
+
+class ModelRegistry:
+    """Process-wide registry that loads each model (or shared service) once, on first use"""
+
+    def __init__(self):
+        self._models: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+        self._load_seconds: Dict[str, float] = {}
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Return the object registered under key, loading it with loader if needed
+
+        Concurrent callers asking for the same key wait for a single load;
+        different keys load in parallel. A failed load is not cached.
+        """
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._registry_lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+
+        with lock:
+            model = self._models.get(key)
+            if model is None:
+                start = time.perf_counter()
+                model = loader()
+                self._load_seconds[key] = time.perf_counter() - start
+                self._models[key] = model
+                print(f"✅ Loaded {key} in {self._load_seconds[key]:.2f}s")
+
+        return model
+
+    def get_sentence_transformer(self, model_name: str):
+        """Shared SentenceTransformer instance for model_name"""
+        def load():
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer(model_name)
+
+        return self.get(f"sentence_transformers:{model_name}", load)
+
+    def get_cross_encoder(self, model_name: str):
+        """Shared CrossEncoder instance for model_name"""
+        def load():
+            from sentence_transformers import CrossEncoder
+            return CrossEncoder(model_name)
+
+        return self.get(f"cross_encoder:{model_name}", load)
+
+    def warmup(self, model_names: List[str]):
+        """Eagerly load sentence-transformer models, e.g. during application startup"""
+        for model_name in model_names:
+            self.get_sentence_transformer(model_name)
+
+    def is_loaded(self, key: str) -> bool:
+        """Check whether key has been loaded"""
+        return key in self._models
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Loaded keys and how long each took to load"""
+        return {"loaded": list(self._models.keys()), "load_seconds": dict(self._load_seconds)}
+
+    def clear(self):
+        """Forget every loaded object (mainly for tests)"""
+        with self._registry_lock:
+            self._models.clear()
+            self._locks.clear()
+            self._load_seconds.clear()
+
+
+# Shared by every service in the process
+model_registry = ModelRegistry()
@@ -0,0 +1,127 @@
+import os
+from typing import List, Dict, Optional, Any
+import numpy as np
+
+
+class OnnxSentenceEncoder:
+    """Sentence-transformer compatible encoder running an exported ONNX model on ONNX Runtime (CPU)"""
+
+    def __init__(
+        self,
+        model_dir: str = "data/onnx/all-MiniLM-L6-v2",
+        quantized: bool = True,
+        intra_op_threads: Optional[int] = None,
+        max_seq_length: int = 256,
+        normalize: bool = True,
+        tokenizer: Optional[Any] = None
+    ):
+        """
+        Initialize ONNX encoder
+
+        Args:
+            model_dir: Directory written by scripts/export_onnx_model.py
+            quantized: Prefer the int8 model_quantized.onnx when it exists
+            intra_op_threads: ONNX Runtime intra-op threads (None lets the runtime decide)
+            max_seq_length: Tokens kept per text, matching SentenceTransformer truncation
+            normalize: L2-normalize outputs like the model's Normalize layer
+            tokenizer: Preloaded Hugging Face-style tokenizer (defaults to the one saved in model_dir)
+        """
+        try:
+            import onnxruntime as ort
+            if tokenizer is None:
+                from transformers import AutoTokenizer
+        except ImportError:
+            raise ValueError("onnxruntime and transformers are required for ONNX embeddings")
+
+        model_path = os.path.join(model_dir, "model.onnx")
+        quantized_path = os.path.join(model_dir, "model_quantized.onnx")
+        if quantized and os.path.exists(quantized_path):
+            model_path = quantized_path
+
+        if not os.path.exists(model_path):
+            raise ValueError(f"ONNX model not found in {model_dir}; run scripts/export_onnx_model.py first")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.model_path = model_path
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [item.name for item in self.session.get_inputs()]
+
+        self.tokenizer = tokenizer or AutoTokenizer.from_pretrained(model_dir, use_fast=True)
+        self.max_seq_length = max_seq_length
+        self.normalize = normalize
+
+    def encode(self, texts, batch_size: int = 32, **kwargs) -> np.ndarray:
+        """Encode text(s) into float32 embeddings (same call shape as SentenceTransformer.encode)"""
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        batches = []
+        for i in range(0, len(texts), batch_size):
+            batches.append(self._encode_batch(texts[i:i + batch_size]))
+
+        embeddings = np.concatenate(batches) if batches else np.empty((0, 0), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Output dimension of the exported model"""
+        dim = self.session.get_outputs()[0].shape[-1]
+        return dim if isinstance(dim, int) else self.encode(["dimension probe"]).shape[1]
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Tokenize, run the transformer, then mean-pool over real (non-padding) tokens"""
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np"
+        )
+
+        feed = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+        if "token_type_ids" in self.input_names and "token_type_ids" not in feed:
+            feed["token_type_ids"] = np.zeros_like(feed["input_ids"])
+
+        token_embeddings = self.session.run(None, feed)[0]
+
+        mask = encoded["attention_mask"][..., np.newaxis].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            pooled = pooled / np.clip(norms, 1e-12, None)
+
+        return pooled.astype(np.float32)
+
+
+def check_parity(encoder, reference_model, texts: List[str], min_cosine: float = 0.99) -> Dict[str, Any]:
+    """
+    Compare encoder outputs against a reference (torch) SentenceTransformer
+
+    Args:
+        encoder: Model under test, e.g. OnnxSentenceEncoder
+        reference_model: SentenceTransformer producing the expected embeddings
+        texts: Probe texts
+        min_cosine: Lowest acceptable per-text cosine similarity
+
+    Returns:
+        Summary with min/mean cosine and whether the threshold was met
+    """
+    expected = np.asarray(reference_model.encode(texts), dtype=np.float32)
+    actual = np.asarray(encoder.encode(texts), dtype=np.float32)
+
+    expected = expected / np.clip(np.linalg.norm(expected, axis=1, keepdims=True), 1e-12, None)
+    actual = actual / np.clip(np.linalg.norm(actual, axis=1, keepdims=True), 1e-12, None)
+    cosines = np.sum(expected * actual, axis=1)
+
+    return {
+        "texts": len(texts),
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "max_drift": float(1.0 - cosines.min()),
+        "passed": bool(cosines.min() >= min_cosine)
+    }
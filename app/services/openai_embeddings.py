@@ -0,0 +1,234 @@
+import time
+import math
+import random
+import asyncio
+import threading
+from collections import deque
+from typing import List, Dict, Optional, Any
+import numpy as np
+import openai
+
+
+class EmbeddingProviderError(Exception):
+    """Raised when some embedding batches still fail after all retries"""
+
+    def __init__(self, message: str, failed_batches: List[int]):
+        super().__init__(message)
+        self.failed_batches = failed_batches
+
+
+class RateLimiter:
+    """Async token buckets for requests-per-minute and tokens-per-minute budgets"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+        self._request_budget = float(requests_per_minute)
+        self._token_budget = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int):
+        """Wait until one request carrying `tokens` tokens fits in both budgets"""
+        # A single oversized request can never fit a smaller bucket, so cap it
+        tokens = min(tokens, self.tokens_per_minute)
+
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._request_budget >= 1 and self._token_budget >= tokens:
+                    self._request_budget -= 1
+                    self._token_budget -= tokens
+                    return
+
+                wait_for_requests = (1 - self._request_budget) * 60.0 / self.requests_per_minute
+                wait_for_tokens = (tokens - self._token_budget) * 60.0 / self.tokens_per_minute
+                await asyncio.sleep(max(wait_for_requests, wait_for_tokens, 0.001))
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+
+        self._request_budget = min(self.requests_per_minute, self._request_budget + elapsed * self.requests_per_minute / 60.0)
+        self._token_budget = min(self.tokens_per_minute, self._token_budget + elapsed * self.tokens_per_minute / 60.0)
+
+
+class OpenAIEmbeddingProvider:
+    """Concurrent OpenAI embeddings client with rate limiting and per-batch retries"""
+
+    # Errors worth retrying; anything else (bad request, auth) fails immediately
+    RETRYABLE_ERRORS = (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.InternalServerError
+    )
+
+    def __init__(
+        self,
+        model: str = "text-embedding-ada-002",
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        batch_size: int = 100,
+        max_in_flight: int = 4,
+        requests_per_minute: int = 3000,
+        tokens_per_minute: int = 1_000_000,
+        max_retries: int = 5,
+        backoff_seconds: float = 0.5,
+        timeout: float = 30.0
+    ):
+        """
+        Initialize OpenAI embedding provider
+
+        Args:
+            model: Embedding model name
+            api_key: API key (defaults to OPENAI_API_KEY)
+            base_url: API base URL, e.g. a local stand-in for tests
+            batch_size: Texts per embeddings request
+            max_in_flight: Most requests outstanding at once
+            requests_per_minute: Request budget
+            tokens_per_minute: Token budget (tokens estimated at ~4 characters each)
+            max_retries: Retries per failed batch
+            backoff_seconds: Base delay for exponential backoff
+            timeout: Per-request timeout in seconds
+        """
+        self.model = model
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+        # Retries are handled here, per batch, so the SDK's own retry loop is disabled
+        self._client_kwargs = {"api_key": api_key, "base_url": base_url, "timeout": timeout, "max_retries": 0}
+
+        self._loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+        self._client = None
+        self._limiter = None
+
+        self._latencies = deque(maxlen=1000)
+        self._stats = {"requests": 0, "batches": 0, "retries": 0, "failed_batches": 0, "texts": 0}
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts from synchronous code (safe to call while another event loop is running)"""
+        future = asyncio.run_coroutine_threadsafe(self.embed_async(texts), self._get_loop())
+        return future.result()
+
+    async def embed_async(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, sending up to max_in_flight batches concurrently"""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        if self._client is None:
+            await self._setup()
+
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        results = await asyncio.gather(
+            *(self._embed_batch(index, batch, semaphore) for index, batch in enumerate(batches)),
+            return_exceptions=True
+        )
+
+        failed = [index for index, result in enumerate(results) if isinstance(result, BaseException)]
+        if failed:
+            self._stats["failed_batches"] += len(failed)
+            first_error = results[failed[0]]
+            raise EmbeddingProviderError(
+                f"{len(failed)} of {len(batches)} embedding batches failed: {first_error}",
+                failed
+            )
+
+        self._stats["texts"] += len(texts)
+        return np.concatenate(results)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Request counters and per-batch latency percentiles (seconds)"""
+        stats = dict(self._stats)
+        latencies = sorted(self._latencies)
+        if latencies:
+            stats["latency_p50"] = latencies[len(latencies) // 2]
+            stats["latency_p95"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            stats["latency_max"] = latencies[-1]
+        return stats
+
+    def get_batch_latencies(self) -> List[float]:
+        """Latency of each recent successful batch request, oldest first"""
+        return list(self._latencies)
+
+    def close(self):
+        """Stop the background event loop"""
+        if self._loop:
+            if self._client:
+                asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+            self._loop.close()
+            self._loop = None
+            self._client = None
+            self._limiter = None
+
+    async def _embed_batch(self, index: int, batch: List[str], semaphore: asyncio.Semaphore) -> np.ndarray:
+        """Embed one batch, retrying only this batch on transient errors"""
+        tokens = sum(math.ceil(len(text) / 4) for text in batch)
+
+        for attempt in range(self.max_retries + 1):
+            await self._limiter.acquire(tokens)
+
+            async with semaphore:
+                start = time.perf_counter()
+                self._stats["requests"] += 1
+                try:
+                    response = await self._client.embeddings.create(
+                        model=self.model,
+                        input=batch,
+                        encoding_format="float"
+                    )
+                except self.RETRYABLE_ERRORS as e:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = self._retry_delay(e, attempt)
+                else:
+                    self._latencies.append(time.perf_counter() - start)
+                    self._stats["batches"] += 1
+
+                    # Rows may come back in any order; index says where each belongs
+                    rows = sorted(response.data, key=lambda item: item.index)
+                    return np.asarray([row.embedding for row in rows], dtype=np.float32)
+
+            self._stats["retries"] += 1
+            print(f"Embedding batch {index} failed (attempt {attempt + 1}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Backoff delay, honouring a Retry-After header when the server sends one"""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+
+        # Full jitter keeps concurrent batches from retrying in lockstep
+        return random.uniform(0, self.backoff_seconds * (2 ** attempt))
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Background event loop that owns the async client and rate limiter"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, name="openai-embeddings", daemon=True)
+                self._loop_thread.start()
+                asyncio.run_coroutine_threadsafe(self._setup(), self._loop).result()
+        return self._loop
+
+    async def _setup(self):
+        """Create loop-bound resources inside the background loop"""
+        self._client = openai.AsyncOpenAI(**self._client_kwargs)
+        self._limiter = RateLimiter(self.requests_per_minute, self.tokens_per_minute)
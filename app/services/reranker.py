@@ -0,0 +1,132 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Optional, Any
+import numpy as np
+from .model_registry import model_registry
+
+
+class CrossEncoderReranker:
+    """Re-score retrieved chunks with a CPU cross-encoder, within a latency budget"""
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        time_budget_ms: float = 200.0,
+        max_candidates: int = 20,
+        model: Optional[Any] = None
+    ):
+        """
+        Initialize reranker
+
+        Args:
+            model_name: Cross-encoder model, loaded once per process through the model registry
+            time_budget_ms: Longest a rerank may take before the original order is returned
+            max_candidates: Chunks scored per query; lower-ranked ones keep their original order after them
+            model: Preloaded scorer with a predict(pairs) method (defaults to loading model_name)
+        """
+        self.model_name = model_name
+        self.time_budget_ms = time_budget_ms
+        self.max_candidates = max_candidates
+        self._model = model
+
+        # Scoring runs off the caller's thread so the budget can be enforced with a timeout
+        self._workers = 2
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="reranker")
+        self._lock = threading.Lock()
+        # Submitted passes not yet finished, and the timed-out ones among them
+        self._in_flight = 0
+        self._abandoned = set()
+        self._stats = {"reranked": 0, "timeouts": 0, "errors": 0, "skipped": 0, "last_latency_ms": 0.0}
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = model_registry.get_cross_encoder(self.model_name)
+        return self._model
+
+    def rerank(
+        self,
+        query: str,
+        chunks: List[Dict[str, Any]],
+        top_n: Optional[int] = None,
+        time_budget_ms: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Reorder chunks by cross-encoder relevance to the query
+
+        All candidates are scored in one batched forward pass. Each reranked chunk
+        gains a 'rerank_score'. If scoring fails or exceeds the time budget the
+        chunks come back in their original order. So do calls made while a
+        timed-out pass is still running or every worker is busy; nothing is
+        queued behind work whose result would arrive too late.
+
+        Args:
+            query: User query
+            chunks: Search results with a 'content' field, best first
+            top_n: Number of chunks to return (all by default)
+            time_budget_ms: Override for this call
+
+        Returns:
+            Chunks, most relevant first
+        """
+        top_n = len(chunks) if top_n is None else top_n
+        if len(chunks) < 2:
+            return chunks[:top_n]
+
+        candidates = chunks[:self.max_candidates]
+        budget = (time_budget_ms if time_budget_ms is not None else self.time_budget_ms) / 1000.0
+
+        start = time.perf_counter()
+        with self._lock:
+            if self._abandoned or self._in_flight >= self._workers:
+                self._stats["skipped"] += 1
+                return chunks[:top_n]
+            self._in_flight += 1
+        future = self._executor.submit(self._score, query, [chunk['content'] for chunk in candidates])
+        future.add_done_callback(self._finished)
+        try:
+            scores = future.result(timeout=budget)
+        except FutureTimeoutError:
+            # A pass already running can't be stopped; it finishes in the background (warming
+            # the model) and later calls skip reranking until it does
+            if not future.cancel():
+                with self._lock:
+                    if not future.done():
+                        self._abandoned.add(future)
+            self._record("timeouts", start)
+            print(f"Rerank exceeded {budget * 1000:.0f} ms budget, keeping retrieval order")
+            return chunks[:top_n]
+        except Exception as e:
+            self._record("errors", start)
+            print(f"Error reranking chunks: {e}")
+            return chunks[:top_n]
+
+        self._record("reranked", start)
+        order = np.argsort(-scores, kind="stable")
+        reranked = [{**candidates[i], 'rerank_score': float(scores[i])} for i in order]
+        return (reranked + chunks[self.max_candidates:])[:top_n]
+
+    def warmup(self):
+        """Load the model and run one pass so the first real query fits the budget"""
+        self._score("warmup", ["warmup passage"])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Rerank outcome counters and the latency of the most recent call"""
+        with self._lock:
+            return {"model": self.model_name, "time_budget_ms": self.time_budget_ms, **self._stats}
+
+    def _score(self, query: str, passages: List[str]) -> np.ndarray:
+        pairs = [(query, passage) for passage in passages]
+        scores = self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+        return np.asarray(scores, dtype=np.float32).reshape(-1)
+
+    def _finished(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            self._abandoned.discard(future)
+
+    def _record(self, outcome: str, start: float):
+        with self._lock:
+            self._stats[outcome] += 1
+            self._stats["last_latency_ms"] = (time.perf_counter() - start) * 1000
@@ -0,0 +1,154 @@
+import os
+import sys
+import copy
+import time
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple, Any, Hashable
+from .model_registry import model_registry
+
+
+class RetrievalCache:
+    """
+    In-memory cache of search results, invalidated per user by a corpus version
+
+    Keys include the user's current corpus version, and the version is bumped
+    whenever that user's indexed chunks change. A bump also drops the user's
+    cached entries at once, so results from before an upload or delete are
+    never served. Versions live in this process only: writes made by another
+    process (another worker, a script) bump nothing here, so they become
+    visible only once the affected entries expire after ttl_seconds. Results
+    are deep-copied in and out, so callers may edit them, metadata included.
+    Size is capped by entry count and by an estimate of the bytes held.
+    """
+
+    def __init__(self, max_entries: int = 2000, ttl_seconds: float = 300.0, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize retrieval cache
+
+        Args:
+            max_entries: Most cached searches kept (least recently used go first)
+            ttl_seconds: Lifetime of a cached result
+            max_bytes: Approximate memory allowed for cached results
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[Tuple, Tuple[float, int, List[Dict[str, Any]]]]" = OrderedDict()
+        self._versions: Dict[Hashable, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @classmethod
+    def shared(cls) -> "RetrievalCache":
+        """
+        Process-wide cache sized by RETRIEVAL_CACHE_ENTRIES and RETRIEVAL_CACHE_TTL
+
+        Every VectorDatabase in the process uses it, so a write through any of
+        them bumps the corpus version the others key their searches on.
+        """
+        return model_registry.get("retrieval_cache", lambda: cls(
+            max_entries=int(os.getenv("RETRIEVAL_CACHE_ENTRIES", "2000")),
+            ttl_seconds=float(os.getenv("RETRIEVAL_CACHE_TTL", "300"))
+        ))
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Case- and whitespace-insensitive form of a query"""
+        return " ".join((query or "").lower().split())
+
+    def make_key(self, user_id: Hashable, query: str, *params: Hashable) -> Tuple:
+        """Cache key for a search by user_id; params hold k, threshold, mode and so on"""
+        with self._lock:
+            version = self._versions.get(user_id, 0)
+        return (user_id, version, self.normalize_query(query)) + params
+
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        """Cached results for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            expires_at, _, results = entry
+            if expires_at < time.monotonic():
+                self._drop(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+
+        # Deep copies, so callers can edit results (and their metadata) without touching the cache
+        return copy.deepcopy(results)
+
+    def put(self, key: Tuple, results: List[Dict[str, Any]]):
+        """Store results for key (ignored if the user's corpus changed since make_key)"""
+        nbytes = self._estimate_bytes(results)
+        if nbytes > self.max_bytes:
+            return
+        results = copy.deepcopy(results)
+
+        with self._lock:
+            # A version bump between make_key and put means these results may be stale
+            if key[1] != self._versions.get(key[0], 0):
+                return
+
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, nbytes, results)
+            self._bytes += nbytes
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def invalidate_user(self, user_id: Hashable):
+        """Bump the user's corpus version and drop their cached results"""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            for key in [key for key in self._entries if key[0] == user_id]:
+                self._drop(key)
+            self._stats["invalidations"] += 1
+
+    def corpus_version(self, user_id: Hashable) -> int:
+        """Current corpus version for a user"""
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def clear(self):
+        """Drop every cached result (versions are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate, size and eviction counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            return stats
+
+    def _drop(self, key: Tuple):
+        _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    @staticmethod
+    def _estimate_bytes(results: List[Dict[str, Any]]) -> int:
+        """Rough size of a result list: dict overhead plus string payloads"""
+        total = sys.getsizeof(results)
+        for result in results:
+            total += sys.getsizeof(result)
+            for value in result.values():
+                if isinstance(value, str):
+                    total += sys.getsizeof(value)
+                elif isinstance(value, dict):
+                    total += sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value.values() if isinstance(v, str))
+        return total
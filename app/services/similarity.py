@@ -0,0 +1,131 @@
+from typing import Tuple
+import numpy as np
+
+SUPPORTED_METRICS = ("cosine", "dot")
+
+
+def as_matrix(vectors) -> np.ndarray:
+    """View embeddings as a contiguous 2D float32 array"""
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[np.newaxis, :]
+    return matrix
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """L2-normalize each row; all-zero rows stay zero"""
+    matrix = as_matrix(vectors)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def pairwise_similarity(a, b, metric: str = "cosine", normalized: bool = False) -> np.ndarray:
+    """
+    Score every row of a against every row of b
+
+    Args:
+        a: (m, dim) embeddings
+        b: (n, dim) embeddings
+        metric: "cosine" or "dot"
+        normalized: Inputs are already unit length, so cosine is a plain dot product
+
+    Returns:
+        (m, n) float32 similarity matrix
+    """
+    if metric not in SUPPORTED_METRICS:
+        raise ValueError(f"Unsupported similarity metric: {metric}")
+
+    if metric == "cosine" and not normalized:
+        a, b = normalize_rows(a), normalize_rows(b)
+    else:
+        a, b = as_matrix(a), as_matrix(b)
+
+    return a @ b.T
+
+
+def query_similarity(query, matrix, metric: str = "cosine", normalized: bool = False) -> np.ndarray:
+    """Score one query vector against every row of matrix, returning shape (n,)"""
+    return pairwise_similarity(query, matrix, metric=metric, normalized=normalized)[0]
+
+
+def top_k(scores, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Select the k highest scores without a full sort
+
+    Args:
+        scores: (n,) scores, or (m, n) for row-wise selection
+        k: Number of results per row
+
+    Returns:
+        (indices, scores) ordered best first, shaped (k,) or (m, k)
+    """
+    scores = np.asarray(scores)
+    n = scores.shape[-1]
+    k = min(k, n)
+
+    if k <= 0:
+        empty_shape = scores.shape[:-1] + (0,)
+        return np.empty(empty_shape, dtype=np.int64), np.empty(empty_shape, dtype=scores.dtype)
+
+    # argpartition is O(n); only the k survivors get sorted
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+
+    candidate_scores = np.take_along_axis(scores, candidates, axis=-1)
+    order = np.argsort(-candidate_scores, axis=-1, kind="stable")
+
+    indices = np.take_along_axis(candidates, order, axis=-1)
+    return indices, np.take_along_axis(candidate_scores, order, axis=-1)
+
+
+def top_k_similar(query, matrix, k: int, metric: str = "cosine", normalized: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices and scores of the k rows of matrix most similar to each query row"""
+    scores = pairwise_similarity(query, matrix, metric=metric, normalized=normalized)
+    if np.ndim(query) == 1:
+        scores = scores[0]
+    return top_k(scores, k)
+
+
+def mmr_select(query, candidates, k: int, lambda_mult: float = 0.5, normalized: bool = False) -> np.ndarray:
+    """
+    Maximal marginal relevance: pick k diverse rows of candidates for a query
+
+    Each step takes the candidate maximizing
+    lambda_mult * sim(query, c) - (1 - lambda_mult) * max sim(c, already selected),
+    so lambda_mult=1 is plain relevance order and lower values favour diversity.
+    The redundancy term is kept as a running maximum, so the whole selection
+    costs k matrix-vector products over the candidate matrix.
+
+    Returns:
+        Indices into candidates in selection order
+    """
+    matrix = as_matrix(candidates)
+    k = min(k, matrix.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if not normalized:
+        matrix = normalize_rows(matrix)
+        query = normalize_rows(query)[0]
+
+    relevance = matrix @ np.asarray(query, dtype=np.float32)
+    redundancy = np.full(matrix.shape[0], -np.inf, dtype=np.float32)
+    available = np.ones(matrix.shape[0], dtype=bool)
+    selected = np.empty(k, dtype=np.int64)
+
+    for step in range(k):
+        if step == 0:
+            scores = relevance.copy()
+        else:
+            scores = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+
+        best = int(np.argmax(scores))
+        selected[step] = best
+        available[best] = False
+        redundancy = np.maximum(redundancy, matrix @ matrix[best])
+
+    return selected
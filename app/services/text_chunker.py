@@ -1,15 +1,56 @@
 import re
-from typing import List, Dict, Tuple
+from itertools import islice
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, Union, IO
+from sqlalchemy import text as sql_text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 from ..models.chunk import DocumentChunk
-from app.database import get_db  # ✅ Correct
+from .token_counter import TokenCounter
+from app.database import get_db, Document  # ✅ Correct
+
+# Sentence boundary followed by more text, i.e. one that can't grow with the next read
+_CLOSED_BOUNDARY = re.compile(r'(?<=[.!?]) +(?=[^ ])')
+_WHITESPACE = re.compile(r'\s')
 
 class TextChunker:
     """Handle text chunking for RAG system"""
     
-    def __init__(self, chunk_size: int = 1000, overlap: int = 200):
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        overlap: int = 200,
+        max_tokens: Optional[int] = None,
+        token_overlap: int = 32,
+        token_counter: Optional[TokenCounter] = None
+    ):
+        """
+        Initialize chunker
+        
+        Args:
+            chunk_size: Characters per chunk (character mode)
+            overlap: Characters repeated from the previous chunk (character mode)
+            max_tokens: Switch to token mode with this many word-pieces per chunk,
+                capped at what the embedding model keeps after special tokens
+            token_overlap: Most tokens of whole trailing sentences repeated in the next chunk
+            token_counter: Tokenizer wrapper (defaults to the shared all-MiniLM-L6-v2 counter)
+        """
         self.chunk_size = chunk_size
         self.overlap = overlap
+        self.max_tokens = max_tokens
+        self.token_overlap = token_overlap
+        self._token_counter = token_counter
+        self.last_sync_stats: Dict[str, int] = {}
+    
+    @property
+    def token_counter(self) -> TokenCounter:
+        if self._token_counter is None:
+            self._token_counter = TokenCounter.shared()
+        return self._token_counter
+    
+    @property
+    def token_budget(self) -> int:
+        """Word-pieces per chunk in token mode; [CLS] and [SEP] take two of the model's slots"""
+        return max(1, min(self.max_tokens, self.token_counter.max_seq_length - 2))
     
     def clean_text(self, text: str) -> str:
         """Clean and normalize text"""
@@ -27,6 +68,9 @@ class TextChunker:
     
     def create_chunks(self, text: str) -> List[Dict]:
         """Create overlapping chunks from text"""
+        if self.max_tokens:
+            return list(self.iter_chunks(text))
+        
         cleaned_text = self.clean_text(text)
         sentences = self.split_by_sentences(cleaned_text)
         
@@ -77,35 +121,252 @@ class TextChunker:
         
         return chunks
     
+    def iter_sentences(self, source: Union[str, Iterable[str], IO[str]], read_size: int = 1 << 16) -> Iterator[str]:
+        """
+        Stream the sentences split_by_sentences(clean_text(...)) would return
+        
+        Args:
+            source: Text, an iterable of text pieces, or a text file handle
+            read_size: Characters read (or sliced from a string) at a time
+        """
+        if isinstance(source, str):
+            pieces = (source[i:i + read_size] for i in range(0, len(source), read_size))
+        elif hasattr(source, "read"):
+            pieces = iter(lambda: source.read(read_size), "")
+        else:
+            pieces = source
+        
+        carry = ""
+        ended_in_whitespace = False
+        for piece in pieces:
+            if not piece:
+                continue
+            
+            # Same cleaning as clean_text, piece by piece; a whitespace run split
+            # across two pieces still collapses to one space
+            cleaned = re.sub(r'[^\w\s\.\,\!\?\;\:\-\(\)]', '', re.sub(r'\s+', ' ', piece))
+            if ended_in_whitespace and _WHITESPACE.match(piece):
+                cleaned = cleaned[1:]
+            ended_in_whitespace = bool(_WHITESPACE.match(piece[-1]))
+            
+            # Only scan the new text (plus a trailing space run it may extend)
+            scan_from = len(carry.rstrip(' '))
+            carry += cleaned
+            last = None
+            for last in _CLOSED_BOUNDARY.finditer(carry, scan_from):
+                pass
+            if last is not None:
+                yield from self.split_by_sentences(carry[:last.start()])
+                carry = carry[last.end():]
+        
+        yield from self.split_by_sentences(carry)
+    
+    def iter_chunks(self, source: Union[str, Iterable[str], IO[str]], read_size: int = 1 << 16) -> Iterator[Dict]:
+        """
+        Stream the chunks create_chunks would return for the same text
+        
+        Only the current chunk and the sentence being read are held in memory, so
+        large exports can be chunked straight from a file handle. Chunk text is
+        joined once per emitted chunk instead of once per sentence.
+        
+        Args:
+            source: Text, an iterable of text pieces, or a text file handle
+            read_size: Characters read (or sliced from a string) at a time
+        """
+        if self.max_tokens:
+            yield from self._iter_token_chunks(source, read_size)
+            return
+        
+        parts: List[str] = []
+        current_length = 0
+        current_position = 0
+        chunk_start_position = 0
+        previous_end = None
+        
+        for sentence in self.iter_sentences(source, read_size=read_size):
+            # Length of current_chunk + " " + sentence, without building it
+            potential_length = current_length + 1 + len(sentence) if current_length else len(sentence)
+            
+            if potential_length <= self.chunk_size:
+                parts.append(sentence)
+                current_length = potential_length
+            else:
+                current_chunk = " ".join(parts)
+                if current_chunk:
+                    yield {
+                        'content': current_chunk,
+                        'start_position': chunk_start_position,
+                        'end_position': chunk_start_position + len(current_chunk),
+                        'size': len(current_chunk)
+                    }
+                    previous_end = chunk_start_position + len(current_chunk)
+                
+                # Start new chunk with overlap
+                if previous_end is not None and self.overlap > 0:
+                    overlap_text = current_chunk[-self.overlap:] if len(current_chunk) > self.overlap else current_chunk
+                    parts = [overlap_text, sentence]
+                    current_length = len(overlap_text) + 1 + len(sentence)
+                    chunk_start_position = previous_end - len(overlap_text)
+                else:
+                    parts = [sentence]
+                    current_length = len(sentence)
+                    chunk_start_position = current_position
+            
+            current_position += len(sentence) + 1  # +1 for space
+        
+        # Add final chunk
+        if current_length:
+            current_chunk = " ".join(parts)
+            yield {
+                'content': current_chunk,
+                'start_position': chunk_start_position,
+                'end_position': chunk_start_position + len(current_chunk),
+                'size': len(current_chunk)
+            }
+    
+    def _iter_token_chunks(self, source: Union[str, Iterable[str], IO[str]], read_size: int) -> Iterator[Dict]:
+        """
+        Pack whole sentences into chunks of at most token_budget word-pieces
+        
+        Sentences are counted a batch at a time. Positions use the same
+        sentence-joined-by-one-space coordinates as character mode. Chunk counts
+        are sums of sentence counts, which is exact for WordPiece because it
+        splits on whitespace before tokenizing.
+        """
+        budget = self.token_budget
+        window: List[Tuple[str, int, int]] = []  # (text, position, tokens)
+        window_tokens = 0
+        position = 0
+        
+        sentences = self.iter_sentences(source, read_size=read_size)
+        for batch in iter(lambda: list(islice(sentences, 256)), []):
+            for sentence, tokens in zip(batch, self.token_counter.count(batch)):
+                if tokens <= budget:
+                    pieces = [(sentence, position, tokens)]
+                else:
+                    pieces = self._split_long_sentence(sentence, position, budget)
+                position += len(sentence) + 1
+                
+                for piece in pieces:
+                    if window and window_tokens + piece[2] > budget:
+                        yield self._token_chunk(window)
+                        
+                        # Carry trailing sentences as overlap while they leave room for the new one
+                        carried = []
+                        carried_tokens = 0
+                        for item in reversed(window):
+                            if carried_tokens + item[2] > min(self.token_overlap, budget - piece[2]):
+                                break
+                            carried.insert(0, item)
+                            carried_tokens += item[2]
+                        window, window_tokens = carried, carried_tokens
+                    
+                    window.append(piece)
+                    window_tokens += piece[2]
+        
+        if window:
+            yield self._token_chunk(window)
+    
+    def _split_long_sentence(self, sentence: str, position: int, budget: int) -> List[Tuple[str, int, int]]:
+        """Break a sentence over the budget at word boundaries, and words over it at token boundaries"""
+        words = list(re.finditer(r'\S+', sentence))
+        counts = self.token_counter.count([word.group() for word in words])
+        
+        long_words = [word.group() for word, count in zip(words, counts) if count > budget]
+        word_offsets = iter(self.token_counter.offsets(long_words))
+        
+        spans = []  # (start, end, tokens) within the sentence
+        for word, count in zip(words, counts):
+            if count <= budget:
+                spans.append((word.start(), word.end(), count))
+                continue
+            # Cut before every budget-th token so no piece is truncated by the encoder
+            offsets = next(word_offsets)
+            cuts = [0] + [offsets[i][0] for i in range(budget, len(offsets), budget)] + [len(word.group())]
+            for i, (start, end) in enumerate(zip(cuts, cuts[1:])):
+                spans.append((word.start() + start, word.start() + end, min(budget, len(offsets) - i * budget)))
+        
+        pieces = []
+        first = None
+        tokens = 0
+        for start, end, count in spans:
+            if first is not None and tokens + count > budget:
+                pieces.append((sentence[first:last], position + first, tokens))
+                first = None
+                tokens = 0
+            if first is None:
+                first = start
+            last = end
+            tokens += count
+        if first is not None:
+            pieces.append((sentence[first:last], position + first, tokens))
+        return pieces
+    
+    @staticmethod
+    def _token_chunk(window: List[Tuple[str, int, int]]) -> Dict:
+        content = " ".join(text for text, _, _ in window)
+        start = window[0][1]
+        return {
+            'content': content,
+            'start_position': start,
+            'end_position': start + len(content),
+            'size': len(content),
+            'token_count': sum(tokens for _, _, tokens in window)
+        }
+    
     def process_document_chunks(self, document_id: int, text: str, db: Session) -> List[DocumentChunk]:
-        """Create and store chunks for a document"""
+        """
+        Create and store chunks for a document
         
-        # Delete existing chunks for this document
-        db.query(DocumentChunk).filter(DocumentChunk.document_id == document_id).delete()
+        Re-processing is incremental: existing chunks whose content is unchanged are
+        kept (with their embedding_id), only new content gets new rows, and chunks
+        whose content disappeared are deleted. Counts are kept in self.last_sync_stats.
+        """
+        existing = self.get_document_chunks(document_id, db)
         
-        # Create new chunks
-        chunks_data = self.create_chunks(text)
-        chunk_objects = []
+        # Existing rows by content, in order, so repeated passages pair up one-to-one
+        reusable: Dict[str, List[DocumentChunk]] = {}
+        for chunk in existing:
+            reusable.setdefault(chunk.content, []).append(chunk)
         
-        for index, chunk_data in enumerate(chunks_data):
+        kept = 0
+        added = 0
+        
+        for index, chunk_data in enumerate(self.iter_chunks(text)):
+            candidates = reusable.get(chunk_data['content'])
+            if candidates:
+                chunk = candidates.pop(0)
+                # Unchanged values are not written by the ORM
+                chunk.chunk_index = index
+                chunk.chunk_size = chunk_data['size']
+                chunk.start_position = chunk_data['start_position']
+                chunk.end_position = chunk_data['end_position']
+                chunk.token_count = chunk_data.get('token_count')
+                kept += 1
+                continue
+            
             chunk = DocumentChunk(
                 document_id=document_id,
                 chunk_index=index,
                 content=chunk_data['content'],
                 chunk_size=chunk_data['size'],
                 start_position=chunk_data['start_position'],
-                end_position=chunk_data['end_position']
+                end_position=chunk_data['end_position'],
+                token_count=chunk_data.get('token_count')
             )
             db.add(chunk)
-            chunk_objects.append(chunk)
+            added += 1
+        
+        removed = [chunk for chunks in reusable.values() for chunk in chunks]
+        for chunk in removed:
+            db.delete(chunk)
         
         db.commit()
         
-        # Refresh all chunk objects
-        for chunk in chunk_objects:
-            db.refresh(chunk)
+        self.last_sync_stats = {"kept": kept, "added": added, "removed": len(removed)}
         
-        return chunk_objects
+        # Reload all chunk objects in one query
+        return self.get_document_chunks(document_id, db)
     
     def get_document_chunks(self, document_id: int, db: Session) -> List[DocumentChunk]:
         """Get all chunks for a document"""
@@ -113,12 +374,71 @@ class TextChunker:
             DocumentChunk.document_id == document_id
         ).order_by(DocumentChunk.chunk_index).all()
     
-    def search_chunks_by_content(self, query: str, user_id: int, db: Session, limit: int = 5) -> List[DocumentChunk]:
-        """Simple text-based search in chunks (will be replaced by vector search)"""
+    def search_chunks_by_content(
+        self,
+        query: str,
+        user_id: int,
+        db: Session,
+        limit: int = 5,
+        prefix: bool = True
+    ) -> List[DocumentChunk]:
+        """
+        Full-text search in a user's chunks, best BM25 match first
+        
+        Uses the document_chunks_fts index when the database has one; each returned
+        chunk then carries `search_score` (lower bm25 is better) and a highlighted
+        `search_snippet`. Other databases fall back to a substring scan.
+        """
+        match = self.build_fts_query(query, prefix=prefix)
+        if not match:
+            return []
+        
+        if db.get_bind().dialect.name == "sqlite":
+            try:
+                rows = db.execute(
+                    sql_text(
+                        """
+                        SELECT c.id, bm25(document_chunks_fts) AS score,
+                               snippet(document_chunks_fts, 0, '[', ']', '…', 16) AS snippet
+                        FROM document_chunks_fts
+                        JOIN document_chunks c ON c.id = document_chunks_fts.rowid
+                        JOIN documents d ON d.id = c.document_id
+                        WHERE document_chunks_fts MATCH :match AND d.user_id = :user_id
+                        ORDER BY score
+                        LIMIT :limit
+                        """
+                    ),
+                    {"match": match, "user_id": user_id, "limit": limit}
+                ).all()
+            except OperationalError as e:
+                # Database predates migrate_add_chunk_fts.py
+                print(f"Full-text index unavailable, falling back to substring search: {e.orig}")
+            else:
+                chunks = {
+                    chunk.id: chunk
+                    for chunk in db.query(DocumentChunk).filter(DocumentChunk.id.in_([row.id for row in rows])).all()
+                }
+                results = []
+                for row in rows:
+                    chunk = chunks.get(row.id)
+                    if chunk is not None:
+                        chunk.search_score = row.score
+                        chunk.search_snippet = row.snippet
+                        results.append(chunk)
+                return results
+        
         # Join with documents to filter by user
-        chunks = db.query(DocumentChunk).join(Document).filter(
+        chunks = db.query(DocumentChunk).join(Document, Document.id == DocumentChunk.document_id).filter(
             Document.user_id == user_id,
             DocumentChunk.content.ilike(f"%{query}%")
         ).limit(limit).all()
         
-        return chunks
\ No newline at end of file
+        return chunks
+    
+    @staticmethod
+    def build_fts_query(query: str, prefix: bool = True) -> str:
+        """Turn free text into an FTS5 MATCH expression (all terms, optionally as prefixes)"""
+        terms = re.findall(r"\w+", query or "")
+        suffix = "*" if prefix else ""
+        # Quoting keeps FTS5 operators and punctuation in user input from being parsed
+        return " ".join(f'"{term}"{suffix}' for term in terms)
@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple, Any
+from .model_registry import model_registry
+
+
+class TokenCounter:
+    """Word-piece counts from an embedding model's fast tokenizer, batched and cached"""
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        tokenizer: Optional[Any] = None,
+        max_seq_length: Optional[int] = None,
+        max_cache_entries: int = 100_000
+    ):
+        """
+        Initialize token counter
+
+        Args:
+            model_name: SentenceTransformer whose tokenizer and sequence limit are used
+            tokenizer: Preloaded tokenizer (defaults to the shared model's)
+            max_seq_length: Tokens the model embeds per text, special tokens included
+                (defaults to the model's max_seq_length)
+            max_cache_entries: Distinct texts whose counts are remembered
+        """
+        self.model_name = model_name
+        self.max_cache_entries = max_cache_entries
+        self._tokenizer = tokenizer
+        self._max_seq_length = max_seq_length
+
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "tokenizer_calls": 0}
+
+    @classmethod
+    def shared(cls, model_name: str = "all-MiniLM-L6-v2") -> "TokenCounter":
+        """Process-wide counter for model_name, so the count cache is shared"""
+        return model_registry.get(f"token_counter:{model_name}", lambda: cls(model_name))
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            self._tokenizer = model_registry.get_sentence_transformer(self.model_name).tokenizer
+        return self._tokenizer
+
+    @property
+    def max_seq_length(self) -> int:
+        if self._max_seq_length is None:
+            model = model_registry.get_sentence_transformer(self.model_name)
+            self._max_seq_length = getattr(model, "max_seq_length", None) or 256
+        return self._max_seq_length
+
+    def count(self, texts: List[str]) -> List[int]:
+        """Tokens per text, without special tokens; uncached texts go through one tokenizer call"""
+        counts: Dict[str, int] = {}
+        with self._lock:
+            for text in texts:
+                if text in self._cache:
+                    self._cache.move_to_end(text)
+                    counts[text] = self._cache[text]
+            self._stats["hits"] += len(texts) - sum(1 for text in texts if text not in counts)
+
+        missing = list(dict.fromkeys(text for text in texts if text not in counts))
+        if missing:
+            ids = self.tokenizer(missing, add_special_tokens=False)["input_ids"]
+            with self._lock:
+                self._stats["misses"] += len(missing)
+                self._stats["tokenizer_calls"] += 1
+                for text, text_ids in zip(missing, ids):
+                    counts[text] = len(text_ids)
+                    self._cache[text] = len(text_ids)
+                while len(self._cache) > self.max_cache_entries:
+                    self._cache.popitem(last=False)
+
+        return [counts[text] for text in texts]
+
+    def offsets(self, texts: List[str]) -> List[List[Tuple[int, int]]]:
+        """Character span of every token in each text (special tokens excluded), in one tokenizer call"""
+        if not texts:
+            return []
+        encoded = self.tokenizer(texts, add_special_tokens=False, return_offsets_mapping=True)
+        with self._lock:
+            self._stats["tokenizer_calls"] += 1
+        return [[tuple(span) for span in spans] for spans in encoded["offset_mapping"]]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache hit/miss counters and tokenizer calls"""
+        with self._lock:
+            return {"model": self.model_name, "cached": len(self._cache), **self._stats}
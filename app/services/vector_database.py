@@ -1,124 +1,418 @@
 import os
-import uuid
-from typing import List, Dict, Optional, Tuple, Any
+import time
+import hashlib
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator, Any
+import numpy as np
 import chromadb
 from chromadb.config import Settings
+from sqlalchemy import inspect as sa_inspect, text as sql_text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 from .embedding_service import EmbeddingService
+from .similarity import mmr_select
+from .flat_index import FlatVectorStore
+from .ann_index import PartitionedIVFStore
+from .lexical_index import LexicalIndex, reciprocal_rank_fusion
+from .reranker import CrossEncoderReranker
+from .retrieval_cache import RetrievalCache
+from .index_snapshot import IndexSnapshot, ChangeJournal, JournaledCollection
 from ..models.chunk import DocumentChunk
-from ..models.document import Document
+from ..database import Document
+
+# Chunk fields mirrored in vector metadata that change when a document is re-chunked
+CHUNK_POSITION_FIELDS = ("chunk_index", "chunk_size", "start_position", "end_position")
 
 class VectorDatabase:
     """Handle vector database operations with ChromaDB"""
     
-    def __init__(self, persist_directory: str = "data/chroma_db", embedding_provider: str = "sentence_transformers"):
-        """Initialize ChromaDB client and embedding service"""
+    def __init__(
+        self,
+        persist_directory: str = "data/chroma_db",
+        embedding_provider: str = "sentence_transformers",
+        backend: Optional[str] = None,
+        index_directory: str = "data/vector_index"
+    ):
+        """
+        Initialize vector store and embedding service
         
-        # Create directory if it doesn't exist
-        os.makedirs(persist_directory, exist_ok=True)
+        Args:
+            persist_directory: ChromaDB storage folder (chroma backend)
+            embedding_provider: Embedding provider name
+            backend: "chroma", "flat" (memory-mapped exact index) or "ivf" (per-user ANN index);
+                defaults to VECTOR_BACKEND or "chroma"
+            index_directory: Storage folder for the flat and ivf backends
+                (the flat backend scans int8/float16 codes when VECTOR_QUANTIZATION is set)
+        """
+        self.backend = (backend or os.getenv("VECTOR_BACKEND", "chroma")).lower()
         
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=persist_directory,
-            settings=Settings(anonymized_telemetry=False)
-        )
+        # Shared embedding service (model is loaded once per process)
+        self.embedding_service = EmbeddingService.shared(embedding_provider)
+        
+        if self.backend == "flat":
+            # Same collection interface, backed by a memory-mapped float32 matrix
+            self.client = None
+            self.collection = FlatVectorStore(
+                index_directory,
+                self.embedding_service.embedding_dim,
+                quantization=os.getenv("VECTOR_QUANTIZATION") or None,
+                rescore_factor=int(os.getenv("VECTOR_RESCORE_FACTOR", "4"))
+            )
+        elif self.backend == "ivf":
+            # Approximate search inside the querying user's partition only
+            self.client = None
+            self.collection = PartitionedIVFStore(
+                index_directory,
+                self.embedding_service.embedding_dim,
+                nprobe=int(os.getenv("IVF_NPROBE", "8")),
+                train_threshold=int(os.getenv("IVF_TRAIN_THRESHOLD", "2048"))
+            )
+        elif self.backend == "chroma":
+            # Create directory if it doesn't exist
+            os.makedirs(persist_directory, exist_ok=True)
+            
+            # Initialize ChromaDB client
+            self.client = chromadb.PersistentClient(
+                path=persist_directory,
+                settings=Settings(anonymized_telemetry=False)
+            )
+            
+            # Create or get collection
+            self.collection = self.client.get_or_create_collection(
+                name="document_chunks",
+                metadata={"description": "Document chunks for RAG system"}
+            )
+        else:
+            raise ValueError(f"Unsupported vector backend: {self.backend}")
+        
+        # Dedup counts from the most recent add_chunks_batch call
+        self.last_ingest_stats: Dict[str, int] = {}
         
-        # Initialize embedding service
-        self.embedding_service = EmbeddingService(provider=embedding_provider)
+        # Sub-batch streaming for add_chunks_batch; one worker embeds ahead of the writes
+        self.ingest_batch_size = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+        if self.embedding_service.pool:
+            # Smaller sub-batches would never reach the process pool's threshold
+            self.ingest_batch_size = max(self.ingest_batch_size, self.embedding_service.pool_min_texts)
+        self.ingest_retries = int(os.getenv("INGEST_RETRIES", "2"))
+        self._ingest_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-embed")
         
-        # Create or get collection
-        self.collection = self.client.get_or_create_collection(
-            name="document_chunks",
-            metadata={"description": "Document chunks for RAG system"}
+        # BM25 index for hybrid search, shared by every instance in the process and
+        # re-synced from the database when chunks change elsewhere
+        self.lexical_index = LexicalIndex.shared()
+        self._search_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-search")
+        
+        # Optional second stage for search_similar_chunks(rerank=True); the model loads on first use
+        self.reranker = CrossEncoderReranker(
+            model_name=os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+            time_budget_ms=float(os.getenv("RERANK_BUDGET_MS", "200")),
+            max_candidates=int(os.getenv("RERANK_CANDIDATES", "20"))
         )
         
-        print(f"✅ Vector database initialized with {self.collection.count()} existing embeddings")
+        # Search results per (user, query, params, corpus version), shared by every instance
+        # in the process so any instance's writes invalidate them; RETRIEVAL_CACHE_TTL=0 disables
+        self.retrieval_cache = RetrievalCache.shared() if float(os.getenv("RETRIEVAL_CACHE_TTL", "300")) > 0 else None
+        # Keeps entries from different stores apart in the shared cache
+        self._cache_scope = (self.backend, os.path.abspath(persist_directory if self.backend == "chroma" else index_directory))
+        
+        # A fresh node starts from VECTOR_SNAPSHOT plus the changes journaled since, instead of re-embedding
+        journal_path = os.getenv("VECTOR_JOURNAL")
+        self.journal = ChangeJournal(journal_path) if journal_path else None
+        snapshot_path = os.getenv("VECTOR_SNAPSHOT")
+        if snapshot_path and os.path.exists(snapshot_path) and self.collection.count() == 0:
+            self.restore_snapshot(snapshot_path)
+        if self.journal:
+            self.collection = JournaledCollection(self.collection, self.journal)
+        
+        print(f"✅ Vector database ({self.backend}) initialized with {self.collection.count()} existing embeddings")
+    
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """Hash of whitespace-normalized chunk text, used to spot duplicate chunks"""
+        return hashlib.sha256(" ".join((text or "").split()).encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def vector_id(document_id: int, content_hash: str) -> str:
+        """Stable vector id for a chunk's content within a document"""
+        return f"chunk_{document_id}_{content_hash[:16]}"
     
     def add_chunk_to_vector_db(self, chunk: DocumentChunk, db: Session) -> bool:
         """Add a single chunk to the vector database"""
-        try:
-            # Generate embedding
-            embedding = self.embedding_service.generate_embedding(chunk.content)
-            
-            # Create unique ID for Chroma
-            chroma_id = f"chunk_{chunk.id}_{uuid.uuid4().hex[:8]}"
-            
-            # Add to ChromaDB
-            self.collection.add(
-                embeddings=[embedding],
-                documents=[chunk.content],
-                metadatas=[{
-                    "chunk_id": chunk.id,
-                    "document_id": chunk.document_id,
-                    "chunk_index": chunk.chunk_index,
-                    "chunk_size": chunk.chunk_size,
-                    "start_position": chunk.start_position,
-                    "end_position": chunk.end_position
-                }],
-                ids=[chroma_id]
-            )
-            
-            # Update chunk with embedding ID
-            chunk.embedding_id = chroma_id
-            db.commit()
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error adding chunk {chunk.id} to vector DB: {e}")
-            return False
+        successful, _ = self.add_chunks_batch([chunk], db)
+        return successful == 1
     
-    def add_chunks_batch(self, chunks: List[DocumentChunk], db: Session) -> Tuple[int, int]:
-        """Add multiple chunks to vector database in batch"""
+    def add_chunks_batch(
+        self,
+        chunks: Iterable[DocumentChunk],
+        db: Session,
+        batch_size: Optional[int] = None
+    ) -> Tuple[int, int]:
+        """
+        Add multiple chunks to vector database in batch
+        
+        Chunks are consumed batch_size at a time (INGEST_BATCH_SIZE by default), so
+        memory stays bounded however long the input is. Embedding of the next
+        sub-batch overlaps with the index write of the current one, and each written
+        sub-batch is committed on its own. A failing sub-batch is retried, then
+        ingestion stops; chunks committed so far keep their embedding_id, so calling
+        sync_document_embeddings again resumes after the last good sub-batch.
+        
+        Chunks whose normalized text repeats inside the input, or already has a vector
+        in the same user's corpus, reference that vector instead of being embedded and
+        stored again. Counts for the last call are kept in self.last_ingest_stats.
+        """
+        batch_size = batch_size or self.ingest_batch_size
+        batches = iter(lambda it=iter(chunks): list(islice(it, batch_size)), [])
+        stats = {
+            "chunks": 0, "embedded": 0, "deduplicated_in_batch": 0, "reused_existing": 0,
+            "deduplicated": 0, "batches": 0, "retries": 0
+        }
+        self.last_ingest_stats = stats
+        owners: Dict[int, int] = {}
         successful = 0
         failed = 0
+        stopped = False
         
+        # Per-sub-batch commits would otherwise expire every object in the session each time
+        expire_on_commit = db.expire_on_commit
+        db.expire_on_commit = False
         try:
-            # Prepare data for batch insertion
-            texts = [chunk.content for chunk in chunks]
-            embeddings = self.embedding_service.generate_embeddings_batch(texts)
+            current = self._plan_ingest_batch(next(batches, []), db, owners, {})
+        except Exception as e:
+            db.expire_on_commit = expire_on_commit
+            print(f"Error in batch embedding: {e}")
+            return 0, len(chunks) if hasattr(chunks, "__len__") else 0
+        
+        while current and current["chunks"]:
+            embedded = self._ingest_pool.submit(self._embed_ingest_batch, current)
             
-            chroma_ids = []
-            documents = []
-            metadatas = []
-            valid_chunks = []
+            # Plan the next sub-batch while this one embeds; its duplicates of
+            # not-yet-written chunks point at the ids about to be written
+            try:
+                upcoming = self._plan_ingest_batch(next(batches, []), db, owners, current["new_ids"])
+            except Exception as e:
+                print(f"Error in batch embedding: {e}")
+                upcoming = None
+            
+            if not self._write_ingest_batch(current, embedded, db, owners, stats):
+                failed = len(current["chunks"])
+                stopped = True
+                break
+            successful += len(current["chunks"])
+            
+            if upcoming is None:
+                stopped = True
+                break
+            current = upcoming
+        
+        db.expire_on_commit = expire_on_commit
+        
+        if hasattr(chunks, "__len__"):
+            failed = len(chunks) - successful
+        
+        stats["deduplicated"] = stats["deduplicated_in_batch"] + stats["reused_existing"]
+        if stats["deduplicated"]:
+            print(
+                f"♻️ Deduplicated {stats['deduplicated']} of {stats['chunks']} chunks "
+                f"({stats['deduplicated_in_batch']} within batch, {stats['reused_existing']} already indexed)"
+            )
+        if stopped:
+            print(f"❌ Ingestion stopped after {successful} committed chunks; syncing again resumes from there")
+        
+        return successful, failed
+    
+    def _plan_ingest_batch(
+        self,
+        chunks: List[DocumentChunk],
+        db: Session,
+        owners: Dict[int, int],
+        in_flight: Dict[Tuple[Optional[int], str], str]
+    ) -> Dict[str, Any]:
+        """Decide which chunks of a sub-batch need embedding and which reuse a vector"""
+        self._refresh_expired(chunks, db)
+        
+        missing = {chunk.document_id for chunk in chunks} - owners.keys()
+        owners.update(self._document_owners(missing, db))
+        
+        hashes = [self.content_hash(chunk.content) for chunk in chunks]
+        existing = self._find_existing_vectors(set(hashes), {owners.get(chunk.document_id) for chunk in chunks})
+        
+        # Pick one chunk per (owner, content) to embed; the rest reference it
+        to_embed = {}
+        reused = []
+        duplicates = []
+        for chunk, content_hash in zip(chunks, hashes):
+            key = (owners.get(chunk.document_id), content_hash)
             
-            for chunk, embedding in zip(chunks, embeddings):
-                chroma_id = f"chunk_{chunk.id}_{uuid.uuid4().hex[:8]}"
+            if key in existing:
+                reused.append((chunk, existing[key]))
+            elif key in in_flight:
+                reused.append((chunk, in_flight[key]))
+            elif key in to_embed:
+                duplicates.append((chunk, key))
+            else:
+                to_embed[key] = chunk
+        
+        return {
+            "chunks": chunks,
+            "to_embed": to_embed,
+            "reused": reused,
+            "duplicates": duplicates,
+            # Everything the write needs is read now: on the session's thread, and
+            # before the previous sub-batch's commit expires these objects
+            "texts": [chunk.content for chunk in to_embed.values()],
+            "new_ids": {
+                key: self.vector_id(chunk.document_id, key[1]) for key, chunk in to_embed.items()
+            },
+            "metadatas": [
+                self._chunk_metadata(chunk, key[1], owners.get(chunk.document_id)) for key, chunk in to_embed.items()
+            ],
+            "lexical": [
+                (chunk.id, chunk.content, chunk.document_id, owners.get(chunk.document_id)) for chunk in chunks
+            ]
+        }
+    
+    @staticmethod
+    def _refresh_expired(chunks: List[DocumentChunk], db: Session):
+        """Reload chunks expired by an earlier commit in one query instead of one per chunk"""
+        ids = [
+            state.identity[0] for state in map(sa_inspect, chunks)
+            if state.identity is not None and state.expired_attributes
+        ]
+        if ids:
+            db.query(DocumentChunk).filter(DocumentChunk.id.in_(ids)).all()
+    
+    def _embed_ingest_batch(self, plan: Dict[str, Any]) -> np.ndarray:
+        return self.embedding_service.generate_embeddings_array(plan["texts"])
+    
+    def _write_ingest_batch(self, plan: Dict[str, Any], embedded, db: Session, owners: Dict[int, int], stats: Dict[str, int]) -> bool:
+        """Upsert one planned sub-batch and commit its embedding ids, retrying on failure"""
+        for attempt in range(self.ingest_retries + 1):
+            try:
+                embeddings = embedded.result() if attempt == 0 else self._embed_ingest_batch(plan)
                 
-                chroma_ids.append(chroma_id)
-                documents.append(chunk.content)
-                metadatas.append({
-                    "chunk_id": chunk.id,
-                    "document_id": chunk.document_id,
-                    "chunk_index": chunk.chunk_index,
-                    "chunk_size": chunk.chunk_size,
-                    "start_position": chunk.start_position,
-                    "end_position": chunk.end_position
-                })
+                if plan["to_embed"]:
+                    # Upsert so retrying a partially written batch cannot duplicate vectors
+                    self.collection.upsert(
+                        embeddings=embeddings,
+                        documents=plan["texts"],
+                        metadatas=plan["metadatas"],
+                        ids=list(plan["new_ids"].values())
+                    )
                 
-                valid_chunks.append(chunk)
-            
-            # Add to ChromaDB in batch
-            self.collection.add(
-                embeddings=embeddings,
-                documents=documents,
-                metadatas=metadatas,
-                ids=chroma_ids
-            )
+                # Update chunks with embedding IDs (the previous commit may have expired them)
+                self._refresh_expired(plan["chunks"], db)
+                for key, chunk in plan["to_embed"].items():
+                    chunk.embedding_id = plan["new_ids"][key]
+                for chunk, chroma_id in plan["reused"]:
+                    chunk.embedding_id = chroma_id
+                for chunk, key in plan["duplicates"]:
+                    chunk.embedding_id = plan["new_ids"][key]
+                
+                db.commit()
+                break
+            except Exception as e:
+                db.rollback()
+                print(f"Error in batch embedding (attempt {attempt + 1} of {self.ingest_retries + 1}): {e}")
+                if attempt == self.ingest_retries:
+                    return False
+                stats["retries"] += 1
+                time.sleep(0.1 * 2 ** attempt)
+        
+        chunks = plan["chunks"]
+        self.lexical_index.add_many(plan["lexical"])
+        self._invalidate_users({user_id for _, _, _, user_id in plan["lexical"]})
+        
+        stats["chunks"] += len(chunks)
+        stats["embedded"] += len(plan["to_embed"])
+        stats["deduplicated_in_batch"] += len(plan["duplicates"])
+        stats["reused_existing"] += len(plan["reused"])
+        stats["batches"] += 1
+        return True
+    
+    def _chunk_metadata(self, chunk: DocumentChunk, content_hash: str, user_id: Optional[int]) -> Dict[str, Any]:
+        """Metadata stored alongside a chunk's vector"""
+        metadata = {
+            "chunk_id": chunk.id,
+            "document_id": chunk.document_id,
+            "chunk_index": chunk.chunk_index,
+            "chunk_size": chunk.chunk_size,
+            "start_position": chunk.start_position,
+            "end_position": chunk.end_position,
+            "content_hash": content_hash
+        }
+        # Chroma rejects None metadata values
+        if user_id is not None:
+            metadata["user_id"] = user_id
+        return metadata
+    
+    def _document_owners(self, document_ids, db: Session) -> Dict[int, int]:
+        """Map document ids to the id of the user who owns them"""
+        if not document_ids:
+            return {}
+        rows = db.query(Document.id, Document.user_id).filter(Document.id.in_(list(document_ids))).all()
+        return {doc_id: user_id for doc_id, user_id in rows}
+    
+    def _find_existing_vectors(self, hashes, user_ids) -> Dict[Tuple[int, str], str]:
+        """Existing vector ids for content hashes, keyed by (owner user id, content hash)"""
+        user_ids = [user_id for user_id in user_ids if user_id is not None]
+        if not hashes or not user_ids:
+            return {}
+        
+        results = self.collection.get(
+            where={"$and": [
+                {"content_hash": {"$in": list(hashes)}},
+                {"user_id": {"$in": user_ids}}
+            ]},
+            include=["metadatas"]
+        )
+        
+        existing = {}
+        for chroma_id, metadata in zip(results["ids"], results["metadatas"]):
+            key = (metadata["user_id"], metadata["content_hash"])
+            existing.setdefault(key, chroma_id)
+        return existing
+    
+    def backfill_owner_metadata(self, db: Session, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Add user_id metadata to vectors indexed before tenant filtering moved into the query
+        
+        Vectors whose document no longer exists are left untouched. Safe to run repeatedly.
+        """
+        stats = {"scanned": 0, "updated": 0, "orphaned": 0}
+        offset = 0
+        
+        while True:
+            page = self.collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+            if not page["ids"]:
+                break
+            offset += len(page["ids"])
+            stats["scanned"] += len(page["ids"])
             
-            # Update chunks with embedding IDs
-            for chunk, chroma_id in zip(valid_chunks, chroma_ids):
-                chunk.embedding_id = chroma_id
+            missing = [
+                (chroma_id, metadata) for chroma_id, metadata in zip(page["ids"], page["metadatas"])
+                if "user_id" not in metadata
+            ]
+            if not missing:
+                continue
             
-            db.commit()
-            successful = len(valid_chunks)
+            owners = self._document_owners({metadata["document_id"] for _, metadata in missing}, db)
+            ids = []
+            metadatas = []
+            for chroma_id, metadata in missing:
+                user_id = owners.get(metadata["document_id"])
+                if user_id is None:
+                    stats["orphaned"] += 1
+                    continue
+                ids.append(chroma_id)
+                metadatas.append({**metadata, "user_id": user_id})
             
-        except Exception as e:
-            print(f"Error in batch embedding: {e}")
-            failed = len(chunks)
+            if ids:
+                self.collection.update(ids=ids, metadatas=metadatas)
+                stats["updated"] += len(ids)
         
-        return successful, failed
+        print(f"✅ Backfilled user_id on {stats['updated']} of {stats['scanned']} embeddings ({stats['orphaned']} orphaned)")
+        return stats
     
     def search_similar_chunks(
         self, 
@@ -126,94 +420,486 @@ class VectorDatabase:
         user_id: int, 
         db: Session, 
         limit: int = 5,
-        similarity_threshold: float = 0.5
+        similarity_threshold: float = 0.5,
+        rerank: bool = False,
+        diversify: bool = False,
+        mmr_lambda: float = 0.5,
+        mmr_candidates: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Search for similar chunks using vector similarity"""
+        """
+        Search for similar chunks using vector similarity
+        
+        With rerank=True a wider candidate set is retrieved and reordered by the
+        cross-encoder before the top `limit` are returned. With diversify=True the
+        `limit` chunks are chosen from a pool of mmr_candidates (default 4 * limit)
+        by maximal marginal relevance, which skips near-duplicate neighbours;
+        mmr_lambda=1 is pure relevance, lower values trade relevance for diversity.
+        """
+        
+        # Blank queries have nothing to match (as in search_similar_chunks_batch)
+        if not (query or '').strip():
+            return []
         
         try:
-            # Generate query embedding
-            query_embedding = self.embedding_service.generate_embedding(query)
+            cache_key = self._cache_key(
+                user_id, query, "vector", limit, similarity_threshold, rerank,
+                diversify and (mmr_lambda, mmr_candidates)
+            )
+            cached = self.retrieval_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                return cached
             
-            # Get user's document IDs for filtering
-            user_doc_ids = db.query(Document.id).filter(Document.user_id == user_id).all()
-            user_doc_ids = [doc_id[0] for doc_id in user_doc_ids]
+            n_results = max(limit, self.reranker.max_candidates) if rerank else limit
+            if diversify:
+                n_results = max(n_results, mmr_candidates or 4 * limit)
             
-            if not user_doc_ids:
-                return []
+            query_embedding = self.embedding_service.generate_query_embedding_array(query)
+            similar_chunks = [
+                chunk for chunk in self._vector_search(query_embedding, user_id, n_results, with_embeddings=diversify)
+                if chunk['similarity'] >= similarity_threshold
+            ]
             
-            # Search in ChromaDB
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=min(limit * 2, 20),  # Get more results to filter by user
-                include=["documents", "metadatas", "distances"]
-            )
+            # Sort by similarity (highest first)
+            similar_chunks.sort(key=lambda x: x['similarity'], reverse=True)
             
-            # Process and filter results
-            similar_chunks = []
+            if diversify and similar_chunks:
+                embeddings = np.stack([chunk.pop('embedding') for chunk in similar_chunks])
+                selected = mmr_select(query_embedding, embeddings, limit, lambda_mult=mmr_lambda)
+                similar_chunks = [similar_chunks[i] for i in selected]
             
-            if results['documents'] and len(results['documents']) > 0:
-                documents = results['documents'][0]
-                metadatas = results['metadatas'][0]
-                distances = results['distances'][0]
-                
-                for doc, metadata, distance in zip(documents, metadatas, distances):
-                    # Convert distance to similarity (ChromaDB uses L2 distance)
-                    similarity = 1 / (1 + distance)
-                    
-                    # Filter by user's documents and similarity threshold
-                    if (metadata['document_id'] in user_doc_ids and 
-                        similarity >= similarity_threshold):
-                        
-                        similar_chunks.append({
-                            'chunk_id': metadata['chunk_id'],
-                            'document_id': metadata['document_id'],
-                            'content': doc,
-                            'similarity': similarity,
-                            'chunk_index': metadata['chunk_index'],
-                            'metadata': metadata
-                        })
-                
-                # Sort by similarity (highest first)
-                similar_chunks.sort(key=lambda x: x['similarity'], reverse=True)
-                
-                # Limit results
+            cacheable = True
+            if rerank:
+                candidates = similar_chunks
+                similar_chunks = self.reranker.rerank(query, candidates, top_n=limit)
+                # A timed-out or failed rerank returns retrieval order without scores; retry it next time
+                cacheable = len(candidates) < 2 or any('rerank_score' in chunk for chunk in similar_chunks)
+            else:
                 similar_chunks = similar_chunks[:limit]
             
+            if cache_key and cacheable:
+                self.retrieval_cache.put(cache_key, similar_chunks)
             return similar_chunks
             
         except Exception as e:
             print(f"Error searching similar chunks: {e}")
             return []
     
-    def delete_document_embeddings(self, document_id: int) -> bool:
-        """Delete all embeddings for a document"""
+    def search_similar_chunks_batch(
+        self,
+        queries: List[Dict[str, Any]],
+        similarity_threshold: float = 0.5
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Run many searches at once
+        
+        Each query is a dict with 'query', 'user_id' and optional 'limit' (default 5).
+        All query texts are embedded in one batch, and queries are grouped by user so
+        each user's queries share one index call. Results come back in input order.
+        """
+        results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        
+        # Blank queries have nothing to match; cached ones need no work
+        cache_keys = [
+            self._cache_key(item['user_id'], item.get('query') or '', "vector", item.get('limit', 5), similarity_threshold, False)
+            for item in queries
+        ]
+        active = []
+        for i, item in enumerate(queries):
+            if not (item.get('query') or '').strip():
+                continue
+            cached = self.retrieval_cache.get(cache_keys[i]) if cache_keys[i] else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                active.append(i)
+        if not active:
+            return results
+        
         try:
-            # Get all chunk embeddings for this document
-            results = self.collection.get(
-                where={"document_id": document_id},
-                include=["metadatas"]
+            embeddings = self.embedding_service.generate_embeddings_array([queries[i]['query'] for i in active])
+            
+            by_user: Dict[int, List[int]] = {}
+            for row, i in enumerate(active):
+                by_user.setdefault(queries[i]['user_id'], []).append(row)
+            
+            for user_id, rows in by_user.items():
+                limits = [queries[active[row]].get('limit', 5) for row in rows]
+                response = self.collection.query(
+                    query_embeddings=embeddings[rows],
+                    n_results=max(limits),
+                    where={"user_id": user_id},
+                    include=["documents", "metadatas", "distances"]
+                )
+                
+                for position, (row, limit) in enumerate(zip(rows, limits)):
+                    hits = [
+                        hit for hit in self._hits_from_results(response, position)
+                        if hit['similarity'] >= similarity_threshold
+                    ]
+                    results[active[row]] = hits[:limit]
+                    if cache_keys[active[row]]:
+                        self.retrieval_cache.put(cache_keys[active[row]], hits[:limit])
+            
+        except Exception as e:
+            print(f"Error in batch search: {e}")
+        
+        return results
+    
+    def hybrid_search_chunks(
+        self,
+        query: str,
+        user_id: int,
+        db: Session,
+        limit: int = 5,
+        candidates: int = 20,
+        rrf_k: int = 60
+    ) -> List[Dict[str, Any]]:
+        """
+        Search with BM25 and vector similarity, fused by reciprocal rank
+        
+        Both legs run concurrently and each contributes its top `candidates` chunks.
+        Exact tokens such as identifiers and error codes are found by the lexical leg
+        even when the embedding misses them.
+        """
+        try:
+            cache_key = self._cache_key(user_id, query, "hybrid", limit, candidates, rrf_k)
+            cached = self.retrieval_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                return cached
+            
+            self._sync_lexical_index(db)
+            
+            vector_future = self._search_pool.submit(
+                lambda: self._vector_search(self.embedding_service.generate_query_embedding_array(query), user_id, candidates)
             )
+            lexical_future = self._search_pool.submit(self.lexical_index.search, query, user_id, candidates)
+            vector_hits = vector_future.result()
+            lexical_hits = lexical_future.result()
+            
+            by_chunk = {hit['chunk_id']: hit for hit in vector_hits}
+            lexical_scores = dict(lexical_hits)
+            fused = reciprocal_rank_fusion(
+                [[hit['chunk_id'] for hit in vector_hits], [chunk_id for chunk_id, _ in lexical_hits]],
+                k=rrf_k
+            )[:limit]
             
-            if results['ids']:
-                # Delete embeddings
-                self.collection.delete(ids=results['ids'])
-                return True
+            # Lexical-only hits have no vector payload; load their text in one query
+            missing = [chunk_id for chunk_id, _ in fused if chunk_id not in by_chunk]
+            if missing:
+                for chunk in db.query(DocumentChunk).filter(DocumentChunk.id.in_(missing)).all():
+                    by_chunk[chunk.id] = {
+                        'chunk_id': chunk.id,
+                        'document_id': chunk.document_id,
+                        'content': chunk.content,
+                        'similarity': None,
+                        'chunk_index': chunk.chunk_index,
+                        'metadata': {}
+                    }
             
-            return True  # No embeddings to delete is also success
+            results = []
+            for chunk_id, score in fused:
+                if chunk_id in by_chunk:
+                    results.append({
+                        **by_chunk[chunk_id],
+                        'rrf_score': score,
+                        'lexical_score': lexical_scores.get(chunk_id)
+                    })
+            
+            if cache_key:
+                self.retrieval_cache.put(cache_key, results)
+            return results
+            
+        except Exception as e:
+            print(f"Error in hybrid search: {e}")
+            return []
+    
+    def _cache_key(self, user_id: int, query: str, *params) -> Optional[Tuple]:
+        """Retrieval cache key, or None when caching is off"""
+        return self.retrieval_cache.make_key(user_id, query, self._cache_scope, *params) if self.retrieval_cache else None
+    
+    def _invalidate_users(self, user_ids):
+        """Bump corpus versions so cached searches for these users are not served again"""
+        if self.retrieval_cache:
+            for user_id in set(user_ids):
+                if user_id is not None:
+                    self.retrieval_cache.invalidate_user(user_id)
+    
+    def _vector_search(self, query_embedding: np.ndarray, user_id: int, n_results: int, with_embeddings: bool = False) -> List[Dict[str, Any]]:
+        """Nearest chunks to a query vector within one user's corpus, best first (optionally with their vectors)"""
+        # Tenant filter runs inside the vector query, so every hit belongs to the user
+        results = self.collection.query(
+            query_embeddings=query_embedding[np.newaxis, :],
+            n_results=n_results,
+            where={"user_id": user_id},
+            include=["documents", "metadatas", "distances"] + (["embeddings"] if with_embeddings else [])
+        )
+        
+        hits = self._hits_from_results(results, 0)
+        if with_embeddings:
+            for hit, embedding in zip(hits, results['embeddings'][0]):
+                hit['embedding'] = np.asarray(embedding, dtype=np.float32)
+        return hits
+    
+    @staticmethod
+    def _hits_from_results(results: Dict[str, Any], index: int) -> List[Dict[str, Any]]:
+        """Result dicts for one query of a collection.query response"""
+        hits = []
+        if results['documents'] and len(results['documents']) > index:
+            for doc, metadata, distance in zip(results['documents'][index], results['metadatas'][index], results['distances'][index]):
+                hits.append({
+                    'chunk_id': metadata['chunk_id'],
+                    'document_id': metadata['document_id'],
+                    'content': doc,
+                    # Convert distance to similarity (ChromaDB uses L2 distance)
+                    'similarity': 1 / (1 + distance),
+                    'chunk_index': metadata['chunk_index'],
+                    'metadata': metadata
+                })
+        return hits
+    
+    def _sync_lexical_index(self, db: Session):
+        """
+        Bring the BM25 index in line with the chunks table
+        
+        Chunks ingested or deleted through this process are applied as they happen.
+        Writes from anywhere else are read from the document_chunk_changes log: each
+        uncached search checks its newest sequence number (one primary-key lookup) and
+        re-reads only the chunks logged since the last sync. Databases without the log
+        (see migrate_add_chunk_changes.py) are read once, on first use.
+        """
+        try:
+            head = db.execute(sql_text("SELECT COALESCE(MAX(seq), 0) FROM document_chunk_changes")).scalar()
+        except OperationalError:
+            head = None
+        if self.lexical_index.built and (head is None or head == self.lexical_index.synced_sequence):
+            return
+        
+        with self.lexical_index.sync_lock:
+            if self.lexical_index.built and (head is None or head <= self.lexical_index.synced_sequence):
+                return
+            
+            rows = db.query(
+                DocumentChunk.id, DocumentChunk.content, DocumentChunk.document_id, Document.user_id
+            ).join(Document, Document.id == DocumentChunk.document_id)
+            
+            if not self.lexical_index.built:
+                # Changes logged while this scan runs are replayed by the next sync
+                self.lexical_index.add_many(rows.yield_per(1000))
+                self.lexical_index.built = True
+                self.lexical_index.synced_sequence = head or 0
+                print(f"✅ Lexical index built with {self.lexical_index.get_stats()['chunks']} chunks")
+                if head is None:
+                    print("Chunk change log unavailable; run migrate_add_chunk_changes.py to pick up other processes' writes")
+                return
+            
+            changed = [
+                chunk_id for chunk_id, in db.execute(
+                    sql_text("SELECT chunk_id FROM document_chunk_changes WHERE seq > :after AND seq <= :head"),
+                    {"after": self.lexical_index.synced_sequence, "head": head}
+                )
+            ]
+            removed = 0
+            for start in range(0, len(changed), 500):
+                batch = changed[start:start + 500]
+                current = rows.filter(DocumentChunk.id.in_(batch)).all()
+                # Re-adding replaces a chunk's old text; ids no longer in the table are gone
+                self.lexical_index.add_many(current)
+                gone = set(batch) - {row[0] for row in current}
+                self.lexical_index.remove(gone)
+                removed += len(gone)
+            self.lexical_index.synced_sequence = head
+            print(f"♻️ Lexical index re-synced: {len(changed) - removed} chunks updated, {removed} removed")
+    
+    def sync_document_embeddings(self, document_id: int, db: Session) -> Tuple[int, int]:
+        """
+        Bring a document's vectors in line with its current chunks
+        
+        Meant to follow TextChunker.process_document_chunks: only chunks without an
+        embedding_id are embedded, vectors no chunk references any more are deleted,
+        and kept chunks whose index or positions changed get their vector metadata
+        updated in place. An unchanged document costs two reads and no embedding or writes.
+        """
+        rows = db.query(DocumentChunk.id, DocumentChunk.embedding_id).filter(
+            DocumentChunk.document_id == document_id
+        ).order_by(DocumentChunk.chunk_index).all()
+        
+        # Chunks committed by an earlier, interrupted run already have an embedding_id
+        pending = [chunk_id for chunk_id, embedding_id in rows if not embedding_id]
+        successful = self.add_chunks_batch(self._iter_chunks(pending, db), db)[0] if pending else 0
+        failed = len(pending) - successful
+        
+        current = {chunk_id for chunk_id, _ in rows}
+        stale = [chunk_id for chunk_id in self.lexical_index.document_chunk_ids(document_id) if chunk_id not in current]
+        self.lexical_index.remove(stale)
+        
+        changed = 0
+        try:
+            _, changed = self._release_document_vectors(document_id, db, keep_own_chunks=True)
+        except Exception as e:
+            print(f"Error removing stale embeddings for document {document_id}: {e}")
+        
+        # New chunks were already invalidated by add_chunks_batch
+        if stale or changed:
+            self._invalidate_users(self._document_owners({document_id}, db).values())
+        return successful, failed
+    
+    def _iter_chunks(self, chunk_ids: List[int], db: Session) -> Iterator[DocumentChunk]:
+        """Load chunks by id one ingest sub-batch at a time, keeping their order"""
+        for start in range(0, len(chunk_ids), self.ingest_batch_size):
+            ids = chunk_ids[start:start + self.ingest_batch_size]
+            loaded = {chunk.id: chunk for chunk in db.query(DocumentChunk).filter(DocumentChunk.id.in_(ids))}
+            yield from (loaded[chunk_id] for chunk_id in ids if chunk_id in loaded)
+    
+    def delete_document_embeddings(self, document_id: int, db: Optional[Session] = None) -> bool:
+        """
+        Delete all embeddings for a document
+        
+        When a session is given, vectors still referenced by deduplicated chunks of
+        other documents are handed over to one of those chunks instead of deleted.
+        """
+        try:
+            self.lexical_index.remove_document(document_id)
+            
+            if db is None:
+                results = self.collection.get(where={"document_id": document_id}, include=["metadatas"])
+                if results['ids']:
+                    self.collection.delete(ids=results['ids'])
+                owners = {metadata.get("user_id") for metadata in results['metadatas']}
+            else:
+                owners = set(self._document_owners({document_id}, db).values())
+                owners |= self._release_document_vectors(document_id, db, keep_own_chunks=False)[0]
+            
+            self._invalidate_users(owners)
+            return True
             
         except Exception as e:
             print(f"Error deleting embeddings for document {document_id}: {e}")
             return False
     
+    def _release_document_vectors(self, document_id: int, db: Session, keep_own_chunks: bool) -> Tuple[set, int]:
+        """
+        Delete the document's vectors that no chunk references
+        
+        A vector still referenced elsewhere is kept, and its metadata is pointed at a
+        referencing chunk if the chunk it describes is gone, or refreshed if that
+        chunk's index or positions changed. With keep_own_chunks=False
+        the document's own chunks are treated as already deleted. Returns the user ids
+        found on the document's vectors and how many vectors were changed.
+        """
+        results = self.collection.get(
+            where={"document_id": document_id},
+            include=["metadatas"]
+        )
+        if not results['ids']:
+            return set(), 0
+        
+        query = db.query(DocumentChunk).filter(DocumentChunk.embedding_id.in_(results['ids']))
+        if not keep_own_chunks:
+            query = query.filter(DocumentChunk.document_id != document_id)
+        
+        references: Dict[str, List[DocumentChunk]] = {}
+        for chunk in query.order_by(DocumentChunk.id).all():
+            references.setdefault(chunk.embedding_id, []).append(chunk)
+        
+        doomed = []
+        update_ids = []
+        update_metadatas = []
+        for chroma_id, metadata in zip(results['ids'], results['metadatas']):
+            referencing = references.get(chroma_id)
+            if not referencing:
+                doomed.append(chroma_id)
+                continue
+            
+            described = next((chunk for chunk in referencing if chunk.id == metadata.get("chunk_id")), None)
+            if described is None:
+                # The chunk it describes is gone; hand the vector to a referencing chunk
+                described = referencing[0]
+            elif all(metadata.get(field) == getattr(described, field) for field in CHUNK_POSITION_FIELDS):
+                continue
+            
+            # Rehomed, or a kept chunk that moved within its document: metadata only
+            update_ids.append(chroma_id)
+            update_metadatas.append(self._chunk_metadata(
+                described,
+                metadata.get("content_hash") or self.content_hash(described.content),
+                metadata.get("user_id")
+            ))
+        
+        if update_ids:
+            self.collection.update(ids=update_ids, metadatas=update_metadatas)
+        if doomed:
+            self.collection.delete(ids=doomed)
+        
+        return {metadata.get("user_id") for metadata in results['metadatas']}, len(update_ids) + len(doomed)
+    
+    def export_snapshot(self, path: str, truncate_journal: bool = False) -> Dict[str, Any]:
+        """
+        Write the whole index (vectors, ids, chunk metadata) to a snapshot file
+        
+        Args:
+            path: Destination file
+            truncate_journal: Drop journal entries the snapshot already contains
+                (only once every replica has moved to this snapshot)
+        
+        Returns:
+            Snapshot header
+        """
+        # Read before paging: changes racing the export are replayed again, which is harmless
+        sequence = self.journal.last_sequence() if self.journal else 0
+        header = IndexSnapshot.write(
+            self._store(), path, self.embedding_service.embedding_dim, journal_sequence=sequence
+        )
+        if truncate_journal and self.journal:
+            self.journal.truncate(sequence)
+        return header
+    
+    def restore_snapshot(self, path: str) -> Dict[str, int]:
+        """
+        Load a snapshot into the index and replay journaled changes made after it
+        
+        Args:
+            path: Snapshot written by export_snapshot
+        
+        Returns:
+            Counts of restored vectors and replayed changes
+        """
+        snapshot = IndexSnapshot(path)
+        if snapshot.embedding_dim != self.embedding_service.embedding_dim:
+            raise ValueError(
+                f"Snapshot has {snapshot.embedding_dim}-dim vectors, model produces {self.embedding_service.embedding_dim}"
+            )
+        
+        store = self._store()
+        restored = snapshot.restore_into(store)
+        replayed = self.journal.replay(store, snapshot.journal_sequence) if self.journal else 0
+        if self.retrieval_cache:
+            self.retrieval_cache.clear()
+        
+        print(f"✅ Restored {restored} embeddings from {path} and replayed {replayed} journaled changes")
+        return {"restored": restored, "replayed": replayed}
+    
+    def _store(self):
+        """Underlying collection, bypassing the change journal"""
+        return self.collection.collection if isinstance(self.collection, JournaledCollection) else self.collection
+    
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector database"""
         try:
             count = self.collection.count()
             return {
                 "total_embeddings": count,
+                "backend": self.backend,
                 "collection_name": self.collection.name,
                 "embedding_dimension": self.embedding_service.embedding_dim,
-                "embedding_provider": self.embedding_service.provider
+                "embedding_provider": self.embedding_service.provider,
+                "embedding_cache": self.embedding_service.get_cache_stats(),
+                "query_batcher": self.embedding_service.get_batcher_stats(),
+                "lexical_index": self.lexical_index.get_stats(),
+                "reranker": self.reranker.get_stats(),
+                "retrieval_cache": self.retrieval_cache.get_stats() if self.retrieval_cache else None,
+                "index": self.collection.get_index_stats() if self.backend == "ivf" else None,
+                "memory": self.collection.get_memory_stats() if self.backend == "flat" else None,
+                "journal_sequence": self.journal.last_sequence() if self.journal else None
             }
         except Exception as e:
             print(f"Error getting collection stats: {e}")
@@ -0,0 +1,48 @@
+import sys
+sys.path.append('.')
+
+import zlib
+from contextlib import contextmanager
+import numpy as np
+import pytest
+from app.services.model_registry import model_registry
+
+class TextSeededModel:
+    """Deterministic stand-in encoder: each text gets its own pseudo-random vector"""
+
+    tokenizer = None
+    max_seq_length = 256
+
+    def get_sentence_embedding_dimension(self):
+        return 384
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        return np.stack([
+            np.random.default_rng(zlib.crc32(text.encode())).standard_normal(384).astype(np.float32) for text in texts
+        ])
+
+@contextmanager
+def stub_embedding_models():
+    """
+    Run with TextSeededModel as the process's embedding model
+
+    The registry is cleared before and after, so no real model loads and nothing
+    registered here (shared caches and indexes included) outlives the test.
+    """
+    from app.services.embedding_service import EmbeddingService
+
+    model_registry.clear()
+    model_registry.get("sentence_transformers:all-MiniLM-L6-v2", TextSeededModel)
+    model_registry.get(
+        "embedding_service:sentence_transformers",
+        lambda: EmbeddingService(cache_dir=None, query_batching=False)
+    )
+    try:
+        yield
+    finally:
+        model_registry.clear()
+
+@pytest.fixture
+def stub_models():
+    with stub_embedding_models():
+        yield
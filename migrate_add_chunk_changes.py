@@ -0,0 +1,23 @@
+import sys
+sys.path.append('.')
+
+from sqlalchemy import text
+from app.database import engine
+from app.models.chunk import CHUNK_CHANGES_DDL
+
+def create_chunk_changes():
+    """Create the document_chunk_changes log and its triggers, seeded with every existing chunk"""
+    if engine.dialect.name != "sqlite":
+        print("❌ Chunk change log requires SQLite triggers; nothing to do")
+        return
+
+    print("Creating document_chunk_changes log...")
+    with engine.begin() as connection:
+        for statement in CHUNK_CHANGES_DDL:
+            connection.execute(text(statement))
+        connection.execute(text("INSERT OR IGNORE INTO document_chunk_changes(chunk_id) SELECT id FROM document_chunks"))
+        count = connection.execute(text("SELECT COUNT(*) FROM document_chunk_changes")).scalar()
+    print(f"✅ Chunk change log ready ({count} chunks logged)")
+
+if __name__ == "__main__":
+    create_chunk_changes()
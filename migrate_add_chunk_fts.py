@@ -0,0 +1,24 @@
+import sys
+sys.path.append('.')
+
+from sqlalchemy import text
+from app.database import engine
+from app.models.chunk import CHUNK_FTS_DDL
+
+def create_chunk_fts():
+    """Create the document_chunks_fts index and its sync triggers, then index existing chunks"""
+    if engine.dialect.name != "sqlite":
+        print("❌ Full-text index requires SQLite (FTS5); nothing to do")
+        return
+
+    print("Creating document_chunks_fts index...")
+    with engine.begin() as connection:
+        for statement in CHUNK_FTS_DDL:
+            connection.execute(text(statement))
+        # Re-read every row of the content table into the index
+        connection.execute(text("INSERT INTO document_chunks_fts(document_chunks_fts) VALUES ('rebuild')"))
+        count = connection.execute(text("SELECT COUNT(*) FROM document_chunks")).scalar()
+    print(f"✅ Full-text index ready ({count} chunks indexed)")
+
+if __name__ == "__main__":
+    create_chunk_fts()
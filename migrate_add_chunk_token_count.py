@@ -0,0 +1,47 @@
+import sys
+sys.path.append('.')
+
+from sqlalchemy import inspect, text
+from app.database import engine
+from app.services.token_counter import TokenCounter
+
+def add_chunk_token_count(batch_size: int = 500):
+    """Add document_chunks.token_count, then count tokens of existing chunks"""
+    columns = {column["name"] for column in inspect(engine).get_columns("document_chunks")}
+    if "token_count" not in columns:
+        print("Adding document_chunks.token_count column...")
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE document_chunks ADD COLUMN token_count INTEGER"))
+
+    counter = TokenCounter.shared()
+    budget = counter.max_seq_length - 2
+    counted = 0
+    truncated = 0
+    last_id = 0
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                text(
+                    "SELECT id, content FROM document_chunks "
+                    "WHERE token_count IS NULL AND id > :last_id ORDER BY id LIMIT :limit"
+                ),
+                {"last_id": last_id, "limit": batch_size}
+            ).all()
+            if not rows:
+                break
+
+            counts = counter.count([row.content for row in rows])
+            connection.execute(
+                text("UPDATE document_chunks SET token_count = :count WHERE id = :id"),
+                [{"id": row.id, "count": count} for row, count in zip(rows, counts)]
+            )
+        counted += len(rows)
+        truncated += sum(1 for count in counts if count > budget)
+        last_id = rows[-1].id
+
+    print(f"✅ Token counts recorded for {counted} chunks")
+    if truncated:
+        print(f"   {truncated} chunks exceed the model's {budget}-token limit; re-chunk them with TextChunker(max_tokens=...)")
+
+if __name__ == "__main__":
+    add_chunk_token_count()
@@ -0,0 +1,24 @@
+import sys
+sys.path.append('.')
+
+import argparse
+from app.database import SessionLocal
+from app.services.vector_database import VectorDatabase
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add user_id metadata to embeddings indexed before tenant-filtered search")
+    parser.add_argument("--backend", default=None, help="chroma, flat or ivf (defaults to VECTOR_BACKEND)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    vector_db = VectorDatabase(backend=args.backend)
+    db = SessionLocal()
+    try:
+        vector_db.backfill_owner_metadata(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
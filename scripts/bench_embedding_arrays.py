@@ -0,0 +1,100 @@
+import sys
+sys.path.append('.')
+
+import os
+import time
+import tempfile
+import tracemalloc
+import numpy as np
+
+NUM_CHUNKS = int(os.getenv("BENCH_CHUNKS", "10000"))
+EMBEDDING_DIM = 384
+
+# Throwaway database and index so the end-to-end run never touches real data
+_workdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/bench.db"
+
+from app.database import Base, engine, SessionLocal, User, Document
+from app.models.chunk import DocumentChunk
+from app.services.model_registry import model_registry
+from app.services.embedding_service import EmbeddingService
+from app.services.vector_database import VectorDatabase
+
+
+class PrecomputedModel:
+    """Encoder stand-in returning rows of a fixed matrix, so only our own conversion code is timed"""
+
+    tokenizer = None
+    max_seq_length = 256
+
+    def __init__(self):
+        self.matrix = np.random.default_rng(0).standard_normal((NUM_CHUNKS, EMBEDDING_DIM)).astype(np.float32)
+        self.offset = 0
+
+    def get_sentence_embedding_dimension(self):
+        return EMBEDDING_DIM
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        rows = np.arange(self.offset, self.offset + len(texts)) % NUM_CHUNKS
+        self.offset += len(texts)
+        return self.matrix[rows]
+
+
+def measure(label, fn):
+    """Run fn once, reporting wall time and peak traced allocation"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<45} {elapsed * 1000:>9.1f} ms {peak / 1024 / 1024:>9.1f} MiB")
+    return result
+
+
+def main():
+    print(f"Embedding batch: {NUM_CHUNKS} chunks x {EMBEDDING_DIM} dims\n")
+    print(f"{'step':<45} {'time':>12} {'peak':>13}")
+
+    # Registered under the keys EmbeddingService and VectorDatabase look up
+    model_registry.get("sentence_transformers:all-MiniLM-L6-v2", PrecomputedModel)
+    service = model_registry.get(
+        "embedding_service:sentence_transformers",
+        lambda: EmbeddingService(cache_dir=None, query_batching=False)
+    )
+    texts = [f"chunk {i} about retrieval augmented generation" for i in range(NUM_CHUNKS)]
+
+    # Old API: nested Python lists of floats
+    measure("generate_embeddings_batch (lists)", lambda: service.generate_embeddings_batch(texts))
+
+    # New API: one contiguous float32 block
+    embeddings = measure("generate_embeddings_array (float32)", lambda: service.generate_embeddings_array(texts))
+
+    # End to end: embed, upsert into the flat index and commit embedding ids
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(username="bench", email="bench@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    document = Document(filename="bench.txt", content="", user_id=user.id)
+    db.add(document)
+    db.commit()
+    chunks = [
+        DocumentChunk(
+            document_id=document.id, chunk_index=i, content=text,
+            chunk_size=len(text), start_position=0, end_position=len(text)
+        )
+        for i, text in enumerate(texts)
+    ]
+    db.add_all(chunks)
+    db.commit()
+
+    vector_db = VectorDatabase(backend="flat", index_directory=os.path.join(_workdir, "index"))
+    successful, failed = measure("add_chunks_batch (flat backend, end to end)", lambda: vector_db.add_chunks_batch(chunks, db))
+    db.close()
+
+    print(f"\nfloat32 block size: {embeddings.nbytes / 1024 / 1024:.1f} MiB, indexed {successful} chunks ({failed} failed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import sys
+sys.path.append('.')
+
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+from app.services.flat_index import FlatVectorStore
+
+EMBEDDING_DIM = 384
+
+
+def load_vectors(args):
+    """Vectors from an existing flat index, or a clustered synthetic corpus shaped like chunk embeddings"""
+    if args.index_directory:
+        source = FlatVectorStore(args.index_directory, EMBEDDING_DIM)
+        vectors = np.asarray(source.get(include=["embeddings"])["embeddings"], dtype=np.float32)
+        source.close()
+        return vectors
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((args.num_chunks // 50 + 1, EMBEDDING_DIM)).astype(np.float32)
+    assignments = rng.integers(0, len(centers), args.num_chunks)
+    return centers[assignments] + 0.6 * rng.standard_normal((args.num_chunks, EMBEDDING_DIM)).astype(np.float32)
+
+
+def run(label, directory, vectors, queries, k, baseline=None, **kwargs):
+    store = FlatVectorStore(directory, EMBEDDING_DIM, **kwargs)
+    ids = [f"chunk_{i}" for i in range(len(vectors))]
+    for start in range(0, len(vectors), 5000):
+        store.add(ids=ids[start:start + 5000], embeddings=vectors[start:start + 5000])
+
+    store.query(query_embeddings=queries[:1], n_results=k)
+    start = time.perf_counter()
+    results = [store.query(query_embeddings=query[None, :], n_results=k)["ids"][0] for query in queries]
+    latency = (time.perf_counter() - start) * 1000 / len(queries)
+
+    recall = 1.0
+    if baseline is not None:
+        recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(results, baseline)])
+
+    memory = store.get_memory_stats()
+    print(
+        f"{label:<22} {recall:>9.3f} {latency:>9.2f} ms "
+        f"{memory['resident_scan_bytes'] / 1024 / 1024:>10.1f} MiB {memory['full_precision_bytes'] / 1024 / 1024:>10.1f} MiB"
+    )
+    store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k and memory of quantized flat-index search vs exact float32 search")
+    parser.add_argument("--index-directory", default=None, help="Existing flat index to read vectors from")
+    parser.add_argument("--num-chunks", type=int, default=50_000)
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5, help="Results per query (search_similar_chunks default limit)")
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    args = parser.parse_args()
+
+    vectors = load_vectors(args)
+    rng = np.random.default_rng(1)
+    sample = rng.choice(len(vectors), min(args.num_queries, len(vectors)), replace=False)
+    queries = vectors[sample] + 0.3 * rng.standard_normal((len(sample), EMBEDDING_DIM)).astype(np.float32)
+
+    print(f"Corpus: {len(vectors)} chunks x {EMBEDDING_DIM} dims, {len(queries)} queries, k={args.k}\n")
+    print(f"{'mode':<22} {'recall@k':>9} {'latency':>12} {'RAM scanned':>14} {'on disk f32':>14}")
+
+    directory = tempfile.mkdtemp()
+    try:
+        # Exact float32 search ranks the same way search_similar_chunks does today
+        baseline = run("float32 (exact)", f"{directory}/f32", vectors, queries, args.k)
+        for quantization in ("float16", "int8"):
+            run(f"{quantization} + rescore x{args.rescore_factor}", f"{directory}/{quantization}", vectors, queries,
+                args.k, baseline, quantization=quantization, rescore_factor=args.rescore_factor)
+        run("int8, no rescore", f"{directory}/int8_raw", vectors, queries,
+            args.k, baseline, quantization="int8", rescore_factor=1)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import sys
+sys.path.append('.')
+
+import os
+import argparse
+
+PARITY_TEXTS = [
+    "What is retrieval augmented generation?",
+    "Vector databases store embeddings for similarity search.",
+    "The quick brown fox jumps over the lazy dog.",
+    "Error code E1042: connection to the upstream service timed out after 30 seconds.",
+    "Chunks overlap by two hundred characters so sentences are not cut in half.",
+    "short",
+    "A much longer passage of text " * 40,
+]
+
+
+def export_model(model_name: str, output_dir: str, quantize: bool = True, opset: int = 14):
+    """Export the transformer behind a sentence-transformers model to ONNX"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    # Pooling and normalization run in NumPy, so only token embeddings are exported
+    dummy = tokenizer(["export the embedding model"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    model_path = os.path.join(output_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(dummy[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+    tokenizer.save_pretrained(output_dir)
+    print(f"✅ Exported {model_name} to {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        quantized_path = os.path.join(output_dir, "model_quantized.onnx")
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        print(f"✅ Wrote int8 model to {quantized_path}")
+
+
+def run_parity_check(model_name: str, output_dir: str, quantized: bool, min_cosine: float) -> bool:
+    """Compare the exported model against the torch SentenceTransformer"""
+    from sentence_transformers import SentenceTransformer
+    from app.services.onnx_embedding import OnnxSentenceEncoder, check_parity
+
+    reference = SentenceTransformer(model_name)
+    encoder = OnnxSentenceEncoder(output_dir, quantized=quantized, max_seq_length=reference.max_seq_length)
+
+    result = check_parity(encoder, reference, PARITY_TEXTS, min_cosine=min_cosine)
+    status = "✅" if result["passed"] else "❌"
+    print(
+        f"{status} Parity ({os.path.basename(encoder.model_path)}): "
+        f"min cosine {result['min_cosine']:.5f}, mean {result['mean_cosine']:.5f}, "
+        f"threshold {min_cosine}"
+    )
+    return result["passed"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export all-MiniLM-L6-v2 to ONNX for the 'onnx' embedding provider")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--output-dir", default="data/onnx/all-MiniLM-L6-v2")
+    parser.add_argument("--no-quantize", action="store_true", help="Skip writing the int8 model")
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--check-only", action="store_true", help="Only run the parity check")
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Lowest acceptable cosine vs. torch")
+    args = parser.parse_args()
+
+    if not args.check_only:
+        export_model(args.model, args.output_dir, quantize=not args.no_quantize, opset=args.opset)
+
+    passed = run_parity_check(args.model, args.output_dir, quantized=False, min_cosine=args.min_cosine)
+    if not args.no_quantize:
+        passed = run_parity_check(args.model, args.output_dir, quantized=True, min_cosine=args.min_cosine) and passed
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import sys
+sys.path.append('.')
+
+import argparse
+from app.services.vector_database import VectorDatabase
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or restore a binary snapshot of the vector index")
+    parser.add_argument("action", choices=["export", "restore"])
+    parser.add_argument("path", help="Snapshot file")
+    parser.add_argument("--backend", default=None, help="chroma, flat or ivf (defaults to VECTOR_BACKEND)")
+    parser.add_argument("--truncate-journal", action="store_true", help="Drop journal entries covered by the export")
+    args = parser.parse_args()
+
+    vector_db = VectorDatabase(backend=args.backend)
+    if args.action == "export":
+        header = vector_db.export_snapshot(args.path, truncate_journal=args.truncate_journal)
+        print(f"Snapshot at journal sequence {header['journal_sequence']}: {header['count']} vectors")
+    else:
+        stats = vector_db.restore_snapshot(args.path)
+        print(f"Restored {stats['restored']} vectors, replayed {stats['replayed']} changes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import sys
+sys.path.append('.')
+
+import shutil
+import tempfile
+import numpy as np
+from app.services.ann_index import PartitionedIVFStore
+from app.services.similarity import normalize_rows, top_k
+
+def test_ann_index():
+    print("Testing Partitioned IVF Store...")
+
+    directory = tempfile.mkdtemp()
+    rng = np.random.default_rng(3)
+
+    # Clustered data so IVF has structure to exploit
+    centers = rng.standard_normal((40, 32)).astype(np.float32)
+    vectors = (centers[rng.integers(0, 40, 3000)] + 0.3 * rng.standard_normal((3000, 32))).astype(np.float32)
+    users = np.where(np.arange(3000) < 2500, 1, 2)
+    ids = [f"chunk_{i}" for i in range(3000)]
+    metadatas = [{"chunk_id": i, "document_id": i // 10, "user_id": int(users[i])} for i in range(3000)]
+
+    try:
+        store = PartitionedIVFStore(directory, 32, nprobe=8, train_threshold=1000)
+
+        # Insert incrementally; user 1 crosses the training threshold part-way through
+        for start in range(0, 3000, 500):
+            store.add(
+                ids=ids[start:start + 500],
+                embeddings=vectors[start:start + 500],
+                metadatas=metadatas[start:start + 500]
+            )
+        stats = store.get_index_stats()
+        assert stats["partitions"] == 2
+        assert stats["trained_partitions"] == 1
+        print(f"✅ {stats['partitions']} partitions, {stats['total_lists']} inverted lists")
+
+        # Queries only return the requested tenant's rows
+        queries = vectors[rng.integers(0, 3000, 50)] + 0.1 * rng.standard_normal((50, 32)).astype(np.float32)
+        for user_id in (1, 2):
+            results = store.query(query_embeddings=queries[:5], n_results=10, where={"user_id": user_id})
+            assert all(m["user_id"] == user_id for row in results["metadatas"] for m in row)
+        print("✅ Search confined to the tenant's partition")
+
+        # Recall against exact search within user 1
+        user_rows = np.flatnonzero(users == 1)
+        exact = top_k(normalize_rows(queries) @ normalize_rows(vectors[user_rows]).T, 10)[0]
+
+        def recall(nprobe):
+            results = store.query(query_embeddings=queries, n_results=10, where={"user_id": 1}, nprobe=nprobe)
+            hits = 0
+            for found, expected in zip(results["ids"], exact):
+                hits += len(set(found) & {ids[user_rows[i]] for i in expected})
+            return hits / (len(queries) * 10)
+
+        low, high = recall(1), recall(stats["total_lists"])
+        assert high == 1.0
+        assert recall(8) >= 0.9
+        assert low <= recall(8)
+        print(f"✅ Recall@10: nprobe=1 {low:.2f}, nprobe=8 {recall(8):.2f}, all lists {high:.2f}")
+
+        # Deletes and persistence
+        store.delete(where={"document_id": 0})
+        assert "chunk_0" not in store.query(query_embeddings=vectors[:1], n_results=5, where={"user_id": 1})["ids"][0]
+        store.close()
+
+        store = PartitionedIVFStore(directory, 32, nprobe=8, train_threshold=1000)
+        assert store.count() == 2990
+        assert store.get_index_stats()["trained_partitions"] == 1
+        assert recall(8) >= 0.9
+        print("✅ Deletes, centroids and lists survive reopening")
+
+        # Moving a row to another tenant moves it between partitions
+        store.update(ids=["chunk_11"], metadatas=[{"chunk_id": 11, "document_id": 1, "user_id": 2}])
+        results = store.query(query_embeddings=vectors[11:12], n_results=1, where={"user_id": 2})
+        assert results["ids"][0] == ["chunk_11"]
+        print("✅ Metadata updates re-partition rows")
+
+        # Exclusion filters on the partition key search every partition but still filter rows
+        for where in ({"user_id": {"$ne": 1}}, {"user_id": {"$nin": [1]}}):
+            results = store.query(query_embeddings=vectors[:5], n_results=5, where=where)
+            assert all(metadata["user_id"] == 2 for hits in results["metadatas"] for metadata in hits)
+            assert all(len(hits) == 5 for hits in results["ids"])
+        results = store.query(query_embeddings=vectors[:5], n_results=5, where={"user_id": {"$in": [2]}})
+        assert all(metadata["user_id"] == 2 for hits in results["metadatas"] for metadata in hits)
+        print("✅ $ne and $nin on the partition key never return the excluded user")
+        store.close()
+
+    finally:
+        shutil.rmtree(directory)
+
+    print("\n🎉 Partitioned IVF store working correctly!")
+
+if __name__ == "__main__":
+    test_ann_index()
@@ -0,0 +1,159 @@
+import sys
+sys.path.append('.')
+
+import shutil
+import tempfile
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, User, Document
+from app.models.chunk import DocumentChunk
+from app.services.vector_database import VectorDatabase
+
+def add_document(db, user, texts):
+    document = Document(filename=f"{user.username}.txt", content="", user_id=user.id)
+    db.add(document)
+    db.commit()
+    chunks = [
+        DocumentChunk(document_id=document.id, chunk_index=i, content=text, chunk_size=len(text),
+                      start_position=0, end_position=len(text))
+        for i, text in enumerate(texts)
+    ]
+    db.add_all(chunks)
+    db.commit()
+    return chunks
+
+def make_corpus(directory):
+    """Two users with corpora of very different sizes, indexed in a flat store"""
+    engine = create_engine(f"sqlite:///{directory}/batch.db")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    alice = User(username="alice", email="alice@example.com", hashed_password="x")
+    bob = User(username="bob", email="bob@example.com", hashed_password="x")
+    db.add_all([alice, bob])
+    db.commit()
+    alice_chunks = add_document(db, alice, [f"alice's design note number {i}" for i in range(30)])
+    bob_chunks = add_document(db, bob, ["bob's travel plan", "bob's grocery list", "bob's reading list"])
+
+    vector_db = VectorDatabase(backend="flat", index_directory=f"{directory}/index")
+    vector_db.add_chunks_batch(alice_chunks + bob_chunks, db)
+    return engine, db, vector_db, alice, bob, alice_chunks, bob_chunks
+
+def one_by_one(vector_db, queries, db, similarity_threshold):
+    vector_db.retrieval_cache.clear()
+    return [
+        vector_db.search_similar_chunks(
+            item["query"], item["user_id"], db, limit=item.get("limit", 5), similarity_threshold=similarity_threshold
+        )
+        for item in queries
+    ]
+
+def assert_same_hits(batched, single):
+    assert len(batched) == len(single)
+    for batch_hits, single_hits in zip(batched, single):
+        assert [hit["chunk_id"] for hit in batch_hits] == [hit["chunk_id"] for hit in single_hits]
+        for batch_hit, single_hit in zip(batch_hits, single_hits):
+            assert abs(batch_hit["similarity"] - single_hit["similarity"]) < 1e-5
+
+@pytest.mark.usefixtures("stub_models")
+def test_batch_search():
+    print("Testing Batched Search...")
+
+    directory = tempfile.mkdtemp()
+    engine, db, vector_db, alice, bob, alice_chunks, bob_chunks = make_corpus(directory)
+
+    try:
+        queries = [
+            {"query": alice_chunks[3].content, "user_id": alice.id, "limit": 5},
+            {"query": bob_chunks[1].content, "user_id": bob.id, "limit": 2},
+            {"query": "", "user_id": alice.id, "limit": 5},
+            {"query": bob_chunks[0].content, "user_id": alice.id, "limit": 1},
+            {"query": "   ", "user_id": bob.id},
+            {"query": alice_chunks[7].content, "user_id": bob.id, "limit": 10},
+            {"query": alice_chunks[3].content, "user_id": alice.id, "limit": 5},
+        ]
+
+        for threshold in (-1.0, 0.5):
+            vector_db.retrieval_cache.clear()
+            batched = vector_db.search_similar_chunks_batch(queries, similarity_threshold=threshold)
+            assert_same_hits(batched, one_by_one(vector_db, queries, db, threshold))
+
+            assert batched[2] == [] and batched[4] == []
+            assert batched[0][0]["chunk_id"] == alice_chunks[3].id
+            bob_ids = {chunk.id for chunk in bob_chunks}
+            assert all(hit["chunk_id"] in bob_ids for i in (1, 4, 5) for hit in batched[i])
+        assert len(batched[5]) == 0 and len(one_by_one(vector_db, queries[5:6], db, -1.0)[0]) == 3
+        print("✅ Batched results equal one search per query (mixed users, blank queries, thresholds)")
+
+        # Cached batch entries are served again without changing the answer
+        vector_db.retrieval_cache.clear()
+        batched = vector_db.search_similar_chunks_batch(queries, similarity_threshold=0.5)
+        hits = vector_db.retrieval_cache.get_stats()["hits"]
+        assert_same_hits(vector_db.search_similar_chunks_batch(queries, similarity_threshold=0.5), batched)
+        assert vector_db.retrieval_cache.get_stats()["hits"] > hits
+        print("✅ Repeated batch served from the retrieval cache")
+
+    finally:
+        db.close()
+        engine.dispose()
+        shutil.rmtree(directory)
+
+    print("\n🎉 Batched search working correctly!")
+
+@pytest.mark.usefixtures("stub_models")
+def test_batch_search_endpoint():
+    pytest.importorskip("jwt")
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.database import get_db
+    from app.routers import search
+    from app.routers.auth import get_current_user
+
+    print("Testing POST /api/search/batch...")
+
+    directory = tempfile.mkdtemp()
+    engine, db, vector_db, alice, bob, alice_chunks, bob_chunks = make_corpus(directory)
+
+    app = FastAPI()
+    app.include_router(search.router, prefix="/api/search")
+    app.dependency_overrides[get_current_user] = lambda: bob
+    app.dependency_overrides[get_db] = lambda: db
+    previous, search._vector_db = search._vector_db, vector_db
+
+    try:
+        client = TestClient(app)
+        queries = [
+            {"query": bob_chunks[2].content, "limit": 2},
+            {"query": alice_chunks[0].content, "limit": 10},
+            {"query": "", "limit": 3},
+        ]
+        response = client.post("/api/search/batch", json={"queries": queries, "similarity_threshold": -1.0})
+        assert response.status_code == 200
+        results = response.json()["results"]
+
+        single = one_by_one(vector_db, [dict(item, user_id=bob.id) for item in queries], db, -1.0)
+        assert [[hit["chunk_id"] for hit in hits] for hits in results] == [[hit["chunk_id"] for hit in hits] for hits in single]
+        assert results[0][0]["chunk_id"] == bob_chunks[2].id
+        assert len(results[1]) == 3 and results[2] == []
+        print("✅ Endpoint answers for the current user only, matching single searches")
+
+        too_many = {"queries": [{"query": "q"}] * (search.MAX_BATCH_QUERIES + 1)}
+        assert client.post("/api/search/batch", json=too_many).status_code == 400
+        assert client.post("/api/search/batch", json={"queries": [{"query": "q", "limit": 0}]}).status_code == 400
+        print("✅ Oversized batches and bad limits rejected")
+
+    finally:
+        search._vector_db = previous
+        db.close()
+        engine.dispose()
+        shutil.rmtree(directory)
+
+    print("\n🎉 Batch search endpoint working correctly!")
+
+if __name__ == "__main__":
+    from conftest import stub_embedding_models
+    with stub_embedding_models():
+        test_batch_search()
+    with stub_embedding_models():
+        test_batch_search_endpoint()
@@ -0,0 +1,78 @@
+import sys
+sys.path.append('.')
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, Document, User
+from app.models.chunk import DocumentChunk
+from app.services.text_chunker import TextChunker
+
+def test_chunk_fts():
+    print("Testing Chunk Full-Text Search...")
+
+    # Fresh in-memory database so create_all also creates the FTS table and triggers
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    chunker = TextChunker()
+
+    try:
+        users = [User(username=name, email=f"{name}@example.com", hashed_password="x") for name in ("fts_a", "fts_b")]
+        db.add_all(users)
+        db.commit()
+
+        def add_document(user, texts):
+            document = Document(filename="notes.txt", content=" ".join(texts), user_id=user.id)
+            db.add(document)
+            db.commit()
+            chunks = [
+                DocumentChunk(document_id=document.id, chunk_index=i, content=text, chunk_size=len(text), start_position=0, end_position=len(text))
+                for i, text in enumerate(texts)
+            ]
+            db.add_all(chunks)
+            db.commit()
+            return document, chunks
+
+        document, chunks = add_document(users[0], [
+            "The server returned error ZX4411 during upload.",
+            "Uploading large files is slow on weekends.",
+            "Cats sleep most of the day."
+        ])
+        add_document(users[1], ["Another tenant also saw ZX4411 while uploading."])
+
+        # Prefix matching, user scoping, bm25 ordering and snippets
+        results = chunker.search_chunks_by_content("upload", users[0].id, db)
+        assert {chunk.id for chunk in results} == {chunks[0].id, chunks[1].id}
+        assert results[0].search_score <= results[1].search_score
+        assert all("[" in chunk.search_snippet for chunk in results)
+        assert [chunk.id for chunk in chunker.search_chunks_by_content("zx4411", users[0].id, db)] == [chunks[0].id]
+        print("✅ Ranked, prefix-matching, user-scoped search with snippets")
+
+        # FTS operators in user input are treated as plain words
+        assert chunker.build_fts_query('error OR "cats') == '"error"* "OR"* "cats"*'
+        assert chunker.search_chunks_by_content('cats" (', users[0].id, db)[0].id == chunks[2].id
+        print("✅ Query text is escaped")
+
+        # Triggers keep the index in sync with updates and deletes
+        chunks[1].content = "Nothing relevant here."
+        db.commit()
+        assert [chunk.id for chunk in chunker.search_chunks_by_content("upload", users[0].id, db)] == [chunks[0].id]
+        chunker.process_document_chunks(document.id, "A brand new upload description.", db)
+        results = chunker.search_chunks_by_content("upload", users[0].id, db)
+        assert [chunk.content for chunk in results] == ["A brand new upload description."]
+        print("✅ Index follows inserts, updates and deletes")
+
+        # Re-processing unchanged text keeps the same rows
+        before = [chunk.id for chunk in chunker.get_document_chunks(document.id, db)]
+        after = [chunk.id for chunk in chunker.process_document_chunks(document.id, "A brand new upload description.", db)]
+        assert after == before
+        assert chunker.last_sync_stats == {"kept": 1, "added": 0, "removed": 0}
+        print("✅ Unchanged chunks are kept on re-processing")
+
+    finally:
+        db.close()
+
+    print("\n🎉 Chunk full-text search working correctly!")
+
+if __name__ == "__main__":
+    test_chunk_fts()
@@ -0,0 +1,78 @@
+import sys
+sys.path.append('.')
+
+import os
+import shutil
+import tempfile
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, User, Document
+from app.models.chunk import DocumentChunk
+from app.services.text_chunker import TextChunker
+from app.services.vector_database import VectorDatabase, CHUNK_POSITION_FIELDS
+
+@pytest.mark.usefixtures("stub_models")
+def test_document_resync():
+    print("Testing Document Re-sync...")
+
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{directory}/resync.db")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    try:
+        vector_db = VectorDatabase(backend="flat", index_directory=os.path.join(directory, "index"))
+        chunker = TextChunker(chunk_size=100, overlap=0)
+
+        user = User(username="resync", email="resync@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        document = Document(filename="notes.txt", content="", user_id=user.id)
+        db.add(document)
+        db.commit()
+
+        # One sentence per chunk
+        sentences = [f"Sentence number {i} talks about topic {i * 7} in some considerable detail here." for i in range(12)]
+        chunker.process_document_chunks(document.id, " ".join(sentences), db)
+        assert vector_db.sync_document_embeddings(document.id, db) == (12, 0)
+        print("✅ Initial sync indexes every chunk")
+
+        # Insert a sentence and reword a later one: every chunk after the insert moves
+        edited = sentences[:4] + ["A new sentence inserted in the middle shifts every later chunk along."] + sentences[4:]
+        edited[9] = "Sentence number 8 now covers a different topic in some considerable detail."
+        chunker.process_document_chunks(document.id, " ".join(edited), db)
+        assert chunker.last_sync_stats == {"kept": 11, "added": 2, "removed": 1}
+
+        assert vector_db.sync_document_embeddings(document.id, db) == (2, 0)
+        assert vector_db.last_ingest_stats["embedded"] == 2
+        assert vector_db.collection.count() == 13
+        print("✅ Re-sync embeds only the new chunks and drops the reworded one")
+
+        chunks = db.query(DocumentChunk).filter(DocumentChunk.document_id == document.id).all()
+        stored = vector_db.collection.get(ids=[chunk.embedding_id for chunk in chunks], include=["metadatas"])
+        metadatas = dict(zip(stored["ids"], stored["metadatas"]))
+        for chunk in chunks:
+            metadata = metadatas[chunk.embedding_id]
+            assert metadata["chunk_id"] == chunk.id
+            for field in CHUNK_POSITION_FIELDS:
+                assert metadata[field] == getattr(chunk, field), (chunk.id, field)
+        print("✅ Vector metadata of moved chunks matches their rows")
+
+        # Search hits report the chunk's current position
+        hits = vector_db.search_similar_chunks(edited[11], user.id, db, limit=1)
+        assert hits[0]["chunk_index"] == 11
+        assert vector_db.sync_document_embeddings(document.id, db) == (0, 0)
+        print("✅ Search reports current positions and an unchanged re-sync is a no-op")
+
+    finally:
+        db.close()
+        engine.dispose()
+        shutil.rmtree(directory)
+
+    print("\n🎉 Document re-sync working correctly!")
+
+if __name__ == "__main__":
+    from conftest import stub_embedding_models
+    with stub_embedding_models():
+        test_document_resync()
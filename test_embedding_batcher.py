@@ -0,0 +1,64 @@
+import sys
+sys.path.append('.')
+
+import threading
+import numpy as np
+from app.services.embedding_batcher import EmbeddingBatcher
+
+def test_embedding_batcher():
+    print("Testing Embedding Batcher...")
+
+    calls = []
+
+    def fake_encode(texts):
+        calls.append(len(texts))
+        return np.array([[float(len(t)), float(i)] for i, t in enumerate(texts)], dtype=np.float32)
+
+    batcher = EmbeddingBatcher(fake_encode, max_batch_size=8, max_wait_ms=50)
+
+    # Fire 20 concurrent single-text requests
+    texts = ["x" * (i + 1) for i in range(20)]
+    results = [None] * len(texts)
+    start = threading.Barrier(len(texts))
+
+    def worker(i):
+        start.wait()
+        results[i] = batcher.embed(texts[i], timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Every caller gets the row for its own text
+    for text, vector in zip(texts, results):
+        assert vector[0] == len(text)
+
+    assert sum(calls) == len(texts)
+    assert max(calls) <= 8
+    assert len(calls) < len(texts)
+    print(f"✅ {len(texts)} requests served by {len(calls)} encoder calls: {calls}")
+
+    # Encoder failures propagate to every waiting caller
+    def failing_encode(texts):
+        raise RuntimeError("model unavailable")
+
+    failing = EmbeddingBatcher(failing_encode, max_wait_ms=1)
+    try:
+        failing.embed("hello", timeout=5)
+        assert False, "expected the encoder error to propagate"
+    except RuntimeError:
+        print("✅ Encoder errors propagate to callers")
+
+    stats = batcher.get_stats()
+    assert stats["requests"] == len(texts)
+    print(f"✅ Average batch size: {stats['average_batch_size']:.1f}")
+
+    batcher.close()
+    failing.close()
+
+    print("\n🎉 Embedding batcher working correctly!")
+
+if __name__ == "__main__":
+    test_embedding_batcher()
@@ -0,0 +1,55 @@
+import sys
+sys.path.append('.')
+
+import tempfile
+import numpy as np
+from app.services.embedding_cache import EmbeddingCache
+
+def test_embedding_cache():
+    print("Testing Embedding Cache...")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = EmbeddingCache(cache_dir, max_memory_items=2, max_disk_bytes=10 * 384 * 4)
+
+        # Keys are content addressed on provider + model + normalized text
+        key = EmbeddingCache.make_key("sentence_transformers", "all-MiniLM-L6-v2", "hello   world")
+        assert key == EmbeddingCache.make_key("sentence_transformers", "all-MiniLM-L6-v2", " hello world ")
+        assert key != EmbeddingCache.make_key("openai", "text-embedding-ada-002", "hello world")
+        print("✅ Cache keys normalize whitespace and include provider/model")
+
+        vector = np.arange(384, dtype=np.float32)
+        assert cache.get(key) is None
+        cache.put(key, vector)
+        assert np.array_equal(cache.get(key), vector)
+        print("✅ Put/get round trip")
+
+        # Memory tier is bounded, older entries are still served from disk
+        for i in range(5):
+            cache.put(f"key-{i}", np.full(384, i, dtype=np.float32))
+        assert cache.get_stats()["memory_items"] == 2
+        assert np.array_equal(cache.get(key), vector)
+        print("✅ LRU tier bounded, disk tier serves evicted entries")
+
+        # Disk tier evicts least recently used rows once over its byte budget
+        for i in range(5, 20):
+            cache.put(f"key-{i}", np.full(384, i, dtype=np.float32))
+        stats = cache.get_stats()
+        assert stats["disk_bytes"] <= cache.max_disk_bytes
+        assert stats["disk_evictions"] > 0
+        assert cache.get("key-19") is not None
+        print(f"✅ Disk eviction kept usage at {stats['disk_bytes']} bytes")
+
+        # Persistence across instances
+        cache.close()
+        reopened = EmbeddingCache(cache_dir)
+        assert reopened.get("key-19") is not None
+
+        stats = reopened.get_stats()
+        assert stats["disk_hits"] == 1
+        print(f"✅ Reopened cache: {stats['hits']} hits, {stats['misses']} misses")
+        reopened.close()
+
+    print("\n🎉 Embedding cache working correctly!")
+
+if __name__ == "__main__":
+    test_embedding_cache()
@@ -0,0 +1,121 @@
+import sys
+sys.path.append('.')
+
+import shutil
+import tempfile
+import numpy as np
+from app.services.flat_index import FlatVectorStore
+from app.services.similarity import normalize_rows
+
+def test_flat_index():
+    print("Testing Flat Vector Store...")
+
+    directory = tempfile.mkdtemp()
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((200, 16)).astype(np.float32)
+    ids = [f"chunk_{i}" for i in range(200)]
+    metadatas = [{"chunk_id": i, "document_id": i % 4} for i in range(200)]
+    documents = [f"document text {i}" for i in range(200)]
+
+    try:
+        store = FlatVectorStore(directory, 16)
+        store.add(ids=ids, embeddings=vectors, documents=documents, metadatas=metadatas)
+        assert store.count() == 200
+
+        # Exact top-k with Chroma-style squared L2 distances between unit vectors
+        results = store.query(query_embeddings=vectors[:2], n_results=5)
+        assert results["ids"][0][0] == "chunk_0"
+        assert results["ids"][1][0] == "chunk_1"
+        assert results["documents"][0][0] == "document text 0"
+        expected = 2 - 2 * (normalize_rows(vectors) @ normalize_rows(vectors[0])[0])
+        assert np.allclose(results["distances"][0], np.sort(expected)[:5], atol=1e-5)
+        print("✅ Exact search matches brute force")
+
+        # Metadata filters
+        results = store.query(query_embeddings=vectors[:1], n_results=10, where={"document_id": {"$in": [1, 2]}})
+        assert all(m["document_id"] in (1, 2) for m in results["metadatas"][0])
+        results = store.get(where={"$and": [{"document_id": 3}, {"chunk_id": {"$nin": [3, 7]}}]})
+        assert len(results["ids"]) == 48
+        print("✅ Where filters")
+
+        # Delete, update and re-add an existing id
+        store.delete(where={"document_id": 0})
+        assert store.count() == 150
+        assert store.query(query_embeddings=vectors[:1], n_results=1)["ids"][0][0] != "chunk_0"
+        store.update(ids=["chunk_1"], metadatas=[{"chunk_id": 1, "document_id": 9}])
+        store.add(ids=["chunk_2"], embeddings=vectors[:1], documents=["replaced"], metadatas=[{"chunk_id": 2, "document_id": 2}])
+        assert store.count() == 150
+        assert store.query(query_embeddings=vectors[:1], n_results=1)["ids"][0][0] == "chunk_2"
+        print("✅ Delete, update and replace")
+
+        # State survives reopening
+        store.close()
+        store = FlatVectorStore(directory, 16)
+        assert store.count() == 150
+        assert store.get(ids=["chunk_1"])["metadatas"][0]["document_id"] == 9
+        assert store.get(ids=["chunk_2"])["documents"] == ["replaced"]
+        print("✅ Reopened store keeps vectors, metadata and tombstones")
+
+        # Metadata stays in the sidecar; only fields used in filters are loaded, and kept current
+        assert store._columns == {}
+        assert len(store.get(where={"document_id": 9})["ids"]) == 1
+        assert list(store._columns) == ["document_id"]
+        store.update(ids=["chunk_3"], metadatas=[{"chunk_id": 3, "document_id": "archived"}])
+        store.add(ids=["chunk_200"], embeddings=vectors[:1], metadatas=[{"chunk_id": 200, "document_id": 9}])
+        assert store.get(where={"document_id": 9})["ids"] == ["chunk_1", "chunk_200"]
+        assert store.get(where={"document_id": "archived"})["metadatas"] == [{"chunk_id": 3, "document_id": "archived"}]
+        store.delete(ids=["chunk_200"])
+        store.update(ids=["chunk_3"], metadatas=[{"chunk_id": 3, "document_id": 3}])
+        print("✅ Filter columns load lazily and follow updates")
+
+        # Compaction drops tombstoned rows without changing results
+        before = store.query(query_embeddings=vectors[5:6], n_results=10)
+        store.compact()
+        after = store.query(query_embeddings=vectors[5:6], n_results=10)
+        assert store.count() == 150
+        assert store.get(include=["embeddings"])["embeddings"].shape == (150, 16)
+        assert before["ids"] == after["ids"]
+        assert before["metadatas"] == after["metadatas"] and before["documents"] == after["documents"]
+        assert len(store.get(where={"document_id": 3})["ids"]) == 50
+        store.close()
+        store = FlatVectorStore(directory, 16)
+        assert store.query(query_embeddings=vectors[5:6], n_results=10)["ids"] == before["ids"]
+        print("✅ Compaction")
+        store.close()
+
+    finally:
+        shutil.rmtree(directory)
+
+    # Quantized codes for the first pass, full-precision rescoring of the shortlist
+    vectors = rng.standard_normal((3000, 32)).astype(np.float32)
+    ids = [f"chunk_{i}" for i in range(3000)]
+    queries = vectors[:20] + 0.5 * rng.standard_normal((20, 32)).astype(np.float32)
+    exact = FlatVectorStore(tempfile.mkdtemp(), 32)
+    exact.add(ids=ids, embeddings=vectors)
+    expected = exact.query(query_embeddings=queries, n_results=10)
+    for quantization in ("int8", "float16"):
+        directory = tempfile.mkdtemp()
+        try:
+            store = FlatVectorStore(directory, 32, quantization=quantization)
+            for start in range(0, 3000, 500):
+                store.add(ids=ids[start:start + 500], embeddings=vectors[start:start + 500])
+            results = store.query(query_embeddings=queries, n_results=10)
+            recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(results["ids"], expected["ids"])])
+            assert recall >= 0.95
+            assert np.allclose(results["distances"][0][0], expected["distances"][0][0], atol=1e-5)
+            stats = store.get_memory_stats()
+            assert stats["code_bytes"] * (4 if quantization == "int8" else 2) == stats["full_precision_bytes"]
+
+            store.close()
+            store = FlatVectorStore(directory, 32, quantization=quantization)
+            assert store.query(query_embeddings=queries, n_results=10)["ids"] == results["ids"]
+            store.close()
+            print(f"✅ {quantization} codes: recall@10 {recall:.2f} at {stats['code_bytes'] // 1024} KiB scanned")
+        finally:
+            shutil.rmtree(directory)
+    shutil.rmtree(exact.directory)
+
+    print("\n🎉 Flat vector store working correctly!")
+
+if __name__ == "__main__":
+    test_flat_index()
@@ -0,0 +1,89 @@
+import sys
+sys.path.append('.')
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, User, Document
+from app.models.chunk import DocumentChunk
+from app.services.vector_database import VectorDatabase
+
+@pytest.mark.usefixtures("stub_models")
+def test_ingest_pipeline():
+    print("Testing Streaming Ingestion...")
+
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{directory}/ingest.db")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    try:
+        vector_db = VectorDatabase(backend="flat", index_directory=os.path.join(directory, "index"))
+        vector_db.ingest_batch_size = 16
+        vector_db.ingest_retries = 0
+
+        user = User(username="ingest", email="ingest@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        document = Document(filename="long.txt", content="", user_id=user.id)
+        db.add(document)
+        db.commit()
+        texts = [f"passage {i % 90} about streaming ingestion" for i in range(150)]
+        db.add_all([
+            DocumentChunk(document_id=document.id, chunk_index=i, content=text, chunk_size=len(text),
+                          start_position=0, end_position=len(text))
+            for i, text in enumerate(texts)
+        ])
+        db.commit()
+
+        # The third sub-batch write fails; the two before it stay committed
+        upsert = vector_db.collection.upsert
+        calls = []
+        def failing_upsert(**kwargs):
+            calls.append(len(kwargs["ids"]))
+            if len(calls) == 3:
+                raise RuntimeError("index unavailable")
+            return upsert(**kwargs)
+        vector_db.collection.upsert = failing_upsert
+
+        successful, failed = vector_db.sync_document_embeddings(document.id, db)
+        assert (successful, failed) == (32, 118)
+        assert db.query(DocumentChunk).filter(DocumentChunk.embedding_id.isnot(None)).count() == 32
+        print("✅ Failed sub-batch stops ingestion, earlier sub-batches stay committed")
+
+        # Re-syncing resumes after the last committed sub-batch
+        vector_db.collection.upsert = upsert
+        successful, failed = vector_db.sync_document_embeddings(document.id, db)
+        assert (successful, failed) == (118, 0)
+        assert vector_db.last_ingest_stats["batches"] == 8
+        assert vector_db.collection.count() == 90
+        assert vector_db.sync_document_embeddings(document.id, db) == (0, 0)
+        print("✅ Re-sync resumes from the failure and indexes each distinct passage once")
+
+        # Every chunk points at the vector of its own text
+        chunks = db.query(DocumentChunk).order_by(DocumentChunk.chunk_index).all()
+        stored = vector_db.collection.get(ids=[chunk.embedding_id for chunk in chunks], include=["embeddings", "documents"])
+        by_id = dict(zip(stored["ids"], zip(stored["documents"], stored["embeddings"])))
+        expected = vector_db.embedding_service.generate_embeddings_array([chunk.content for chunk in chunks])
+        expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+        for chunk, vector in zip(chunks, expected):
+            document_text, embedding = by_id[chunk.embedding_id]
+            assert document_text == chunk.content
+            assert np.dot(embedding, vector) > 0.9999
+        print("✅ Pipelined embedding keeps every row aligned with its chunk")
+
+    finally:
+        db.close()
+        engine.dispose()
+        shutil.rmtree(directory)
+
+    print("\n🎉 Streaming ingestion working correctly!")
+
+if __name__ == "__main__":
+    from conftest import stub_embedding_models
+    with stub_embedding_models():
+        test_ingest_pipeline()
@@ -0,0 +1,36 @@
+import sys
+sys.path.append('.')
+
+from app.services.length_bucketing import plan_length_buckets
+
+def test_length_bucketing():
+    print("Testing Length Bucketing...")
+
+    lengths = [5, 200, 12, 256, 7, 180, 30, 3, 256, 64]
+    buckets = plan_length_buckets(lengths, max_batch_size=3, max_padded_tokens=600)
+
+    # Every input lands in exactly one bucket
+    flat = sorted(i for bucket in buckets for i in bucket)
+    assert flat == list(range(len(lengths)))
+    print(f"✅ {len(lengths)} inputs planned into {len(buckets)} buckets")
+
+    for bucket in buckets:
+        longest = max(lengths[i] for i in bucket)
+        assert len(bucket) <= 3
+        assert len(bucket) * longest <= 600 or len(bucket) == 1
+    print("✅ Batch size and padded-token caps respected")
+
+    # Buckets are length homogeneous: longest inputs are grouped together
+    assert sorted(buckets[0]) == [3, 8]
+    assert all(lengths[i] <= 12 for i in buckets[-1])
+    print("✅ Inputs grouped by length")
+
+    # An input longer than the cap still gets encoded on its own
+    assert plan_length_buckets([1000, 10], max_padded_tokens=100) == [[0], [1]]
+    assert plan_length_buckets([]) == []
+    print("✅ Edge cases handled")
+
+    print("\n🎉 Length bucketing working correctly!")
+
+if __name__ == "__main__":
+    test_length_bucketing()
@@ -0,0 +1,60 @@
+import sys
+sys.path.append('.')
+
+from app.services.lexical_index import LexicalIndex, tokenize, reciprocal_rank_fusion
+
+def test_lexical_index():
+    print("Testing Lexical Index...")
+
+    assert tokenize("Error E1042-timeout in app.services") == [
+        "error", "e1042-timeout", "e1042", "timeout", "in", "app.services", "app", "services"
+    ]
+    print("✅ Tokenizer keeps identifiers whole and split")
+
+    index = LexicalIndex()
+    index.add_many([
+        (1, "The upload failed with error code E1042 after a timeout.", 10, 1),
+        (2, "Uploads are retried three times before giving up.", 10, 1),
+        (3, "Vector search uses cosine similarity over embeddings.", 11, 1),
+        (4, "Error E1042 is also documented for another tenant.", 12, 2),
+        (5, "Cosine similarity cosine similarity cosine similarity.", 11, 1),
+    ])
+
+    # Rare exact identifiers rank first and results respect the user filter
+    results = index.search("E1042", user_id=1)
+    assert [chunk_id for chunk_id, _ in results] == [1]
+    assert [chunk_id for chunk_id, _ in index.search("E1042")] in ([1, 4], [4, 1])
+    print("✅ Exact identifiers found, scoped to the user")
+
+    # Term frequency raises the score, with saturation
+    results = index.search("cosine similarity", user_id=1)
+    assert [chunk_id for chunk_id, _ in results] == [5, 3]
+    assert results[0][1] < 3 * results[1][1]
+    print("✅ BM25 ranking")
+
+    # Re-adding replaces, removal hides chunks
+    index.add(2, "Uploads use error code E1042 as well.", 10, 1)
+    assert {chunk_id for chunk_id, _ in index.search("E1042", user_id=1)} == {1, 2}
+    index.remove([1])
+    assert [chunk_id for chunk_id, _ in index.search("E1042", user_id=1)] == [2]
+    index.remove_document(11)
+    assert index.search("cosine", user_id=1) == []
+    print("✅ Incremental updates and deletes")
+
+    # Compaction drops dead postings without changing the ranking
+    before = [chunk_id for chunk_id, _ in index.search("error", user_id=None)]
+    index.compact()
+    stats = index.get_stats()
+    assert stats["slots"] == stats["chunks"] == 2
+    assert [chunk_id for chunk_id, _ in index.search("error", user_id=None)] == before
+    print(f"✅ Compaction ({stats['postings']} postings left)")
+
+    # Reciprocal rank fusion rewards agreement between rankings
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a", "d"]])
+    assert [key for key, _ in fused] == ["a", "c", "b", "d"]
+    print("✅ Reciprocal rank fusion")
+
+    print("\n🎉 Lexical index working correctly!")
+
+if __name__ == "__main__":
+    test_lexical_index()
@@ -0,0 +1,101 @@
+import sys
+sys.path.append('.')
+
+import os
+import shutil
+import tempfile
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, User, Document
+from app.models.chunk import DocumentChunk
+from app.services.vector_database import VectorDatabase
+
+def add_chunks(db, document, texts):
+    chunks = [
+        DocumentChunk(document_id=document.id, chunk_index=i, content=text, chunk_size=len(text),
+                      start_position=0, end_position=len(text))
+        for i, text in enumerate(texts)
+    ]
+    db.add_all(chunks)
+    db.commit()
+    return chunks
+
+def hit_ids(vector_db, query, user_id, db):
+    """Chunks the lexical leg of a fresh hybrid search finds for query"""
+    # Other processes' writes reach the retrieval cache only through its TTL; expire it here
+    vector_db.retrieval_cache.clear()
+    vector_db.hybrid_search_chunks(query, user_id, db, limit=5)
+    return {chunk_id for chunk_id, _ in vector_db.lexical_index.search(query, user_id, limit=10)}
+
+@pytest.mark.usefixtures("stub_models")
+def test_lexical_sync():
+    print("Testing Lexical Index Sync...")
+
+    directory = tempfile.mkdtemp()
+    database_url = f"sqlite:///{directory}/lexical.db"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    try:
+        index_directory = os.path.join(directory, "index")
+        searcher = VectorDatabase(backend="flat", index_directory=index_directory)
+        uploader = VectorDatabase(backend="flat", index_directory=index_directory)
+        uploader.collection = searcher.collection
+        assert searcher.lexical_index is uploader.lexical_index
+
+        user = User(username="lexical", email="lexical@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        document = Document(filename="runbook.txt", content="", user_id=user.id)
+        db.add(document)
+        db.commit()
+
+        uploader.add_chunks_batch(add_chunks(db, document, [f"routine runbook step {i}" for i in range(5)]), db)
+        assert len(hit_ids(searcher, "routine runbook", user.id, db)) == 5
+
+        # Ingested through the other instance after the index was built
+        late = add_chunks(db, document, ["Restart the worker when error E7731 appears."])[0]
+        uploader.add_chunks_batch([late], db)
+        assert late.id in hit_ids(searcher, "E7731", user.id, db)
+        print("✅ Chunks ingested through another instance are found")
+
+        # Written by another process: a separate connection that never touches the index
+        other = create_engine(database_url)
+        insert = text(
+            "INSERT INTO document_chunks (document_id, chunk_index, content, chunk_size, start_position, end_position) "
+            "VALUES (:document_id, 6, :content, 36, 0, 36)"
+        )
+        with other.begin() as connection:
+            connection.execute(insert, {"document_id": document.id, "content": "Rotate the ZZ1234 signing key yearly."})
+            foreign_id = connection.execute(text("SELECT MAX(id) FROM document_chunks")).scalar()
+        assert foreign_id in hit_ids(searcher, "ZZ1234", user.id, db)
+        print("✅ Chunks added by another process are picked up")
+
+        # Deleting the newest chunk and inserting another makes SQLite reuse its id
+        with other.begin() as connection:
+            connection.execute(text("DELETE FROM document_chunks WHERE id = :id"), {"id": foreign_id})
+            connection.execute(insert, {"document_id": document.id, "content": "Rotate the QQ9999 signing key daily."})
+            assert connection.execute(text("SELECT MAX(id) FROM document_chunks")).scalar() == foreign_id
+        assert hit_ids(searcher, "ZZ1234", user.id, db) == set()
+        assert hit_ids(searcher, "QQ9999", user.id, db) == {foreign_id}
+        print("✅ A reused chunk id is re-read, not mistaken for the old chunk")
+
+        with other.begin() as connection:
+            connection.execute(text("DELETE FROM document_chunks WHERE id = :id"), {"id": foreign_id})
+        assert hit_ids(searcher, "QQ9999", user.id, db) == set()
+        other.dispose()
+        print("✅ Chunks deleted by another process are dropped")
+
+    finally:
+        db.close()
+        engine.dispose()
+        shutil.rmtree(directory)
+
+    print("\n🎉 Lexical index sync working correctly!")
+
+if __name__ == "__main__":
+    from conftest import stub_embedding_models
+    with stub_embedding_models():
+        test_lexical_sync()
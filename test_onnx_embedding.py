@@ -0,0 +1,116 @@
+import sys
+sys.path.append('.')
+
+import os
+import shutil
+import zlib
+import tempfile
+import numpy as np
+import pytest
+from app.services.onnx_embedding import OnnxSentenceEncoder
+
+VOCAB_SIZE = 50
+EMBEDDING_DIM = 8
+PAD_ID = 0
+
+class WordTokenizer:
+    """Minimal stand-in for a fast tokenizer: one id per word, padded to the longest text"""
+
+    def ids(self, text):
+        return [1 + zlib.crc32(word.encode()) % (VOCAB_SIZE - 1) for word in text.split()]
+
+    def __call__(self, texts, padding=True, truncation=True, max_length=None, return_tensors="np"):
+        ids = [self.ids(text)[:max_length] if truncation else self.ids(text) for text in texts]
+        width = max(len(row) for row in ids)
+        input_ids = np.full((len(ids), width), PAD_ID, dtype=np.int64)
+        attention_mask = np.zeros((len(ids), width), dtype=np.int64)
+        for i, row in enumerate(ids):
+            input_ids[i, :len(row)] = row
+            attention_mask[i, :len(row)] = 1
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
+
+def write_lookup_model(path, table):
+    """ONNX graph whose last_hidden_state is a row lookup of input_ids in table"""
+    from onnx import helper, numpy_helper, TensorProto, save
+
+    inputs = [
+        helper.make_tensor_value_info(name, TensorProto.INT64, ["batch", "tokens"])
+        for name in ("input_ids", "attention_mask", "token_type_ids")
+    ]
+    output = helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "tokens", EMBEDDING_DIM])
+    # token_type_ids is part of the graph's signature like in BERT exports; adding 0 * it keeps it live
+    nodes = [
+        helper.make_node("Gather", ["table", "input_ids"], ["looked_up"]),
+        helper.make_node("Cast", ["token_type_ids"], ["token_types"], to=TensorProto.FLOAT),
+        helper.make_node("Unsqueeze", ["token_types", "last_axis"], ["token_types_3d"]),
+        helper.make_node("Mul", ["token_types_3d", "zero"], ["no_offset"]),
+        helper.make_node("Add", ["looked_up", "no_offset"], ["last_hidden_state"]),
+    ]
+    initializers = [
+        numpy_helper.from_array(table, "table"),
+        numpy_helper.from_array(np.asarray([-1], dtype=np.int64), "last_axis"),
+        numpy_helper.from_array(np.zeros(1, dtype=np.float32), "zero"),
+    ]
+    graph = helper.make_graph(nodes, "lookup", inputs, [output], initializers)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    save(model, path)
+
+def reference_embedding(tokenizer, table, text, max_length, normalize=True):
+    """Mean of the text's own token vectors, with no padding involved"""
+    pooled = table[tokenizer.ids(text)[:max_length]].mean(axis=0)
+    return pooled / np.linalg.norm(pooled) if normalize else pooled
+
+def test_onnx_embedding():
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    print("Testing ONNX Sentence Encoder...")
+
+    table = np.random.default_rng(0).standard_normal((VOCAB_SIZE, EMBEDDING_DIM)).astype(np.float32)
+    # A huge padding vector makes any leak through the attention mask obvious
+    table[PAD_ID] = 1000.0
+
+    directory = tempfile.mkdtemp()
+    try:
+        write_lookup_model(os.path.join(directory, "model.onnx"), table)
+        tokenizer = WordTokenizer()
+        encoder = OnnxSentenceEncoder(directory, quantized=True, max_seq_length=6, tokenizer=tokenizer)
+        assert encoder.model_path.endswith("model.onnx")
+        assert "token_type_ids" in encoder.input_names
+        assert encoder.get_sentence_embedding_dimension() == EMBEDDING_DIM
+
+        texts = [
+            "short",
+            "a somewhat longer sentence here",
+            "two words",
+            "this one is long enough to be truncated by max seq length",
+            "mid length text",
+        ]
+        expected = np.stack([reference_embedding(tokenizer, table, text, 6) for text in texts])
+
+        # Padded batches of mixed lengths pool only over real tokens
+        for batch_size in (1, 2, 32):
+            embeddings = encoder.encode(texts, batch_size=batch_size)
+            assert embeddings.dtype == np.float32 and embeddings.shape == (len(texts), EMBEDDING_DIM)
+            assert np.allclose(embeddings, expected, atol=1e-5), batch_size
+        assert np.allclose(np.linalg.norm(embeddings, axis=1), 1.0, atol=1e-5)
+        print("✅ Mean pooling over masked, padded batches matches NumPy reference")
+
+        single = encoder.encode(texts[1])
+        assert single.shape == (EMBEDDING_DIM,)
+        assert np.allclose(single, expected[1], atol=1e-5)
+        assert encoder.encode([]).shape[0] == 0
+        print("✅ Single texts and empty input")
+
+        raw = OnnxSentenceEncoder(directory, max_seq_length=6, normalize=False, tokenizer=tokenizer)
+        unnormalized = np.stack([reference_embedding(tokenizer, table, text, 6, normalize=False) for text in texts])
+        assert np.allclose(raw.encode(texts, batch_size=2), unnormalized, atol=1e-4)
+        print("✅ normalize=False returns the raw mean")
+
+    finally:
+        shutil.rmtree(directory)
+
+    print("\n🎉 ONNX sentence encoder working correctly!")
+
+if __name__ == "__main__":
+    test_onnx_embedding()
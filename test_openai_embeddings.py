@@ -0,0 +1,117 @@
+import sys
+sys.path.append('.')
+
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.services.openai_embeddings import OpenAIEmbeddingProvider, EmbeddingProviderError
+
+class FakeEmbeddingsHandler(BaseHTTPRequestHandler):
+    """Local stand-in for POST /v1/embeddings"""
+
+    state = {"requests": 0, "in_flight": 0, "max_in_flight": 0, "failures_left": {}}
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        texts = body["input"]
+
+        with self.lock:
+            self.state["requests"] += 1
+            self.state["in_flight"] += 1
+            self.state["max_in_flight"] = max(self.state["max_in_flight"], self.state["in_flight"])
+
+            # Batches starting with a "flaky" text fail a configured number of times
+            fail = self.state["failures_left"].get(texts[0], 0)
+            if fail:
+                self.state["failures_left"][texts[0]] = fail - 1
+
+        time.sleep(0.05)
+
+        with self.lock:
+            self.state["in_flight"] -= 1
+
+        if fail:
+            self._reply(500, {"error": {"message": "temporary failure", "type": "server_error"}})
+            return
+
+        # Return rows out of order to check reassembly by index
+        data = [
+            {"object": "embedding", "index": i, "embedding": [float(len(text)), float(i), 1.0]}
+            for i, text in enumerate(texts)
+        ]
+        self._reply(200, {
+            "object": "list",
+            "data": list(reversed(data)),
+            "model": body["model"],
+            "usage": {"prompt_tokens": len(texts), "total_tokens": len(texts)}
+        })
+
+    def _reply(self, status, payload):
+        encoded = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, *args):
+        pass
+
+def test_openai_embeddings():
+    print("Testing OpenAI Embedding Provider...")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeEmbeddingsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+
+    provider = OpenAIEmbeddingProvider(
+        api_key="test-key",
+        base_url=base_url,
+        batch_size=10,
+        max_in_flight=3,
+        backoff_seconds=0.01
+    )
+
+    try:
+        # 95 texts -> 10 batches, at most 3 in flight
+        texts = [f"text-{i}" + "x" * (i % 7) for i in range(95)]
+        FakeEmbeddingsHandler.state["failures_left"] = {texts[30]: 2}
+
+        embeddings = provider.embed(texts)
+
+        assert embeddings.shape == (95, 3)
+        for i, text in enumerate(texts):
+            assert embeddings[i, 0] == len(text)
+        print("✅ Results reassembled in input order")
+
+        state = FakeEmbeddingsHandler.state
+        assert state["max_in_flight"] <= 3
+        assert state["max_in_flight"] > 1
+        print(f"✅ Concurrency capped at {state['max_in_flight']} in-flight requests")
+
+        # Only the flaky batch was retried
+        assert state["requests"] == 10 + 2
+        stats = provider.get_stats()
+        assert stats["retries"] == 2
+        assert len(provider.get_batch_latencies()) == 10
+        print(f"✅ Failed batch retried alone, p50 latency {stats['latency_p50'] * 1000:.0f} ms")
+
+        # Exhausted retries raise instead of returning zero vectors
+        FakeEmbeddingsHandler.state["failures_left"] = {"always-fails": 100}
+        try:
+            provider.embed(["always-fails"])
+            assert False, "expected EmbeddingProviderError"
+        except EmbeddingProviderError as e:
+            assert e.failed_batches == [0]
+            print("✅ Persistent failures raise EmbeddingProviderError")
+
+    finally:
+        provider.close()
+        server.shutdown()
+
+    print("\n🎉 OpenAI embedding provider working correctly!")
+
+if __name__ == "__main__":
+    test_openai_embeddings()
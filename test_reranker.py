@@ -0,0 +1,81 @@
+import sys
+sys.path.append('.')
+
+import time
+import numpy as np
+from app.services.reranker import CrossEncoderReranker
+
+class WordOverlapScorer:
+    """Deterministic stand-in for a cross-encoder: scores shared words, optionally slowly"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.calls.append(len(pairs))
+        time.sleep(self.delay)
+        return np.array([len(set(q.lower().split()) & set(p.lower().split())) for q, p in pairs], dtype=np.float32)
+
+def test_reranker():
+    print("Testing Cross-Encoder Reranker...")
+
+    chunks = [
+        {"chunk_id": 1, "content": "bananas are yellow", "similarity": 0.9},
+        {"chunk_id": 2, "content": "how to reset a password", "similarity": 0.8},
+        {"chunk_id": 3, "content": "password reset steps for admins", "similarity": 0.7},
+        {"chunk_id": 4, "content": "unrelated tail chunk", "similarity": 0.6},
+    ]
+
+    # One batched pass over the candidates, most relevant first
+    scorer = WordOverlapScorer()
+    reranker = CrossEncoderReranker(model=scorer, max_candidates=3, time_budget_ms=1000)
+    results = reranker.rerank("reset password steps", chunks, top_n=3)
+    assert [chunk["chunk_id"] for chunk in results] == [3, 2, 1]
+    assert results[0]["rerank_score"] == 3.0
+    assert scorer.calls == [3]
+    print("✅ Candidates reranked in a single forward pass")
+
+    # Chunks beyond max_candidates keep their place after the reranked ones
+    results = reranker.rerank("reset password steps", chunks)
+    assert [chunk["chunk_id"] for chunk in results] == [3, 2, 1, 4]
+    assert "rerank_score" not in results[-1]
+    print("✅ Tail beyond the candidate window preserved")
+
+    # Blowing the budget returns the retrieval order untouched
+    slow = CrossEncoderReranker(model=WordOverlapScorer(delay=0.3), time_budget_ms=50)
+    start = time.perf_counter()
+    results = slow.rerank("reset password steps", chunks, top_n=2)
+    assert time.perf_counter() - start < 0.25
+    assert [chunk["chunk_id"] for chunk in results] == [1, 2]
+    assert slow.get_stats()["timeouts"] == 1
+    print("✅ Time budget falls back to original order")
+
+    # While the timed-out pass is still running, calls fall back without queueing more work
+    scorer = slow.model
+    calls = len(scorer.calls)
+    start = time.perf_counter()
+    results = slow.rerank("reset password steps", chunks, top_n=2)
+    assert time.perf_counter() - start < 0.05
+    assert [chunk["chunk_id"] for chunk in results] == [1, 2]
+    assert slow.get_stats()["skipped"] == 1
+    time.sleep(0.35)
+    assert len(scorer.calls) == calls
+    scorer.delay = 0.0
+    results = slow.rerank("reset password steps", chunks, top_n=2)
+    assert results[0]["chunk_id"] == 3 and "rerank_score" in results[0]
+    print("✅ Abandoned passes block new work only until they finish")
+
+    # Model errors also fall back
+    class Broken:
+        def predict(self, *args, **kwargs):
+            raise RuntimeError("boom")
+    broken = CrossEncoderReranker(model=Broken())
+    assert [chunk["chunk_id"] for chunk in broken.rerank("q", chunks, top_n=2)] == [1, 2]
+    assert broken.get_stats()["errors"] == 1
+    print("✅ Errors fall back to original order")
+
+    print("\n🎉 Reranker working correctly!")
+
+if __name__ == "__main__":
+    test_reranker()
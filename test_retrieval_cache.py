@@ -0,0 +1,84 @@
+import sys
+sys.path.append('.')
+
+import time
+from app.services.retrieval_cache import RetrievalCache
+
+def test_retrieval_cache():
+    print("Testing Retrieval Cache...")
+
+    cache = RetrievalCache(max_entries=3, ttl_seconds=0.2)
+    hits = [{"chunk_id": 1, "content": "cached passage", "similarity": 0.9, "metadata": {"chunk_index": 0}}]
+
+    # Query normalization and per-parameter keys
+    key = cache.make_key(7, "  What is RAG? ", 5, 0.5)
+    assert key == cache.make_key(7, "what is rag?", 5, 0.5)
+    assert key != cache.make_key(7, "what is rag?", 10, 0.5)
+    assert cache.get(key) is None
+    cache.put(key, hits)
+
+    start = time.perf_counter()
+    result = cache.get(key)
+    elapsed_us = (time.perf_counter() - start) * 1e6
+    assert result == hits
+    result[0]["similarity"] = 0.0
+    result[0]["metadata"]["chunk_index"] = 99
+    assert cache.get(key)[0]["similarity"] == 0.9
+    assert cache.get(key)[0]["metadata"] == {"chunk_index": 0}
+
+    # Edits to the stored list after put don't reach the cache either
+    stored = [dict(hits[0], metadata={"chunk_index": 1})]
+    stored_key = cache.make_key(7, "stored later", 5, 0.5)
+    cache.put(stored_key, stored)
+    stored[0]["metadata"]["chunk_index"] = 42
+    assert cache.get(stored_key)[0]["metadata"] == {"chunk_index": 1}
+    print(f"✅ Hit served in {elapsed_us:.0f} µs and isolated from caller edits")
+
+    # Corpus version bump invalidates only that user
+    other = cache.make_key(8, "what is rag?", 5, 0.5)
+    cache.put(other, hits)
+    cache.invalidate_user(7)
+    assert cache.get(key) is None
+    assert cache.get(cache.make_key(7, "what is rag?", 5, 0.5)) is None
+    assert cache.get(other) == hits
+    print("✅ Upload/delete bumps the user's corpus version")
+
+    # Results computed before a bump are not stored afterwards
+    stale_key = cache.make_key(8, "late result", 5, 0.5)
+    cache.invalidate_user(8)
+    cache.put(stale_key, hits)
+    assert cache.get(cache.make_key(8, "late result", 5, 0.5)) is None
+    print("✅ In-flight results from an old corpus version are dropped")
+
+    # LRU eviction by entry count
+    keys = [cache.make_key(9, f"query {i}", 5, 0.5) for i in range(4)]
+    for k in keys[:3]:
+        cache.put(k, hits)
+    cache.get(keys[0])
+    cache.put(keys[3], hits)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == hits
+    print("✅ Least recently used entry evicted")
+
+    # TTL expiry
+    time.sleep(0.25)
+    assert cache.get(keys[0]) is None
+
+    # Byte cap
+    small = RetrievalCache(max_entries=100, ttl_seconds=60, max_bytes=4000)
+    for i in range(10):
+        small.put(small.make_key(1, f"q{i}", 5), [{"chunk_id": i, "content": "x" * 1000}])
+    stats = small.get_stats()
+    assert stats["bytes"] <= 4000
+    assert stats["evictions"] > 0
+    print("✅ TTL expiry and memory cap")
+
+    stats = cache.get_stats()
+    assert stats["hits"] > 0 and stats["misses"] > 0
+    assert 0 < stats["hit_rate"] < 1
+    print(f"✅ Hit rate {stats['hit_rate']:.2f} over {stats['hits'] + stats['misses']} lookups")
+
+    print("\n🎉 Retrieval cache working correctly!")
+
+if __name__ == "__main__":
+    test_retrieval_cache()
@@ -0,0 +1,105 @@
+import sys
+sys.path.append('.')
+
+import os
+import time
+import shutil
+import tempfile
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, User, Document
+from app.models.chunk import DocumentChunk
+from app.services.reranker import CrossEncoderReranker
+from app.services.vector_database import VectorDatabase
+
+class WordOverlapScorer:
+    """Deterministic stand-in for a cross-encoder: scores shared words, optionally slowly"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        time.sleep(self.delay)
+        return np.array([len(set(q.lower().split()) & set(p.lower().split())) for q, p in pairs], dtype=np.float32)
+
+def add_chunks(db, document, texts):
+    chunks = [
+        DocumentChunk(document_id=document.id, chunk_index=i, content=text, chunk_size=len(text),
+                      start_position=0, end_position=len(text))
+        for i, text in enumerate(texts)
+    ]
+    db.add_all(chunks)
+    db.commit()
+    return chunks
+
+@pytest.mark.usefixtures("stub_models")
+def test_shared_retrieval_cache():
+    print("Testing Shared Retrieval Cache...")
+
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{directory}/cache.db")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    try:
+        index_directory = os.path.join(directory, "index")
+        # e.g. the search router's instance and the one handling uploads
+        searcher = VectorDatabase(backend="flat", index_directory=index_directory)
+        uploader = VectorDatabase(backend="flat", index_directory=index_directory)
+        uploader.collection = searcher.collection
+        assert searcher.retrieval_cache is uploader.retrieval_cache
+        print("✅ Instances share one retrieval cache")
+
+        user = User(username="cache", email="cache@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        document = Document(filename="notes.txt", content="", user_id=user.id)
+        db.add(document)
+        db.commit()
+
+        query = "how the shared retrieval cache is invalidated"
+        uploader.add_chunks_batch(add_chunks(db, document, [f"background passage {i}" for i in range(5)]), db)
+
+        before = searcher.search_similar_chunks(query, user.id, db, limit=3, similarity_threshold=-1.0)
+        hits = searcher.retrieval_cache.get_stats()["hits"]
+        assert searcher.search_similar_chunks(query, user.id, db, limit=3, similarity_threshold=-1.0) == before
+        assert searcher.retrieval_cache.get_stats()["hits"] == hits + 1
+        print("✅ Repeated search is served from the cache")
+
+        # The other instance ingests the best match for the cached query
+        new_chunk = add_chunks(db, document, [query])[0]
+        uploader.add_chunks_batch([new_chunk], db)
+
+        after = searcher.search_similar_chunks(query, user.id, db, limit=3, similarity_threshold=-1.0)
+        assert after[0]["chunk_id"] == new_chunk.id
+        assert new_chunk.id not in {hit["chunk_id"] for hit in before}
+        print("✅ Ingest through another instance invalidates cached results")
+
+        # A rerank that blew its budget falls back to retrieval order and is not cached
+        searcher.reranker = CrossEncoderReranker(model=WordOverlapScorer(delay=0.3), time_budget_ms=50)
+        entries = searcher.retrieval_cache.get_stats()["entries"]
+        fallback = searcher.search_similar_chunks(query, user.id, db, limit=3, similarity_threshold=-1.0, rerank=True)
+        assert not any("rerank_score" in hit for hit in fallback)
+        assert searcher.retrieval_cache.get_stats()["entries"] == entries
+
+        searcher.reranker = CrossEncoderReranker(model=WordOverlapScorer(), time_budget_ms=1000)
+        reranked = searcher.search_similar_chunks(query, user.id, db, limit=3, similarity_threshold=-1.0, rerank=True)
+        assert all("rerank_score" in hit for hit in reranked)
+        hits = searcher.retrieval_cache.get_stats()["hits"]
+        assert searcher.search_similar_chunks(query, user.id, db, limit=3, similarity_threshold=-1.0, rerank=True) == reranked
+        assert searcher.retrieval_cache.get_stats()["hits"] == hits + 1
+        print("✅ Rerank fallbacks are retried, scored reranks are cached")
+
+    finally:
+        db.close()
+        engine.dispose()
+        shutil.rmtree(directory)
+
+    print("\n🎉 Shared retrieval cache working correctly!")
+
+if __name__ == "__main__":
+    from conftest import stub_embedding_models
+    with stub_embedding_models():
+        test_shared_retrieval_cache()
@@ -0,0 +1,68 @@
+import sys
+sys.path.append('.')
+
+import numpy as np
+import time
+from app.services.similarity import normalize_rows, pairwise_similarity, query_similarity, top_k, top_k_similar, mmr_select
+
+def test_similarity():
+    print("Testing Similarity Functions...")
+
+    rng = np.random.default_rng(42)
+    matrix = rng.standard_normal((500, 384)).astype(np.float32)
+    query = rng.standard_normal(384).astype(np.float32)
+
+    # Cosine against a matrix matches the pairwise formula
+    scores = query_similarity(query, matrix)
+    expected = np.array([np.dot(query, row) / (np.linalg.norm(query) * np.linalg.norm(row)) for row in matrix])
+    assert scores.shape == (500,)
+    assert np.allclose(scores, expected, atol=1e-5)
+    print("✅ Query-vs-matrix cosine matches reference")
+
+    # Pre-normalized inputs skip normalization and give the same answer
+    unit = normalize_rows(matrix)
+    assert np.allclose(query_similarity(normalize_rows(query)[0], unit, normalized=True), scores, atol=1e-5)
+    assert np.allclose(query_similarity(query, matrix, metric="dot"), matrix @ query, atol=1e-3)
+    print("✅ Normalized and dot-product modes")
+
+    # Matrix-vs-matrix
+    pairwise = pairwise_similarity(matrix[:3], matrix)
+    assert pairwise.shape == (3, 500)
+    assert np.allclose(np.diag(pairwise[:, :3]), 1.0, atol=1e-5)
+    print("✅ Matrix-vs-matrix scores")
+
+    # Top-k via argpartition agrees with a full sort
+    indices, top_scores = top_k(scores, 10)
+    assert list(indices) == list(np.argsort(-scores)[:10])
+    assert np.all(np.diff(top_scores) <= 0)
+
+    row_indices, _ = top_k(pairwise, 5)
+    assert row_indices.shape == (3, 5)
+    assert list(row_indices[:, 0]) == [0, 1, 2]
+
+    indices, _ = top_k_similar(query, matrix, 1000)
+    assert len(indices) == 500
+    print("✅ Top-k selection")
+
+    # Zero vectors don't produce NaNs
+    assert query_similarity(np.zeros(384), matrix[:2]).tolist() == [0.0, 0.0]
+    print("✅ Zero vectors handled")
+
+    # MMR: lambda=1 is relevance order, lower lambda skips near-duplicates
+    base = normalize_rows(rng.standard_normal((3, 384)).astype(np.float32))
+    pool = np.vstack([base[0], base[0] + 0.01 * base[1], base[0] + 0.02 * base[2], base[1], base[2]])
+    probe = base[0] + 0.3 * base[1] + 0.3 * base[2]
+    assert list(mmr_select(probe, pool, 3, lambda_mult=1.0)) == list(top_k_similar(probe, pool, 3)[0])
+    diverse = mmr_select(probe, pool, 3, lambda_mult=0.3)
+    assert diverse[0] == top_k_similar(probe, pool, 1)[0][0]
+    assert {3, 4} <= set(diverse.tolist())
+    assert len(mmr_select(probe, pool, 10)) == 5
+
+    start = time.perf_counter()
+    mmr_select(query, matrix[:300], 10)
+    print(f"✅ MMR diversification ({(time.perf_counter() - start) * 1000:.2f} ms for 10 of 300)")
+
+    print("\n🎉 Similarity functions working correctly!")
+
+if __name__ == "__main__":
+    test_similarity()
@@ -0,0 +1,94 @@
+import sys
+sys.path.append('.')
+
+import re
+from app.services.text_chunker import TextChunker
+from app.services.token_counter import TokenCounter
+
+class PieceTokenizer:
+    """Deterministic stand-in for a fast tokenizer: one word-piece per 4 characters of each word"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, add_special_tokens=True, return_offsets_mapping=False):
+        self.calls.append(len(texts))
+        special = [101, 102] if add_special_tokens else []
+        encoded = {"input_ids": [[0] * sum(-(-len(word) // 4) for word in text.split()) + special for text in texts]}
+        if return_offsets_mapping:
+            encoded["offset_mapping"] = [
+                [(start, min(start + 4, word.end())) for word in re.finditer(r'\S+', text) for start in range(word.start(), word.end(), 4)]
+                for text in texts
+            ]
+        return encoded
+
+def test_token_chunking():
+    print("Testing Token-Aware Chunking...")
+
+    sentences = [f"Sentence {i} talks about retrieval, embeddings and {'tokenization ' * (i % 7)}budgets." for i in range(300)]
+    text = "  ".join(sentences)
+
+    tokenizer = PieceTokenizer()
+    counter = TokenCounter(tokenizer=tokenizer, max_seq_length=128)
+    chunker = TextChunker(max_tokens=500, token_overlap=40, token_counter=counter)
+    assert chunker.token_budget == 126
+
+    chunks = chunker.create_chunks(text)
+    chunking_calls = len(tokenizer.calls)
+    joined = " ".join(chunker.split_by_sentences(chunker.clean_text(text)))
+    for chunk in chunks:
+        assert chunk['token_count'] <= 126
+        assert chunk['token_count'] == counter.count([chunk['content']])[0]
+        assert joined[chunk['start_position']:chunk['end_position']] == chunk['content']
+    print(f"✅ {len(chunks)} chunks, all within the {chunker.token_budget}-token budget")
+
+    # Character-sized chunks overflow what the model embeds
+    char_chunks = TextChunker(chunk_size=1000, overlap=200).create_chunks(text)
+    overflowing = sum(1 for count in counter.count([chunk['content'] for chunk in char_chunks]) if count > 126)
+    assert overflowing > 0
+    print(f"✅ Character mode: {overflowing} of {len(char_chunks)} chunks would be truncated")
+
+    # Whole trailing sentences carried as overlap
+    overlapping = 0
+    for previous, chunk in zip(chunks, chunks[1:]):
+        if chunk['start_position'] < previous['end_position']:
+            overlap = joined[chunk['start_position']:previous['end_position']]
+            assert previous['content'].endswith(overlap)
+            assert counter.count([overlap])[0] <= 40
+            overlapping += 1
+    assert overlapping > len(chunks) // 2
+    print("✅ Sentence overlap within token_overlap")
+
+    # Sentences are tokenized in batches, and repeats come from the cache
+    assert chunking_calls == 2
+    calls = len(tokenizer.calls)
+    assert list(chunker.iter_chunks(text, read_size=100)) == chunks
+    assert len(tokenizer.calls) == calls
+    assert counter.get_stats()["hits"] > 0
+    print(f"✅ {len(sentences)} sentences tokenized in {chunking_calls} calls, cached on re-chunking")
+
+    # An over-long sentence is split at word boundaries
+    long_sentence = " ".join(f"word{i:04d}" for i in range(200)) + "."
+    pieces = chunker.create_chunks(long_sentence)
+    assert len(pieces) > 1
+    assert all(piece['token_count'] <= 126 for piece in pieces)
+    assert " ".join(piece['content'] for piece in pieces).split() == long_sentence.split()
+    print("✅ Over-long sentences split at word boundaries")
+
+    # A single word over the budget is cut at token boundaries instead of being truncated by the encoder
+    text = "Short opening sentence. Checksum " + "0123456789abcdef" * 40 + " follows here. Closing words."
+    joined = " ".join(chunker.split_by_sentences(chunker.clean_text(text)))
+    pieces = chunker.create_chunks(text)
+    assert [piece['token_count'] for piece in pieces] == [9, 126, 42]
+    for piece in pieces:
+        assert counter.count([piece['content']])[0] == piece['token_count']
+        assert joined[piece['start_position']:piece['end_position']] == piece['content']
+    assert pieces[0]['content'] == "Short opening sentence. Checksum"
+    assert pieces[2]['content'].endswith("cdef follows here. Closing words.")
+    assert pieces[1]['content'] + pieces[2]['content'].split()[0] == "0123456789abcdef" * 40
+    print("✅ Over-long words split at token boundaries")
+
+    print("\n🎉 Token-aware chunking working correctly!")
+
+if __name__ == "__main__":
+    test_token_chunking()
@@ -0,0 +1,80 @@
+import sys
+sys.path.append('.')
+
+import os
+import shutil
+import tempfile
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, User, Document
+from app.models.chunk import DocumentChunk
+from app.services.vector_database import VectorDatabase
+
+def add_document(db, user, texts):
+    document = Document(filename=f"{user.username}.txt", content="", user_id=user.id)
+    db.add(document)
+    db.commit()
+    chunks = [
+        DocumentChunk(document_id=document.id, chunk_index=i, content=text, chunk_size=len(text),
+                      start_position=0, end_position=len(text))
+        for i, text in enumerate(texts)
+    ]
+    db.add_all(chunks)
+    db.commit()
+    return chunks
+
+@pytest.mark.usefixtures("stub_models")
+def test_user_isolation():
+    print("Testing Per-User Search Isolation...")
+
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{directory}/isolation.db")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    try:
+        large = User(username="large", email="large@example.com", hashed_password="x")
+        small = User(username="small", email="small@example.com", hashed_password="x")
+        db.add_all([large, small])
+        db.commit()
+
+        large_chunks = add_document(db, large, [f"quarterly report section {i} for the large tenant" for i in range(60)])
+        small_chunks = add_document(db, small, ["the small tenant's only roadmap note", "the small tenant's budget"])
+        owned = {
+            large.id: {chunk.id for chunk in large_chunks},
+            small.id: {chunk.id for chunk in small_chunks}
+        }
+
+        for backend in ("chroma", "flat", "ivf"):
+            vector_db = VectorDatabase(
+                backend=backend,
+                persist_directory=os.path.join(directory, backend),
+                index_directory=os.path.join(directory, backend)
+            )
+            vector_db.add_chunks_batch(large_chunks + small_chunks, db)
+
+            # Querying with the other tenant's exact text still stays inside the caller's corpus
+            for user, query in ((large, small_chunks[0].content), (small, large_chunks[0].content)):
+                for limit in (1, 5, 20):
+                    hits = vector_db.search_similar_chunks(query, user.id, db, limit=limit, similarity_threshold=-1.0)
+                    ids = {hit["chunk_id"] for hit in hits}
+                    assert ids <= owned[user.id], (backend, user.username, limit)
+                    assert len(hits) == min(limit, len(owned[user.id])), (backend, user.username, limit)
+
+            # The small corpus is returned whole even when the large one dominates the index
+            hits = vector_db.search_similar_chunks(large_chunks[0].content, small.id, db, limit=10, similarity_threshold=-1.0)
+            assert {hit["chunk_id"] for hit in hits} == owned[small.id]
+            print(f"✅ {backend}: each user only sees their own chunks")
+
+    finally:
+        db.close()
+        engine.dispose()
+        shutil.rmtree(directory)
+
+    print("\n🎉 Per-user search isolation working correctly!")
+
+if __name__ == "__main__":
+    from conftest import stub_embedding_models
+    with stub_embedding_models():
+        test_user_isolation()